@@ -32,12 +32,12 @@ class DownloadData(QAction):
             case "scan":
                 scan_id: int = self.parent().get_value_from_row(0)
                 prj_id: int = self.parent().get_value_from_row(1)
-                runner: SaveScans = SaveScans(prj_id, scan_id, download=True)
+                runner: SaveScans = SaveScans(prj_id, scan_id, download=True, sync=True)
                 DownloadScans(runner, parent_widget=self.parent())
                 return
             case "project":
                 prj_id = self.parent().get_value_from_row(0)
-                runner = SaveScans(prj_id, download=True)
+                runner = SaveScans(prj_id, download=True, sync=True)
                 DownloadScans(runner, parent_widget=self.parent())
                 return
             case _:
@@ -4,21 +4,62 @@ Update the table in the main window.
 
 from __future__ import annotations
 
+import logging
 import typing
 
-from PySide6.QtCore import QSortFilterProxyModel
+from psycopg.errors import QueryCanceled
+from PySide6.QtCore import QSortFilterProxyModel, QTimer
 from PySide6.QtGui import QAction, Qt
 from PySide6.QtWidgets import QHeaderView, QStyle
 
+from client.runners import RunnerKilledException, get_scheduler
+from client.runners.load import LoadMetadata, LoadTable
 from client.widgets.table import TableModel
 
 if typing.TYPE_CHECKING:
+    from client.runners import GenericRunner
+    from client.runners.load import MetadataLoad, TableLoad
     from client.widgets.main_window import MainWindow
 
+# Milliseconds to wait after the last keystroke before searching
+SEARCH_DELAY_MS: int = 300
+
 
 class UpdateTable(QAction):
+    def _on_load_finished(self) -> None:
+        """Hide the loading indicator once every load has finished."""
+
+        self.loading -= 1
+        if self.loading == 0:
+            self.parent().loading_bar.hide()
+
+    def _on_load_error(self, error: tuple[type, BaseException, str]) -> None:
+        """Report a failed load, unless it failed because it was cancelled."""
+
+        exc_type, value, _ = error
+        if issubclass(exc_type, (RunnerKilledException, QueryCanceled)):
+            return
+        logging.error("Failed to load from the database: %s", value)
+        self.parent().statusBar().showMessage(f"Failed to load: {value}")
+
+    def _start(self, runner: GenericRunner) -> None:
+        """Run a load with the job scheduler, showing the loading indicator."""
+
+        self.loading += 1
+        self.parent().loading_bar.show()
+        runner.signals.error.connect(self._on_load_error)
+        runner.signals.finished.connect(self._on_load_finished)
+        get_scheduler().submit(runner)
+
+    def _on_metadata_loaded(self, result: MetadataLoad) -> None:
+        """Update the metadata panel, unless another row has been selected since."""
+
+        if result.generation != self.metadata_generation:
+            return
+        self.parent().metadata_panel.update_metadata(result.metadata)
+
     def _on_selection_change(self):
-        """Update the metadata when a new row is selected.
+        """Load the metadata when a new row is selected.
 
         This method is called when the selection in the table changes.
         """
@@ -26,43 +67,33 @@ class UpdateTable(QAction):
         # Get the primary key from the first column (assume first column is the pk)
         key: int = self.parent().selected_row()[0]
 
-        # Each item has a different metadata format; use the current table to method
-        metadata: tuple[tuple[any], list[str]]
-        if self.parent().current_table() == "project":
-            metadata = self.parent().db_view.get_project_metadata(key)
-        elif self.parent().current_table() == "scan":
-            metadata = self.parent().db_view.get_scan_metadata(key)
-        elif self.parent().current_table() == '"user"':
-            metadata = self.parent().db_view.get_user_metadata(key)
-        else:
-            raise NotImplementedError(f"Unknown table {self.parent().current_table()}")
+        # Stop loading the metadata of the previous selection; the table being loaded,
+        # if any, is not affected
+        self.metadata_generation += 1
+        if self.metadata_runner is not None:
+            self.metadata_runner.kill()
+        self.metadata_runner = LoadMetadata(
+            self.metadata_generation,
+            self.parent().db_view,
+            self.parent().current_table(),
+            key,
+        )
+        self.metadata_runner.signals.result.connect(self._on_metadata_loaded)
+        self._start(self.metadata_runner)
 
-        # Update the metadata panel with the new metadata
-        self.parent().metadata_panel.update_metadata(metadata)
+    def _on_rows_loaded(self, loaded: int, total: int) -> None:
+        """Show the number of rows loaded in the status bar."""
 
-    def _update_table(self) -> None:
-        """Update table model using SQL command.
+        self.parent().statusBar().showMessage(f"Showing {loaded} of {total} rows")
 
-        This method is called when the action is triggered.
-        """
+    def _show_table(self, table_model: TableModel) -> None:
+        """Show a table model in the table view."""
 
-        # Get table data
-        sel_val, from_val, where_val = self.parent().current_table_query
-        if self.parent().db_view:
-            if where_val:
-                data, col_headers = self.parent().db_view.view_select_from_where(
-                    sel_val, from_val, where_val
-                )
-            else:
-                data, col_headers = self.parent().db_view.view_select_from_where(
-                    sel_val, from_val
-                )
-        else:
-            data = []
-            col_headers = ()
-
-        # Create table model
-        self.parent().table_model = TableModel(data, col_headers)
+        # Show how many rows are loaded as the user scrolls
+        self.parent().table_model = table_model
+        table_model.rows_loaded.connect(self._on_rows_loaded)
+        self._on_rows_loaded(table_model.rowCount(), table_model.total_rows)
+        col_headers: tuple[str, ...] = table_model.column_headers
 
         # Create proxy model
         self.parent().proxy_model = QSortFilterProxyModel()
@@ -70,20 +101,6 @@ class UpdateTable(QAction):
         # Set proxy model to table model
         self.parent().proxy_model.setSourceModel(self.parent().table_model)
 
-        # Make the filters case-insensitive
-        self.parent().proxy_model.setFilterCaseSensitivity(
-            Qt.CaseSensitivity.CaseInsensitive
-        )
-
-        # Connect search query to proxy model
-        # Note: must do this on each table update, or it will disconnect
-        self.parent().search.textChanged.connect(
-            self.parent().proxy_model.setFilterFixedString
-        )
-
-        # Filter by all columns
-        self.parent().proxy_model.setFilterKeyColumn(-1)
-
         # Set the table view to use the proxy model
         self.parent().table_view.setModel(self.parent().proxy_model)
 
@@ -106,12 +123,76 @@ class UpdateTable(QAction):
             self._on_selection_change
         )
 
-        # Let user sort table by column
-        self.parent().table_view.setSortingEnabled(True)
+        # Let user sort table by column; clicking a header reloads the table sorted
+        self.column_headers = col_headers
+        header: QHeaderView = self.parent().table_view.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.blockSignals(True)
+        if self.order_by is None:
+            header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        else:
+            header.setSortIndicator(
+                col_headers.index(self.order_by[0]),
+                Qt.SortOrder.DescendingOrder
+                if self.order_by[1]
+                else Qt.SortOrder.AscendingOrder,
+            )
+        header.blockSignals(False)
 
         # Update metadata panel
         self.parent().metadata_panel.update_metadata()
 
+    def _on_table_loaded(self, result: TableLoad) -> None:
+        """Show a loaded table, unless another table has been requested since."""
+
+        if result.generation != self.table_generation:
+            # Superseded; release the cursor of the stale table
+            if result.cursor is not None:
+                result.cursor.close()
+            return
+        self._show_table(
+            TableModel(
+                result.rows,
+                result.column_headers,
+                cursor=result.cursor,
+                total_rows=result.total_rows,
+            )
+        )
+
+    def _update_table(self) -> None:
+        """Load the table on the thread pool.
+
+        This method is called when the action is triggered. The table currently shown
+        stays until the new one has loaded.
+        """
+
+        # Stop loading the previous table, and the metadata of its selected row
+        self.table_generation += 1
+        self.metadata_generation += 1
+        for runner in (self.table_runner, self.metadata_runner):
+            if runner is not None:
+                runner.kill()
+        self.table_runner = self.metadata_runner = None
+        if self.parent().table_model is not None:
+            self.parent().table_model.close()
+
+        if not self.parent().db_view:
+            self._show_table(TableModel([], ()))
+            return
+
+        # Count the matching rows, then open a cursor to load them a page at a time;
+        # the database searches and sorts, so rows not shown are never transferred
+        self.table_runner = LoadTable(
+            self.table_generation,
+            self.parent().db_view,
+            self.parent().current_table_query,
+            search=self.parent().search.text(),
+            order_by=self.order_by,
+        )
+        self.table_runner.signals.result.connect(self._on_table_loaded)
+        self._start(self.table_runner)
+
     def __init__(self, main_window: MainWindow) -> None:
         """Update table action."""
 
@@ -121,32 +202,72 @@ class UpdateTable(QAction):
         self.setToolTip("Reload the table currently being displayed.")
         self.triggered.connect(self._update_table)  # Runs on self.trigger()
 
+        # Loads run off the GUI thread, ahead of any queued transfers; each new table
+        # or selection starts a new generation of its kind, and results from older
+        # generations are discarded. Tables and metadata are counted separately, so
+        # selecting a row of the old table while a new one loads does not discard it
+        self.table_generation: int = 0
+        self.metadata_generation: int = 0
+        self.loading: int = 0
+        self.table_runner: LoadTable | None = None
+        self.metadata_runner: LoadMetadata | None = None
+
+        # Column to sort by and whether to sort descending; None leaves rows unsorted
+        self.order_by: tuple[str, bool] | None = None
+        self.column_headers: tuple[str, ...] = ()
+
+        # Wait for the user to stop typing before searching
+        self.search_timer: QTimer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.trigger)
+
+    def search(self, _text: str) -> None:
+        """Search the table once the user stops typing.
+
+        Each keystroke restarts the timer, so the queries for stale search text are
+        never sent.
+        """
+
+        self.search_timer.start()
+
+    def sort(self, column: int, order: Qt.SortOrder) -> None:
+        """Reload the table sorted by a column."""
+
+        if not 0 <= column < len(self.column_headers):
+            return
+        self.order_by = (
+            self.column_headers[column],
+            order == Qt.SortOrder.DescendingOrder,
+        )
+        self.trigger()
+
     def with_users(self) -> None:
         """Update the table widget to display users."""
 
+        self.order_by = None
         self.parent().current_table_query = (
-            "user_id, first_name, last_name, email_address",
-            '"user"',
-            None,
+            "user",
+            ("user_id", "first_name", "last_name", "email_address"),
         )
         self.trigger()
 
     def with_scans(self) -> None:
         """Update the table widget to display scans."""
 
+        self.order_by = None
         self.parent().current_table_query = (
-            "scan_id, project_id, instrument_id",
             "scan",
-            None,
+            ("scan_id", "project_id", "instrument_id"),
         )
         self.trigger()
 
     def with_projects(self) -> None:
         """Update table to display projects."""
 
+        self.order_by = None
         self.parent().current_table_query = (
-            "project_id, title, start_date, end_date",
             "project",
-            None,
+            ("project_id", "title", "start_date", "end_date"),
         )
         self.trigger()
@@ -30,12 +30,14 @@ class UploadData(QAction):
             case "scan":
                 scan_id: int = self.parent().get_value_from_row(0)
                 prj_id: int = self.parent().get_value_from_row(1)
-                runner: SaveScans = SaveScans(prj_id, scan_id, download=False)
+                runner: SaveScans = SaveScans(
+                    prj_id, scan_id, download=False, sync=True
+                )
                 UploadScans(runner, parent_widget=self.parent())
                 return
             case "project":
                 prj_id = self.parent().get_value_from_row(0)
-                runner = SaveScans(prj_id, download=False)
+                runner = SaveScans(prj_id, download=False, sync=True)
                 UploadScans(runner, parent_widget=self.parent())
                 return
             case _:
@@ -0,0 +1,367 @@
+"""
+Run downloads, uploads, validations and additions from the command line, without a GUI.
+
+The commands run the same runners as the GUI, so they can be scheduled (e.g., by cron)
+on machines without a display, such as the storage servers. Progress is written to
+stdout as JSON lines, one event per line, e.g.:
+
+    {"event": "progress", "job": "Validate project 1", "files": 12, "size": 4096, ...}
+
+Each job writes a start event, then indexed and progress events, and then a result or
+error event. The exit code tells how the command ended; see the EXIT_ constants.
+
+Usage: python -m client.cli {download,upload,validate,add} --help
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TextIO
+
+from PySide6.QtCore import Qt
+
+from client import settings
+from client.db.utils import dict_to_conn_str
+from client.library import get_relative_path, local_path
+from client.runners.add_scan import AddScan
+from client.runners.generic import RunnerKilledException, RunnerStatus
+from client.runners.ingest import SCAN_FORMATS, IngestScans, read_scan_record
+from client.runners.save import SaveScans
+from client.runners.validate import ValidateScans
+from client.utils.file import create_dir
+from client.utils.toml import load_toml
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from client.db.ingest import IngestResult, ScanRecord
+    from client.runners.generic import GenericRunner
+    from client.runners.progress import Progress
+    from client.utils.sync import SyncPlan
+
+# Exit codes
+EXIT_OK: int = 0
+# A job raised an exception, or some scans could not be added
+EXIT_ERROR: int = 1
+# The arguments were invalid (as argparse exits)
+EXIT_USAGE: int = 2
+# Validation found the local data differs from the permanent data
+EXIT_INVALID: int = 3
+# The command was interrupted (e.g., with Ctrl+C)
+EXIT_INTERRUPTED: int = 130
+
+
+class JsonLines:
+    """Write events as JSON lines; thread-safe, as runners report from workers."""
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        """Initialize the writer.
+
+        :param stream: where to write the events (default: stdout, when written)
+        """
+
+        self._stream: TextIO | None = stream
+        self._lock: threading.Lock = threading.Lock()
+
+    def write(self, event: str, **fields: Any) -> None:
+        """Write an event with its fields, flushing so readers see it at once."""
+
+        line: str = json.dumps({"event": event, **fields}, default=str)
+        # Look stdout up when writing, so it can be redirected
+        stream: TextIO = self._stream or sys.stdout
+        with self._lock:
+            stream.write(line + "\n")
+            stream.flush()
+
+
+class JobOutcome:
+    """How a job ended: its result, and the exception it raised, if any."""
+
+    def __init__(self) -> None:
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.interrupted: bool = False
+
+    @property
+    def exit_code(self) -> int:
+        """Get the exit code for a job that raised an exception or was interrupted."""
+
+        if self.interrupted or isinstance(self.error, RunnerKilledException):
+            return EXIT_INTERRUPTED
+        if self.error is not None:
+            return EXIT_ERROR
+        return EXIT_OK
+
+
+def run_job(runner: GenericRunner, out: JsonLines) -> JobOutcome:
+    """Run a runner on a thread, writing its progress, and wait for it to end.
+
+    Signals are connected directly, so they are handled on the thread emitting them
+    without a Qt event loop. If the wait is interrupted, the runner is killed and the
+    job winds down before returning.
+
+    :param runner: runner to run
+    :param out: where to write the events
+    :return: how the job ended
+    """
+
+    def report(progress: Progress) -> None:
+        """Write the progress of the job."""
+
+        out.write("progress", job=runner.description, **progress._asdict())
+
+    def indexed(files: int, size: int) -> None:
+        """Write the files found while indexing."""
+
+        out.write("indexed", job=runner.description, files=files, size=size)
+
+    def finished(result: Any) -> None:
+        """Keep the result returned by the job."""
+
+        outcome.result = result
+
+    def failed(error: tuple[type[BaseException], BaseException, str]) -> None:
+        """Keep the exception raised by the job."""
+
+        outcome.error = error[1]
+
+    outcome: JobOutcome = JobOutcome()
+    direct: Qt.ConnectionType = Qt.ConnectionType.DirectConnection
+    runner.signals.report.connect(report, direct)
+    runner.signals.indexed.connect(indexed, direct)
+    runner.signals.result.connect(finished, direct)
+    runner.signals.error.connect(failed, direct)
+    out.write("start", job=runner.description)
+
+    # A runner can finish while it is set up (e.g., if validation fails before any
+    # file is read), in which case there is nothing to run
+    if runner.worker_status is not RunnerStatus.FINISHED:
+        done: threading.Event = threading.Event()
+
+        def run() -> None:
+            """Run the job, and tell the main thread when it has ended."""
+
+            try:
+                runner.run()
+            finally:
+                done.set()
+
+        threading.Thread(target=run, name=runner.description, daemon=True).start()
+        try:
+            # Wait on an event rather than joining the thread, as a join interrupted by
+            # Ctrl+C can return before the thread has ended
+            while not done.wait(0.2):
+                pass
+        except KeyboardInterrupt:
+            outcome.interrupted = True
+            runner.kill()
+            done.wait()
+
+    if outcome.exit_code == EXIT_INTERRUPTED:
+        out.write("interrupted", job=runner.description)
+    elif outcome.error is not None:
+        out.write(
+            "error",
+            job=runner.description,
+            type=type(outcome.error).__name__,
+            message=str(outcome.error),
+        )
+    return outcome
+
+
+def save(args: argparse.Namespace, out: JsonLines) -> int:
+    """Download or upload scans between the libraries."""
+
+    runner: SaveScans = SaveScans(
+        args.project,
+        *args.scans,
+        download=args.command == "download",
+        sync=args.sync,
+        delete=args.delete,
+        dry_run=args.dry_run,
+    )
+    outcome: JobOutcome = run_job(runner, out)
+    if outcome.exit_code == EXIT_OK:
+        plans: dict[str, SyncPlan] = runner.plans
+        out.write(
+            "result",
+            job=runner.description,
+            scans={scan: plan.report() for scan, plan in plans.items()},
+            methods=dict(runner.transfer_methods),
+        )
+    return outcome.exit_code
+
+
+def validate(args: argparse.Namespace, out: JsonLines) -> int:
+    """Validate the local copy of scans against the permanent library."""
+
+    runner: ValidateScans = ValidateScans(
+        args.project,
+        *args.scans,
+        deep=args.deep,
+        executor="process" if args.processes else None,
+    )
+    outcome: JobOutcome = run_job(runner, out)
+    if outcome.exit_code != EXIT_OK:
+        return outcome.exit_code
+    valid: bool = runner.result_value is True
+    out.write("result", job=runner.description, valid=valid)
+    return EXIT_OK if valid else EXIT_INVALID
+
+
+def get_conn_str(args: argparse.Namespace) -> str:
+    """Get the connection string given, or the one in the database settings."""
+
+    if args.conn_str:
+        return str(args.conn_str)
+    return dict_to_conn_str(load_toml(settings.database))
+
+
+def add(args: argparse.Namespace, out: JsonLines) -> int:
+    """Copy scan directories to the local library, and add them to the database.
+
+    The project and scan IDs are read from each scan's user_form.toml.
+    """
+
+    exit_code: int = EXIT_OK
+    added: list[Path] = []
+    for path in args.paths:
+        try:
+            record: ScanRecord | None = read_scan_record(path, args.format)
+        except FileNotFoundError:
+            record = None
+        if record is None:
+            out.write(
+                "error",
+                job=f"Add {path}",
+                message="No scan metadata, or no scan, project or instrument ID",
+            )
+            exit_code = EXIT_ERROR
+            continue
+        # Create the scan's directory in the local library, like the add dialogue
+        create_dir(local_path(get_relative_path(record.project_id, record.scan_id)))
+        outcome: JobOutcome = run_job(
+            AddScan(record.project_id, record.scan_id, SCAN_FORMATS[args.format](path)),
+            out,
+        )
+        if outcome.exit_code == EXIT_INTERRUPTED:
+            return EXIT_INTERRUPTED
+        if outcome.exit_code != EXIT_OK:
+            exit_code = EXIT_ERROR
+            continue
+        added.append(path)
+
+    if args.database and added:
+        runner: IngestScans = IngestScans(get_conn_str(args), added, args.format)
+        outcome = run_job(runner, out)
+        if outcome.exit_code != EXIT_OK:
+            return outcome.exit_code
+        result: IngestResult = outcome.result
+        out.write(
+            "result",
+            job=runner.description,
+            rows=result.rows,
+            rows_per_second=result.rows_per_second,
+            skipped=[str(path) for path in runner.skipped],
+        )
+        if runner.skipped:
+            exit_code = EXIT_ERROR
+    return exit_code
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    """Parse the command line."""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m client.cli",
+        description="Run TAMS jobs without a GUI, writing progress as JSON lines.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for command, help_text in (
+        ("download", "copy scans from the permanent library to the local library"),
+        ("upload", "copy scans from the local library to the permanent library"),
+    ):
+        save_parser = commands.add_parser(command, help=help_text)
+        save_parser.add_argument("project", type=int, help="project ID")
+        save_parser.add_argument(
+            "scans", type=int, nargs="*", help="scan IDs (default: every scan)"
+        )
+        save_parser.add_argument(
+            "--sync", action="store_true", help="only copy new or changed files"
+        )
+        save_parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="delete files missing from the source (implies --sync)",
+        )
+        save_parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="report what would change, without changing anything",
+        )
+        save_parser.set_defaults(func=save)
+
+    validate_parser = commands.add_parser(
+        "validate", help="check the local library matches the permanent library"
+    )
+    validate_parser.add_argument("project", type=int, help="project ID")
+    validate_parser.add_argument(
+        "scans", type=int, nargs="*", help="scan IDs (default: every scan)"
+    )
+    validate_parser.add_argument(
+        "--deep",
+        action="store_true",
+        help="hash every file, ignoring the hashes recorded in the manifests",
+    )
+    validate_parser.add_argument(
+        "--processes",
+        action="store_true",
+        help="hash files in a process per core, e.g., on a server with many cores",
+    )
+    validate_parser.set_defaults(func=validate)
+
+    add_parser = commands.add_parser(
+        "add", help="copy scan directories to the local library"
+    )
+    add_parser.add_argument(
+        "paths", type=Path, nargs="+", help="scan directories, with a user_form.toml"
+    )
+    add_parser.add_argument(
+        "--format", choices=tuple(SCAN_FORMATS), default="Nikon", help="scan format"
+    )
+    add_parser.add_argument(
+        "--database",
+        action="store_true",
+        help="also add the scans and their metadata to the database",
+    )
+    add_parser.add_argument(
+        "--conn-str",
+        help="psycopg connection string (default: from the database settings)",
+    )
+    add_parser.set_defaults(func=add)
+
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run a command, returning its exit code."""
+
+    args: argparse.Namespace = parse_args(argv)
+    out: JsonLines = JsonLines()
+    try:
+        return int(args.func(args, out))
+    except KeyboardInterrupt:
+        out.write("interrupted", job=args.command)
+        return EXIT_INTERRUPTED
+    except Exception as exc:  # pylint: disable=broad-except
+        # E.g., a library or project that does not exist, found when setting up a job
+        out.write("error", job=args.command, type=type(exc).__name__, message=str(exc))
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,29 @@
 """
 Import the database codes.
 """
+from psycopg_pool import AsyncConnectionPool, ConnectionPool, PoolTimeout
+
+from .async_pool import get_async_pool
+from .async_views import AsyncDatabaseView
 from .exceptions import MissingTables
+from .migrate import Migrator
 from .models import Database
+from .pool import get_pool
+from .query import Select
 from .utils import dict_to_conn_str
 from .views import DatabaseView
 
-__all__ = ["MissingTables", "Database", "dict_to_conn_str", "DatabaseView"]
+__all__ = [
+    "AsyncConnectionPool",
+    "get_async_pool",
+    "AsyncDatabaseView",
+    "MissingTables",
+    "Database",
+    "Migrator",
+    "ConnectionPool",
+    "PoolTimeout",
+    "get_pool",
+    "Select",
+    "dict_to_conn_str",
+    "DatabaseView",
+]
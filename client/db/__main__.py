@@ -0,0 +1,6 @@
+"""
+Upgrade the database schema from the command line; see client.db.migrate.
+"""
+from .migrate import main
+
+main()
@@ -0,0 +1,115 @@
+"""
+Asynchronous database connection pool.
+
+The asynchronous counterpart of client.db.pool, using psycopg_pool.AsyncConnectionPool.
+An AsyncConnection belongs to the event loop it was opened on, so the application runs
+one event loop for its lifetime, on a thread of its own, and keeps the asynchronous
+pools on it. Coroutines are run on that loop with submit, which can be called from any
+thread; connections stay open between the queries of one dialogue and the next, rather
+than being opened for each.
+"""
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from psycopg_pool import AsyncConnectionPool
+
+from client import settings
+
+if TYPE_CHECKING:
+    from collections.abc import Coroutine
+    from concurrent.futures import Future
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_pools: dict[str, AsyncConnectionPool] = {}
+_lock: threading.Lock = threading.Lock()
+# Held on the shared event loop while a pool is opened, so each database gets one
+_open_lock: asyncio.Lock = asyncio.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Get the event loop shared by the application, starting it on first use."""
+
+    global _loop  # pylint: disable=global-statement
+    with _lock:
+        if _loop is None:
+            # psycopg's async connections need a selector event loop, which is not the
+            # default on Windows
+            _loop = (
+                asyncio.SelectorEventLoop()
+                if sys.platform == "win32"
+                else asyncio.new_event_loop()
+            )
+            threading.Thread(
+                target=_loop.run_forever, name="Async database", daemon=True
+            ).start()
+        return _loop
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> Future[T]:
+    """Run a coroutine on the shared event loop, from any thread.
+
+    :param coro: coroutine to run
+    :return: future of its result; cancelling it cancels the coroutine
+    """
+
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+async def get_async_pool(conn_str: str) -> AsyncConnectionPool:
+    """Get the shared asynchronous pool for a database, opening it on first use.
+
+    The pool must only be used on the shared event loop, e.g., in a coroutine given to
+    submit.
+
+    :param conn_str: psycopg connection string
+    :return: connection pool
+    """
+
+    async with _open_lock:
+        pool: AsyncConnectionPool | None = _pools.get(conn_str)
+        if pool is None:
+            # Only dialogues query asynchronously, so connections are opened when they
+            # are first needed rather than kept open from the start
+            pool = AsyncConnectionPool(
+                conn_str,
+                min_size=0,
+                max_size=settings.get_db_pool_max_size(),
+                max_idle=settings.get_db_pool_max_idle(),
+                check=AsyncConnectionPool.check_connection,
+                open=False,
+            )
+            await pool.open()
+            with _lock:
+                _pools[conn_str] = pool
+        return pool
+
+
+@atexit.register
+def close_async_pools() -> None:
+    """Close every shared asynchronous pool, then stop the shared event loop."""
+
+    with _lock:
+        loop: asyncio.AbstractEventLoop | None = _loop
+        pools: list[AsyncConnectionPool] = list(_pools.values())
+        _pools.clear()
+    if loop is None:
+        return
+
+    async def close() -> None:
+        """Close the pools on the loop they are used on."""
+
+        await asyncio.gather(*(pool.close() for pool in pools))
+
+    try:
+        asyncio.run_coroutine_threadsafe(close(), loop).result(5)
+    except Exception:  # pylint: disable=broad-except
+        logging.debug("Error closing async pools.", exc_info=True)
+    loop.call_soon_threadsafe(loop.stop)
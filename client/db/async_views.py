@@ -0,0 +1,93 @@
+"""
+Asynchronous views of the database.
+
+DatabaseView runs one query at a time, so a dialogue that needs several lookups waits
+for one round trip after another. AsyncDatabaseView runs its queries on psycopg's
+AsyncConnection, so independent queries can be awaited together (e.g., with
+asyncio.gather) and finish in about the time of the slowest one.
+
+Each concurrent query needs its own connection. The view borrows them from the shared
+asynchronous pool in client.db.async_pool, so they stay open from one view to the next;
+it is used from the runner in client.runners.query, which runs it on the pool's event
+loop and bridges it to Qt.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from .async_pool import get_async_pool
+
+if TYPE_CHECKING:
+    from psycopg_pool import AsyncConnectionPool
+
+
+class AsyncDatabaseView:
+    """Represent data from the database, with queries that can run concurrently."""
+
+    def __init__(self, conn_str: str, pool: AsyncConnectionPool | None = None) -> None:
+        """Initialize the view; connections are borrowed when queries need them.
+
+        :param conn_str: psycopg connection string
+        :param pool: pool to borrow connections from; defaults to the shared pool for
+            the database, whose size limits the queries run at once
+        """
+
+        self.conn_str: str = conn_str
+        # The shared pool can only be opened on the event loop, so it is fetched when
+        # the view is entered
+        self.pool: AsyncConnectionPool | None = pool
+
+    async def fetch_all(
+        self, query: str, params: tuple[Any, ...] | dict[str, Any] | None = None
+    ) -> list[tuple[Any, ...]]:
+        """Run a query with bound parameters and return every row."""
+
+        if self.pool is None:
+            self.pool = await get_async_pool(self.conn_str)
+        async with self.pool.connection() as conn:
+            cur = await conn.execute(query, params)
+            return await cur.fetchall()
+
+    async def get_projects(self) -> list[tuple[Any, ...]]:
+        """Get the ID and title of every project."""
+
+        return await self.fetch_all(
+            "select project_id, title from project order by project_id;"
+        )
+
+    async def get_instruments(self) -> list[tuple[Any, ...]]:
+        """Get the ID and name of every instrument."""
+
+        return await self.fetch_all(
+            "select instrument_id, name from instrument order by instrument_id;"
+        )
+
+    async def get_scans(self, prj_id: int | None = None) -> list[tuple[Any, ...]]:
+        """Get the ID, name and project ID of every scan, or of a project's scans."""
+
+        if prj_id is None:
+            return await self.fetch_all(
+                "select scan_id, scan_name, project_id from scan order by scan_id;"
+            )
+        return await self.fetch_all(
+            "select scan_id, scan_name, project_id from scan where project_id = %s"
+            " order by scan_id;",
+            (prj_id,),
+        )
+
+    async def get_users(self) -> list[tuple[Any, ...]]:
+        """Get the ID and name of every user."""
+
+        return await self.fetch_all(
+            'select user_id, first_name, last_name from "user" order by user_id;'
+        )
+
+    async def __aenter__(self) -> AsyncDatabaseView:
+        """Return the view for use in an async with statement."""
+
+        if self.pool is None:
+            self.pool = await get_async_pool(self.conn_str)
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        """Nothing to close; the connections stay in the pool for the next view."""
@@ -0,0 +1,105 @@
+"""
+Cursors for reading large results in pages.
+
+A client-side cursor transfers every row of a result when the query is executed, so a
+table of hundreds of thousands of rows is read a page at a time instead. A named
+(server-side) cursor would do this too, but it only lives as long as its transaction,
+so it would keep a pooled connection, idle in a transaction with an old snapshot, until
+the last page was fetched: a table left partly scrolled would hold a pool slot and stop
+vacuum from cleaning up.
+
+A KeysetCursor runs a query for each page instead, with keyset pagination (see
+Select.after), so the server seeks straight to the next page however far the user has
+scrolled. Each page borrows a connection from the pool only while it is fetched.
+"""
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any
+
+from .pool import get_pool
+
+if TYPE_CHECKING:
+    from psycopg import Connection
+
+    from .query import Select
+
+# Rows transferred per fetch by default
+PAGE_SIZE: int = 500
+
+
+class KeysetCursor:
+    """A cursor over the result of a select statement, fetched in pages."""
+
+    def __init__(self, conn_str: str, query: Select) -> None:
+        """Create a cursor over a select statement; no rows are fetched until asked.
+
+        The rows are sorted by the statement's sort order, with ties broken by the first
+        column, which must be unique (e.g., the primary key).
+
+        :param conn_str: psycopg connection string
+        :param query: select statement, without a limit
+        """
+
+        self.conn_str: str = conn_str
+        self.query: Select = query.copy()
+        if not self.query.sort_keys or self.query.sort_keys[-1][0] != query.columns[0]:
+            self.query.order_by(query.columns[0])
+        self.exhausted: bool = False
+        # Last row fetched, which the next page starts after
+        self._last: tuple[Any, ...] | None = None
+        # Connection of the fetch in progress, so it can be cancelled
+        self._conn: Connection[Any] | None = None
+
+    def cancel(self) -> None:
+        """Ask the server to stop a fetch in progress.
+
+        This is safe to call from another thread, e.g., when a newer query has made the
+        one being fetched stale.
+        """
+
+        conn: Connection[Any] | None = self._conn
+        if conn is not None:
+            try:
+                conn.cancel()
+            except Exception:  # pylint: disable=broad-except
+                logging.debug("Error cancelling query.", exc_info=True)
+
+    def close(self) -> None:
+        """Stop fetching; no connection is held between pages, so none is released."""
+
+        self.exhausted = True
+
+    def fetch(self, size: int = PAGE_SIZE) -> list[tuple[Any, ...]]:
+        """Fetch the next page of rows; the cursor is exhausted after the last page.
+
+        :param size: maximum number of rows to fetch
+        :return: rows fetched, fewer than size if the result is exhausted
+        """
+
+        if self.exhausted:
+            return []
+        page: Select = self.query.copy().limit(size)
+        if self._last is not None:
+            page.after(self._last)
+        with get_pool(self.conn_str).connection() as conn:
+            self._conn = conn
+            try:
+                rows: list[tuple[Any, ...]] = conn.execute(*page.query()).fetchall()
+            finally:
+                self._conn = None
+        if rows:
+            self._last = rows[-1]
+        if len(rows) < size:
+            self.close()
+        return rows
+
+    def __enter__(self) -> KeysetCursor:
+        """Return the cursor for use in a with statement."""
+
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        """Close the cursor upon exiting its runtime context."""
+
+        self.close()
@@ -0,0 +1,156 @@
+"""
+Load the metadata of many scans into the database at once.
+
+Adding scans one by one costs several round trips each: an insert for the project, one
+for the scan, and an update per metadata column. Back-filling an archive of thousands of
+scans that way takes days. Instead, the scans are copied into a temporary staging table
+with COPY, which streams every row in one operation, and then upserted into the scan
+table with a single statement.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from psycopg import sql
+
+from .pool import get_pool
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+# Scan columns that parsed metadata may set
+SCAN_METADATA_COLUMNS: tuple[str, ...] = (
+    "scan_name",
+    "voltage",
+    "amperage",
+    "exposure",
+    "projections",
+    "voxel_size",
+    "filter_thick",
+    "filter_material",
+    "source_sample_distance",
+    "sample_detector_distance",
+    "lens_type",
+)
+
+# Scans given IDs by the ingest do not advance the identity sequences, so move them on
+# past the largest IDs, or the next scan or project created would clash
+RESET_SEQUENCES: sql.SQL = sql.SQL(
+    "select setval(pg_get_serial_sequence('project', 'project_id'),"
+    " (select greatest(max(project_id), 1) from project)),"
+    " setval(pg_get_serial_sequence('scan', 'scan_id'),"
+    " (select greatest(max(scan_id), 1) from scan));"
+)
+
+
+class ScanRecord(NamedTuple):
+    """The IDs and parsed metadata of a scan to ingest."""
+
+    scan_id: int
+    project_id: int
+    instrument_id: int
+    metadata: dict[str, Any]
+
+
+class IngestResult(NamedTuple):
+    """The number of scans ingested, and how long it took."""
+
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        """Get the throughput of the ingest."""
+
+        return self.rows / self.seconds if self.seconds > 0 else float(self.rows)
+
+
+def ingest_scans(conn_str: str, records: Iterable[ScanRecord]) -> IngestResult:
+    """Insert or update scans in one transaction.
+
+    Scans that do not exist are inserted, along with their projects if those do not
+    exist either. Scans that exist have the metadata columns given updated; their other
+    columns, and their project and instrument, are left as they are. If a scan is given
+    more than once, the last record wins.
+
+    :param conn_str: psycopg connection string
+    :param records: scans to ingest
+    :return: the number of scans ingested, and how long it took
+    """
+
+    start: float = time.perf_counter()
+    scans: dict[int, ScanRecord] = {record.scan_id: record for record in records}
+    if not scans:
+        return IngestResult(0, time.perf_counter() - start)
+
+    # Stage only the metadata columns given, in the order of the table
+    given: set[str] = set().union(*(record.metadata for record in scans.values()))
+    unknown: set[str] = given.difference(SCAN_METADATA_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown scan metadata: {', '.join(sorted(unknown))}")
+    columns: list[str] = [col for col in SCAN_METADATA_COLUMNS if col in given]
+    staged: sql.Composed = sql.SQL(", ").join(
+        sql.Identifier(col)
+        for col in ("scan_id", "project_id", "instrument_id", *columns)
+    )
+
+    with get_pool(conn_str).connection() as conn:
+        with conn.cursor() as cur:
+            # The staging table takes its column types from the scan table
+            cur.execute(
+                sql.SQL(
+                    "create temporary table scan_staging on commit drop as"
+                    " select {} from scan with no data;"
+                ).format(staged)
+            )
+            with cur.copy(
+                sql.SQL("copy scan_staging ({}) from stdin;").format(staged)
+            ) as copy:
+                for record in scans.values():
+                    copy.write_row(
+                        (
+                            record.scan_id,
+                            record.project_id,
+                            record.instrument_id,
+                            *(record.metadata.get(col) for col in columns),
+                        )
+                    )
+
+            cur.execute(
+                "insert into project (project_id)"
+                " select distinct project_id from scan_staging"
+                " on conflict on constraint project_pk do nothing;"
+            )
+            # Metadata missing from a record is null in the staging table; keep the
+            # value in the database rather than clearing it
+            updates: sql.Composable = sql.SQL(", ").join(
+                sql.SQL("{col} = coalesce(excluded.{col}, scan.{col})").format(
+                    col=sql.Identifier(col)
+                )
+                for col in columns
+            )
+            cur.execute(
+                sql.SQL(
+                    "insert into scan ({staged}) select {staged} from scan_staging"
+                    " on conflict on constraint scan_pk do {action};"
+                ).format(
+                    staged=staged,
+                    action=(
+                        sql.SQL("update set ") + updates
+                        if columns
+                        else sql.SQL("nothing")
+                    ),
+                )
+            )
+            cur.execute(RESET_SEQUENCES)
+
+    result: IngestResult = IngestResult(len(scans), time.perf_counter() - start)
+    logging.info(
+        "Ingested %d scans in %.2f s (%.0f rows/s)",
+        result.rows,
+        result.seconds,
+        result.rows_per_second,
+    )
+    return result
@@ -0,0 +1,240 @@
+"""
+Upgrade the database schema with numbered migrations.
+
+initialise.sql creates the baseline schema; every change after it is a migration in the
+migrations directory, named with its version and a description (e.g.,
+0001_lookup_indexes.sql). The versions applied are recorded in the schema_version table,
+so upgrading applies only the migrations a database is missing and can be run again
+safely:
+
+    python -m client.db "host=127.0.0.1 dbname=tams user=postgres"
+
+A migration runs in one transaction, unless it builds indexes concurrently: Postgres
+cannot do that in a transaction, so such a migration runs one statement at a time, and
+each of its statements must be safe to run again (e.g., create index concurrently if not
+exists) in case the upgrade is interrupted. Concurrent builds do not lock out writes,
+so an archive in use can be tuned without downtime.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import psycopg
+from psycopg import sql
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from psycopg import Connection
+
+MIGRATIONS_DIR: Path = Path(__file__).parent / "migrations"
+
+CREATE_VERSION_TABLE: str = (
+    "create table if not exists schema_version ("
+    " version integer constraint schema_version_pk primary key,"
+    " name text not null,"
+    " applied_at timestamptz default now() not null);"
+)
+RECORD_VERSION: str = "insert into schema_version (version, name) values (%s, %s);"
+
+# Held while upgrading, so two clients starting at once do not both apply a migration
+LOCK_QUERY: str = "select pg_advisory_lock(hashtext('tams schema_version'));"
+UNLOCK_QUERY: str = "select pg_advisory_unlock(hashtext('tams schema_version'));"
+
+# Comments, quoted strings and identifiers, dollar-quoted strings, and statement ends
+SQL_TOKEN: re.Pattern[str] = re.compile(
+    r"--[^\n]*|/\*.*?\*/|'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\""
+    r"|(\$(?:[A-Za-z_]\w*)?\$).*?\1|;",
+    re.DOTALL,
+)
+CONCURRENTLY: re.Pattern[str] = re.compile(r"\bconcurrently\b", re.IGNORECASE)
+CONCURRENT_INDEX: re.Pattern[str] = re.compile(
+    r"create\s+(?:unique\s+)?index\s+concurrently\s+if\s+not\s+exists\s+(\w+)",
+    re.IGNORECASE,
+)
+
+
+class Migration(NamedTuple):
+    """A numbered SQL file that changes the schema."""
+
+    version: int
+    name: str
+    path: Path
+
+
+def find_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """Find the migrations in a directory, in order of version.
+
+    :param directory: directory of files named <version>_<name>.sql
+    :return: the migrations, sorted by version
+    """
+
+    migrations: dict[int, Migration] = {}
+    for path in directory.glob("*.sql"):
+        version, _, name = path.stem.partition("_")
+        if not version.isdigit() or not name:
+            raise ValueError(f"Migration {path.name} is not named <version>_<name>.sql")
+        if int(version) in migrations:
+            raise ValueError(
+                f"Migrations {migrations[int(version)].path.name} and {path.name}"
+                " have the same version"
+            )
+        migrations[int(version)] = Migration(int(version), name, path)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def split_statements(text: str) -> list[str]:
+    """Split SQL into statements, leaving out comments.
+
+    Semicolons in quoted strings, quoted identifiers and dollar-quoted strings (e.g.,
+    function bodies) do not end a statement.
+    """
+
+    statements: list[str] = []
+    current: list[str] = []
+    position: int = 0
+    for match in SQL_TOKEN.finditer(text):
+        current.append(text[position : match.start()])
+        position = match.end()
+        token: str = match.group()
+        if token == ";":
+            statements.append("".join(current).strip())
+            current = []
+        elif token.startswith(("--", "/*")):
+            current.append(" ")
+        else:
+            current.append(token)
+    current.append(text[position:])
+    statements.append("".join(current).strip())
+    return [statement for statement in statements if statement]
+
+
+class Migrator:
+    """Apply the migrations a database is missing."""
+
+    def __init__(self, conn_str: str, directory: Path = MIGRATIONS_DIR) -> None:
+        """Initialize the migrator.
+
+        :param conn_str: psycopg connection string
+        :param directory: directory of the migrations
+        """
+
+        self.conn_str: str = conn_str
+        self.migrations: list[Migration] = find_migrations(directory)
+
+    def _connect(self) -> Connection[Any]:
+        """Connect in autocommit mode, so concurrent index builds can run."""
+
+        return psycopg.connect(self.conn_str, autocommit=True)
+
+    @staticmethod
+    def _applied(conn: Connection[Any]) -> set[int]:
+        """Get the versions applied, creating the schema_version table if needed."""
+
+        conn.execute(CREATE_VERSION_TABLE)
+        return {row[0] for row in conn.execute("select version from schema_version;")}
+
+    def pending(self) -> list[Migration]:
+        """Get the migrations the database is missing, in the order to apply them."""
+
+        with self._connect() as conn:
+            applied: set[int] = self._applied(conn)
+        return [m for m in self.migrations if m.version not in applied]
+
+    @staticmethod
+    def _drop_invalid_index(conn: Connection[Any], statement: str) -> None:
+        """Drop an index left invalid by an interrupted concurrent build.
+
+        "if not exists" would otherwise skip the index, leaving it unused.
+        """
+
+        match: re.Match[str] | None = CONCURRENT_INDEX.search(statement)
+        if match is None:
+            return
+        row: tuple[Any, ...] | None = conn.execute(
+            "select pg_index.indisvalid from pg_index"
+            " join pg_class on pg_class.oid = pg_index.indexrelid"
+            " where pg_class.relname = %s and pg_table_is_visible(pg_class.oid);",
+            (match[1],),
+        ).fetchone()
+        if row is not None and not row[0]:
+            logging.warning("Rebuilding invalid index %s", match[1])
+            conn.execute(
+                sql.SQL("drop index concurrently {};").format(sql.Identifier(match[1]))
+            )
+
+    def _apply(self, conn: Connection[Any], migration: Migration) -> None:
+        """Apply a migration and record its version."""
+
+        statements: list[str] = split_statements(
+            migration.path.read_text(encoding="utf8")
+        )
+        if any(CONCURRENTLY.search(statement) for statement in statements):
+            for statement in statements:
+                self._drop_invalid_index(conn, statement)
+                conn.execute(statement)
+            conn.execute(RECORD_VERSION, (migration.version, migration.name))
+        else:
+            with conn.transaction():
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(RECORD_VERSION, (migration.version, migration.name))
+
+    def upgrade(self, target: int | None = None) -> list[Migration]:
+        """Apply the migrations the database is missing, in order of version.
+
+        :param target: apply migrations up to and including this version; defaults to
+            all of them
+        :return: the migrations applied
+        """
+
+        applied_now: list[Migration] = []
+        with self._connect() as conn:
+            conn.execute(LOCK_QUERY)
+            try:
+                # Read the versions once locked, in case another client just upgraded
+                applied: set[int] = self._applied(conn)
+                for migration in self.migrations:
+                    if migration.version in applied:
+                        continue
+                    if target is not None and migration.version > target:
+                        break
+                    logging.info(
+                        "Applying migration %s %s", migration.version, migration.name
+                    )
+                    self._apply(conn, migration)
+                    applied_now.append(migration)
+            finally:
+                conn.execute(UNLOCK_QUERY)
+        return applied_now
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Upgrade a database from the command line."""
+
+    parser = argparse.ArgumentParser(
+        prog="python -m client.db", description="Upgrade the database schema."
+    )
+    parser.add_argument("conn_str", help="psycopg connection string")
+    parser.add_argument("--target", type=int, help="upgrade up to this version")
+    parser.add_argument(
+        "--pending",
+        action="store_true",
+        help="list the migrations the database is missing, without applying them",
+    )
+    args = parser.parse_args(argv)
+
+    migrator = Migrator(args.conn_str)
+    if args.pending:
+        for migration in migrator.pending():
+            print(f"{migration.version} {migration.name}")
+        return
+    applied: list[Migration] = migrator.upgrade(args.target)
+    for migration in applied:
+        print(f"Applied {migration.version} {migration.name}")
+    if not applied:
+        print("The database is up to date")
@@ -0,0 +1,50 @@
+/*
+ Index the foreign keys and link tables.
+ Postgres does not index the referencing side of a foreign key, so without these
+ listing a project's scans, and joining through the link tables, scan whole tables.
+ Every statement can be run again safely, and the indexes are built without locking out
+ writes.
+ */
+
+-- dialect: postgresql
+
+/*
+ Index the scan foreign keys, to list the scans of a project or an instrument.
+ These also save a scan of the scan table when a project or instrument is deleted.
+ */
+
+create index concurrently if not exists scan_project_id_idx
+on scan (project_id);
+create index concurrently if not exists scan_instrument_id_idx
+on scan (instrument_id);
+
+
+/*
+ Key the link tables on both columns, leading with the side looked up most (a
+ project's users and a scan's samples), and index the other side for the reverse.
+ A link listed twice means nothing, so remove duplicates before keying the table.
+ */
+
+delete from project_user as a
+using project_user as b
+where
+    a.ctid < b.ctid
+    and a.project_id = b.project_id
+    and a.user_id = b.user_id;
+
+create unique index concurrently if not exists project_user_project_id_user_id_key
+on project_user (project_id, user_id);
+create index concurrently if not exists project_user_user_id_idx
+on project_user (user_id);
+
+delete from scan_sample as a
+using scan_sample as b
+where
+    a.ctid < b.ctid
+    and a.scan_id = b.scan_id
+    and a.sample_id = b.sample_id;
+
+create unique index concurrently if not exists scan_sample_scan_id_sample_id_key
+on scan_sample (scan_id, sample_id);
+create index concurrently if not exists scan_sample_sample_id_idx
+on scan_sample (sample_id);
@@ -0,0 +1,50 @@
+/*
+ Add search columns and indexes to projects, scans and samples.
+ The weighted search_vector columns are indexed for ranked full-text search (whole
+ words), and the searched text columns are indexed with trigrams for partial matches
+ (ilike). Adding a generated column rewrites its table, so the tables are locked while
+ the columns are added; the indexes are then built without locking out writes.
+ */
+
+-- dialect: postgresql
+
+create extension if not exists pg_trgm;
+
+alter table project add column if not exists search_vector tsvector
+generated always as (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(keyword, '')), 'B')
+    || setweight(to_tsvector('english', coalesce(summary, '')), 'C')
+) stored;
+
+alter table scan add column if not exists search_vector tsvector
+generated always as (
+    setweight(to_tsvector('english', coalesce(scan_name, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(filter_material, '')), 'B')
+    || setweight(to_tsvector('english', coalesce(lens_type, '')), 'C')
+) stored;
+
+alter table sample add column if not exists search_vector tsvector
+generated always as (
+    setweight(to_tsvector('english', coalesce(name, '')), 'A')
+    || setweight(to_tsvector('english', coalesce(material, '')), 'B')
+) stored;
+
+create index concurrently if not exists project_search_vector_idx
+on project using gin(search_vector);
+create index concurrently if not exists project_title_trgm_idx
+on project using gin(title gin_trgm_ops);
+create index concurrently if not exists project_keyword_trgm_idx
+on project using gin(keyword gin_trgm_ops);
+
+create index concurrently if not exists scan_search_vector_idx
+on scan using gin(search_vector);
+create index concurrently if not exists scan_scan_name_trgm_idx
+on scan using gin(scan_name gin_trgm_ops);
+
+create index concurrently if not exists sample_search_vector_idx
+on sample using gin(search_vector);
+create index concurrently if not exists sample_name_trgm_idx
+on sample using gin(name gin_trgm_ops);
+create index concurrently if not exists sample_material_trgm_idx
+on sample using gin(material gin_trgm_ops);
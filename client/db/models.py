@@ -9,10 +9,14 @@ from functools import wraps
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-from psycopg import connect, errors
+from psycopg import errors
+
+from .migrate import Migrator
+from .pool import get_pool
 
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from contextlib import AbstractContextManager
 
     from psycopg import Connection, Cursor
 
@@ -25,6 +29,8 @@ class Database:
         self.conn_str = conn_str
         self.conn: Connection[Any] | None = None  # The Psycopg connection
         self.cur: Cursor[Any] | None = None  # The connection cursor
+        # The loan of the connection from the pool
+        self._loan: AbstractContextManager[Connection[Any]] | None = None
 
     @staticmethod
     def attempt_sql_command(func: Callable[..., Any]) -> Callable[..., Any]:
@@ -59,18 +65,23 @@ class Database:
     def __enter__(self) -> Database:
         """The runtime context of the database class (connecting to the database)."""
 
-        self.conn = connect(self.conn_str)
+        # Borrow a connection from the shared pool rather than opening one
+        self._loan = get_pool(self.conn_str).connection()
+        self.conn = self._loan.__enter__()
         self.cur = self.conn.cursor()
 
         # The 'with' statement binds the object to its 'as' clause (if specified).
         return self
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
-        """Close the database connection upon exiting its runtime context."""
+        """Return the database connection to the pool upon exiting its context."""
         if self.cur is not None:
             self.cur.close()
-        if self.conn is not None:
-            self.conn.close()
+        if self._loan is not None:
+            self._loan.__exit__(exc_type, exc_val, exc_tb)
+        self._loan = None
+        self.conn = None
+        self.cur = None
 
     def __repr__(self) -> str:
         """Return database version when class is repr() or str() is called."""
@@ -104,6 +115,10 @@ class DatabaseInitializer(Database):
         with open(init_instructions, encoding="utf8") as sql_file:
             self.exec(sql_file.read())
 
+        # Bring the schema up to date; on an existing database, the tables above
+        # already exist, and only the migrations it is missing are applied
+        Migrator(self.conn_str).upgrade()
+
     def populate_with_dummy_data(self) -> None:
         """
         Populate the tables with fake data. This should only be used in development.
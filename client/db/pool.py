@@ -0,0 +1,57 @@
+"""
+Database connection pool.
+
+Opening a connection to a remote database means a TLS handshake and authentication,
+which costs far more than the queries the client runs. The pool keeps connections open
+between queries and shares them between the GUI and the runners.
+
+The pool is psycopg_pool.ConnectionPool. Connections are borrowed with its connection
+method, which behaves like psycopg.connect in a with statement: the transaction is
+committed if the block succeeds and rolled back if it raises, but the connection is
+returned to the pool rather than closed. Each connection is checked before it is lent,
+and connections are closed once they have been idle or open for too long.
+"""
+from __future__ import annotations
+
+import atexit
+import threading
+
+from psycopg_pool import ConnectionPool
+
+from client import settings
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock: threading.Lock = threading.Lock()
+
+
+def get_pool(conn_str: str) -> ConnectionPool:
+    """Get the shared pool for a database, creating it on first use.
+
+    :param conn_str: psycopg connection string
+    :return: connection pool
+    """
+
+    with _pools_lock:
+        pool: ConnectionPool | None = _pools.get(conn_str)
+        if pool is None:
+            # The pool opens its minimum connections in the background
+            pool = ConnectionPool(
+                conn_str,
+                min_size=settings.get_db_pool_min_size(),
+                max_size=settings.get_db_pool_max_size(),
+                max_idle=settings.get_db_pool_max_idle(),
+                check=ConnectionPool.check_connection,
+                open=True,
+            )
+            _pools[conn_str] = pool
+        return pool
+
+
+@atexit.register
+def close_pools() -> None:
+    """Close every shared pool."""
+
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
@@ -0,0 +1,230 @@
+"""
+Build select statements with psycopg.sql.
+
+Table and column names are composed as identifiers, and values are bound as parameters
+rather than formatted into the SQL. The text of a statement is then the same whatever
+values it is run with, so psycopg prepares it once it has been run a few times on a
+connection, and the server reuses its plan rather than planning it again (pooled
+connections make this pay off across the session). Binding values also means user
+input, such as search text, can never change the statement.
+"""
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any
+
+from psycopg import sql
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+# Comparison operators a condition may use
+OPERATORS: frozenset[str] = frozenset({"=", "<>", "<", "<=", ">", ">=", "ilike"})
+
+
+def like_pattern(text: str) -> str:
+    """Make an (i)like pattern that matches values containing the text literally."""
+
+    escaped: str = re.sub(r"([\\%_])", r"\\\1", text)
+    return f"%{escaped}%"
+
+
+class Select:
+    """A select statement from one table.
+
+    Conditions are combined with "and". Methods return the statement, so they can be
+    chained, e.g., Select("scan", ("scan_id", "project_id")).where("project_id", 1).
+    """
+
+    def __init__(self, table: str, columns: Sequence[str]) -> None:
+        """Select columns from a table.
+
+        :param table: table name, unquoted (e.g., user, not "user")
+        :param columns: column names
+        """
+
+        if not columns:
+            raise ValueError("Select at least one column")
+        self.table: str = table
+        self.columns: tuple[str, ...] = tuple(columns)
+        self._conditions: list[sql.Composable] = []
+        self._params: list[Any] = []
+        # Columns to sort by, and whether each is sorted descending
+        self._order_by: list[tuple[str, bool]] = []
+        self._limit: int | None = None
+
+    def copy(self) -> Select:
+        """Copy the statement, so it can be changed without changing the original."""
+
+        copied: Select = Select(self.table, self.columns)
+        copied._conditions = list(self._conditions)
+        copied._params = list(self._params)
+        copied._order_by = list(self._order_by)
+        copied._limit = self._limit
+        return copied
+
+    def where(self, column: str, value: Any, operator: str = "=") -> Select:
+        """Select only rows where a column compares to a value.
+
+        :param column: column name
+        :param value: value to compare with, bound as a parameter
+        :param operator: one of OPERATORS
+        """
+
+        if operator not in OPERATORS:
+            raise ValueError(f"Unsupported operator {operator}")
+        self._conditions.append(
+            sql.SQL("{} {} %s").format(sql.Identifier(column), sql.SQL(operator))
+        )
+        self._params.append(value)
+        return self
+
+    def where_any(self, column: str, values: Iterable[Any]) -> Select:
+        """Select only rows where a column equals one of the values.
+
+        The values are bound as one array, so the statement is the same however many
+        values there are.
+        """
+
+        self._conditions.append(sql.SQL("{} = any(%s)").format(sql.Identifier(column)))
+        self._params.append(list(values))
+        return self
+
+    def search(self, text: str, columns: Sequence[str] | None = None) -> Select:
+        """Select only rows where any of the columns contains the text, ignoring case.
+
+        :param text: search text, matched literally; empty text matches every row
+        :param columns: columns to search; defaults to the selected columns
+        """
+
+        if not text:
+            return self
+        searched: Sequence[str] = columns or self.columns
+        self._conditions.append(
+            sql.SQL("({})").format(
+                sql.SQL(" or ").join(
+                    sql.SQL("{}::text ilike %s").format(sql.Identifier(column))
+                    for column in searched
+                )
+            )
+        )
+        self._params.extend([like_pattern(text)] * len(searched))
+        return self
+
+    def order_by(self, column: str, descending: bool = False) -> Select:
+        """Sort by a selected column; call again to break ties by another column."""
+
+        if column not in self.columns:
+            raise ValueError(f"Cannot sort by {column}; it is not selected")
+        self._order_by.append((column, descending))
+        return self
+
+    @property
+    def sort_keys(self) -> tuple[tuple[str, bool], ...]:
+        """Columns sorted by, and whether each is sorted descending."""
+
+        return tuple(self._order_by)
+
+    def after(self, row: Sequence[Any]) -> Select:
+        """Select only rows that come after a row in the sort order.
+
+        This pages through a result with keyset pagination: each page selects the rows
+        after the last row of the previous page, so the server seeks to them rather
+        than reading and discarding every row before them, as an offset would. Nulls
+        sort last in ascending order and first in descending order, as in PostgreSQL.
+        The sort must end with a unique column, or rows tied with the last row are
+        skipped.
+
+        :param row: a row as selected, i.e., with a value for each selected column
+        """
+
+        if not self._order_by:
+            raise ValueError("Cannot select rows after a row without a sort order")
+
+        condition: sql.Composable | None = None
+        params: list[Any] = []
+        # Build the condition from the last sort key to the first: a row comes after
+        # if it comes after on this key, or ties on this key and comes after on the rest
+        for column, descending in reversed(self._order_by):
+            value: Any = row[self.columns.index(column)]
+            ident: sql.Identifier = sql.Identifier(column)
+            later: sql.Composable | None
+            later_params: list[Any] = []
+            if value is None:
+                # Only non-null values follow a null, and only if sorted descending
+                later = sql.SQL("{} is not null").format(ident) if descending else None
+                tie: sql.Composable = sql.SQL("{} is null").format(ident)
+                tie_params: list[Any] = []
+            else:
+                later = sql.SQL("{} {} %s").format(
+                    ident, sql.SQL("<" if descending else ">")
+                )
+                later_params = [value]
+                if not descending:
+                    later = sql.SQL("({} or {} is null)").format(later, ident)
+                tie = sql.SQL("{} = %s").format(ident)
+                tie_params = [value]
+
+            if condition is None:
+                # The last key; a row tied on every key is the row itself
+                condition, params = later or sql.SQL("false"), later_params
+                continue
+            tied: sql.Composable = sql.SQL("({} and {})").format(tie, condition)
+            if later is None:
+                condition, params = tied, tie_params + params
+            else:
+                condition = sql.SQL("({} or {})").format(later, tied)
+                params = later_params + tie_params + params
+
+        self._conditions.append(condition)
+        self._params.extend(params)
+        return self
+
+    def limit(self, rows: int) -> Select:
+        """Select at most this many rows."""
+
+        self._limit = rows
+        return self
+
+    def _from_where(self) -> sql.Composed:
+        """Compose the from and where clauses."""
+
+        clauses: sql.Composed = sql.SQL("from {}").format(sql.Identifier(self.table))
+        if self._conditions:
+            clauses += sql.SQL(" where ") + sql.SQL(" and ").join(self._conditions)
+        return clauses
+
+    def count(self) -> tuple[sql.Composed, tuple[Any, ...]]:
+        """Compose a statement counting the rows selected.
+
+        The limit is left out, so the count is of every row selected.
+
+        :return: the statement, and the values to bind to its placeholders
+        """
+
+        return sql.SQL("select count(*) ") + self._from_where(), tuple(self._params)
+
+    def query(self) -> tuple[sql.Composed, tuple[Any, ...]]:
+        """Compose the statement.
+
+        There is no trailing semicolon, so further clauses can be appended.
+
+        :return: the statement, and the values to bind to its placeholders
+        """
+
+        statement: sql.Composed = (
+            sql.SQL("select {} ").format(
+                sql.SQL(", ").join(sql.Identifier(column) for column in self.columns)
+            )
+            + self._from_where()
+        )
+        if self._order_by:
+            statement += sql.SQL(" order by ") + sql.SQL(", ").join(
+                sql.SQL("{} {}").format(
+                    sql.Identifier(column), sql.SQL("desc" if descending else "asc")
+                )
+                for column, descending in self._order_by
+            )
+        if self._limit is None:
+            return statement, tuple(self._params)
+        return statement + sql.SQL(" limit %s"), (*self._params, self._limit)
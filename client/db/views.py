@@ -1,15 +1,86 @@
 """
 This files classes to represent data from the database to the user.
 """
+from __future__ import annotations
+
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
+from psycopg import sql
 from psycopg.errors import DuplicateObject
 
 from client import settings
 
+from .cursor import KeysetCursor
 from .exceptions import MissingTables
 from .models import Database
+from .query import Select, like_pattern
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from psycopg.abc import Params
+
+TABLES_QUERY: sql.SQL = sql.SQL(
+    "select table_name from information_schema.tables where"
+    " table_schema='public' and table_type='BASE TABLE';"
+)
+
+PROJECT_METADATA_COLUMNS: tuple[str, ...] = (
+    "project_id",
+    "title",
+    "project_type",
+    "summary",
+    "keyword",
+    "start_date",
+    "end_date",
+    "directory_path",
+)
+USER_METADATA_COLUMNS: tuple[str, ...] = (
+    "user_id",
+    "first_name",
+    "last_name",
+    "email_address",
+)
+
+# Scans with their project titles and instrument names, fetched in one round trip
+SCAN_METADATA_QUERY: sql.SQL = sql.SQL(
+    "select scan.scan_id, scan.project_id, project.title, scan.instrument_id,"
+    " instrument.name from scan"
+    " left join project on project.project_id = scan.project_id"
+    " left join instrument on instrument.instrument_id = scan.instrument_id"
+)
+SCAN_METADATA_HEADERS: tuple[str, ...] = ("scan_id", "project_id", "instrument_id")
+
+# Projects, scans and samples matching a search, ranked by full-text and trigram
+# matches; see the search indexes in initialise.sql
+SEARCH_QUERY: sql.SQL = sql.SQL(
+    """
+with query as (select websearch_to_tsquery('english', %(text)s) as tsquery)
+select 'project', project_id, title,
+    ts_rank(search_vector, tsquery) + coalesce(
+        greatest(similarity(title, %(text)s), similarity(keyword, %(text)s)), 0
+    ) as rank
+from project, query
+where search_vector @@ tsquery or title ilike %(pattern)s or keyword ilike %(pattern)s
+union all
+select 'scan', scan_id, scan_name,
+    ts_rank(search_vector, tsquery) + coalesce(similarity(scan_name, %(text)s), 0)
+from scan, query
+where search_vector @@ tsquery or scan_name ilike %(pattern)s
+union all
+select 'sample', sample_id, name,
+    ts_rank(search_vector, tsquery) + coalesce(
+        greatest(similarity(name, %(text)s), similarity(material, %(text)s)), 0
+    )
+from sample, query
+where search_vector @@ tsquery or name ilike %(pattern)s or material ilike %(pattern)s
+order by rank desc, 1, 2
+limit %(limit)s;
+"""
+)
+SEARCH_HEADERS: tuple[str, ...] = ("table", "id", "name", "rank")
+SEARCH_LIMIT: int = 50
 
 
 class DatabaseView:
@@ -25,19 +96,31 @@ class DatabaseView:
             if not database.conn or database.conn.closed:
                 raise ConnectionError("Unable to connect to database")
 
-    def get_tables(self) -> list[tuple[str]]:
-        """Get list of tables in the database."""
+    def _fetch_all(
+        self,
+        query: sql.Composable,
+        params: Params | None = None,
+        prepare: bool | None = None,
+    ) -> list[tuple[Any, ...]]:
+        """Run a query with bound parameters and return every row.
+
+        :param prepare: True to prepare the query now, e.g., for lookups run each time
+            the user selects a row; None leaves psycopg to prepare it once it has been
+            run a few times on the connection
+        """
 
-        query: str = (
-            "select table_name from information_schema.tables where"
-            " table_schema='public' and table_type='BASE TABLE';"
-        )
         with Database(self.conn_str) as database:
             if database.cur:
-                database.exec(query)
+                database.exec(query, params, prepare=prepare)
                 return database.cur.fetchall()
             raise ConnectionError("Unable to connect to database")
 
+    def get_tables(self) -> list[tuple[str]]:
+        """Get list of tables in the database."""
+
+        rows: list[tuple[str]] = self._fetch_all(TABLES_QUERY)
+        return rows
+
     def validate_tables(self) -> None:
         """Validate tables in the database."""
 
@@ -51,34 +134,54 @@ class DatabaseView:
         if missing_tables:
             raise MissingTables(missing_tables)
 
-    def view_select_from_where(
-        self, select_value: str, from_value: str, *where_value: tuple[str] | str
+    def select(
+        self, query: Select, prepare: bool | None = None
     ) -> tuple[list[tuple[Any, ...]], tuple[str, ...]]:
-        """Return selection."""
+        """Run a select statement.
 
-        # Construct SQL query
-        query = f"select {select_value} from {from_value}"
-        if where_value:
-            # Get rid of trailing comma in tuple
-            where_value_formatted: str = ",".join([str(x) for x in where_value])
-            query = f"{query} where {where_value_formatted}"
-        query = f"{query};"
+        :param query: statement to run
+        :param prepare: whether to prepare the statement (see _fetch_all)
+        :return: the rows, and the column headers
+        """
 
-        # Get data
-        with Database(self.conn_str) as database:
-            if database.cur:
-                database.exec(query)
-                data: list[tuple[Any, ...]] = database.cur.fetchall()
-            else:
-                raise ConnectionError("Unable to connect to database")
-        if select_value == "*":
-            # TODO: Deal with wildcard select.
-            raise Exception("Wildcard selects not supported yet!")
-        column_headers: tuple[str, ...] = tuple(
-            select_value.replace(" ", "").split(",")
-        )
+        return self._fetch_all(*query.query(), prepare=prepare), query.columns
+
+    def count(self, query: Select) -> int:
+        """Count the rows a select statement would return, without transferring them."""
+
+        rows: list[tuple[Any, ...]] = self._fetch_all(*query.count())
+        return int(rows[0][0])
+
+    def cursor(self, query: Select) -> KeysetCursor:
+        """Open a cursor over a select statement, to fetch rows in pages.
+
+        Each page is a query of its own, so no connection is held between pages.
+        """
+
+        return KeysetCursor(self.conn_str, query)
 
-        return data, column_headers
+    def search(
+        self, text: str, limit: int = SEARCH_LIMIT
+    ) -> tuple[list[tuple[Any, ...]], tuple[str, ...]]:
+        """Search projects, scans and samples, best matches first.
+
+        Whole words are matched with the full-text indexes, ranked by where they
+        appear (e.g., a word in a title ranks above a word in a summary). Partial words
+        are matched with the trigram indexes, ranked by similarity.
+
+        :param text: search text; web search syntax is supported, e.g., "quoted
+            phrases", or, and -excluded words
+        :param limit: maximum number of results
+        :return: the results, and the column headers
+        """
+
+        if not text.strip():
+            return [], SEARCH_HEADERS
+        rows: list[tuple[Any, ...]] = self._fetch_all(
+            SEARCH_QUERY,
+            {"text": text, "pattern": like_pattern(text), "limit": limit},
+        )
+        return rows, SEARCH_HEADERS
 
     def get_version(self) -> str:
         """Get database version."""
@@ -91,13 +194,9 @@ class DatabaseView:
     ) -> tuple[tuple[Any, ...], tuple[str, ...]]:
         """Get project metadata."""
 
-        data, column_headers = self.view_select_from_where(
-            (
-                "project_id, title, project_type, summary, keyword, start_date,"
-                " end_date, directory_path"
-            ),
-            "project",
-            f"project_id={project_id}",
+        data, column_headers = self.select(
+            Select("project", PROJECT_METADATA_COLUMNS).where("project_id", project_id),
+            prepare=True,
         )
 
         # Get metadata from specific row
@@ -110,10 +209,9 @@ class DatabaseView:
     ) -> tuple[tuple[Any, ...], tuple[str, ...]]:
         """Get user metadata."""
 
-        data, column_headers = self.view_select_from_where(
-            "user_id, first_name, last_name, email_address",
-            '"user"',
-            f"user_id={user_id}",
+        data, column_headers = self.select(
+            Select("user", USER_METADATA_COLUMNS).where("user_id", user_id),
+            prepare=True,
         )
 
         # Get metadata from specific row
@@ -121,60 +219,57 @@ class DatabaseView:
 
         return row_data, column_headers
 
-    def get_scan_metadata(
-        self, scan_id: int
-    ) -> tuple[tuple[Any, ...], tuple[str, ...]]:
-        """Get scan metadata."""
-
-        data, column_header = self.view_select_from_where(
-            "scan_id, project_id, instrument_id",
-            "scan",
-            f"scan_id={scan_id}",
-        )
-
-        # Can't edit a tuple, so turn the tuple into a list
-        row: tuple[Any, ...] = tuple(data[0])
+    @staticmethod
+    def _format_scan_metadata(row: tuple[Any, ...]) -> tuple[int, str, str]:
+        """Format a row of SCAN_METADATA_QUERY for the metadata panel."""
 
-        # Get project title
-        prj_id: int = row[1]
-        prj_data, _ = self.view_select_from_where(
-            "title",
-            "project",
-            f"project_id={prj_id}",
+        scan_id, prj_id, prj_title, instrument_id, instrument_name = row
+        return (
+            scan_id,
+            f"{prj_id} ({prj_title})",
+            f"{instrument_id} ({instrument_name})",
         )
-        prj_title: str = prj_data[0][0]
 
-        # Add project title to project id metadata
-        prj_id_metadata = f"{prj_id} ({prj_title})"
+    def get_scan_metadata(
+        self, scan_id: int
+    ) -> tuple[tuple[Any, ...], tuple[str, ...]]:
+        """Get scan metadata, with the project title and instrument name."""
 
-        # Get instrument name
-        instrument_id: int = row[2]
-        instrument_data, _ = self.view_select_from_where(
-            "name",
-            "instrument",
-            f"instrument_id={instrument_id}",
+        rows: list[tuple[Any, ...]] = self._fetch_all(
+            SCAN_METADATA_QUERY + sql.SQL(" where scan.scan_id = %s;"),
+            (scan_id,),
+            prepare=True,
         )
-        instrument_name: str = instrument_data[0][0]
-
-        # Add instrument name to instrument id metadata
-        instrument_id_metadata = f"{instrument_id} ({instrument_name})"
-
-        # Turn the list back into a tuple, the expected return value
-        updated_row: tuple[int, str, str] = (
-            scan_id,
-            prj_id_metadata,
-            instrument_id_metadata,
+        if not rows:
+            raise ValueError(f"Scan {scan_id} not found")
+        return self._format_scan_metadata(rows[0]), SCAN_METADATA_HEADERS
+
+    def get_scans_metadata(
+        self, scan_ids: Iterable[int]
+    ) -> tuple[dict[int, tuple[Any, ...]], tuple[str, ...]]:
+        """Get the metadata of many scans in one query.
+
+        :param scan_ids: IDs of the scans; IDs not in the database are left out
+        :return: metadata of each scan, keyed by scan ID, and the column headers
+        """
+
+        rows: list[tuple[Any, ...]] = self._fetch_all(
+            SCAN_METADATA_QUERY + sql.SQL(" where scan.scan_id = any(%s);"),
+            (list(scan_ids),),
         )
-        return updated_row, column_header
+        metadata: dict[int, tuple[Any, ...]] = {
+            row[0]: self._format_scan_metadata(row) for row in rows
+        }
+        return metadata, SCAN_METADATA_HEADERS
 
     def get_scan_form_data(self, scan_id: int) -> dict[str, dict[str, Any]]:
         """Get scan form data for user_form.toml."""
 
         # Get hardcoded data (data that should not be changed by the user)
-        hardcoded_data, hardcoded_column_headers = self.view_select_from_where(
-            "scan_id, project_id, instrument_id",
-            "scan",
-            f"scan_id={scan_id}",
+        hardcoded_data, hardcoded_column_headers = self.select(
+            Select("scan", ("scan_id", "project_id", "instrument_id")).where(
+                "scan_id", scan_id
+            )
         )
         data: dict[str, dict[str, Any]] = {
             "hardcoded": dict(zip(hardcoded_column_headers, hardcoded_data[0])),
@@ -184,8 +279,8 @@ class DatabaseView:
     def prj_exists(self, prj_id: int) -> bool:
         """Check if a project with a given project ID exists in the database."""
 
-        rows, _ = self.view_select_from_where(
-            "project_id", "project", f"project_id={prj_id}"
+        rows, _ = self.select(
+            Select("project", ("project_id",)).where("project_id", prj_id)
         )
         if len(rows) > 1:
             raise DuplicateObject(f"Duplicate project ID {prj_id} found in database")
@@ -194,8 +289,10 @@ class DatabaseView:
     def instrument_exists(self, instrument_id: int) -> bool:
         """Check if an instrument with a given instrument ID exists in the database."""
 
-        rows, _ = self.view_select_from_where(
-            "instrument_id", "instrument", f"instrument_id={instrument_id}"
+        rows, _ = self.select(
+            Select("instrument", ("instrument_id",)).where(
+                "instrument_id", instrument_id
+            )
         )
         if len(rows) > 1:
             raise DuplicateObject(
@@ -219,10 +316,8 @@ class DatabaseView:
         """Get the scan directory path."""
 
         if prj_id is None:
-            data, _ = self.view_select_from_where(
-                "project_id",
-                "scan",
-                f"scan_id={scan_id}",
+            data, _ = self.select(
+                Select("scan", ("project_id",)).where("scan_id", scan_id)
             )
             prj_id = data[0][0]
         if prj_id is None:
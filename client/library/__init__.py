@@ -1,5 +1,17 @@
 from .abstract_instrument import AbstractScan
 from .index import get_relative_path, local_path
+from .journal import TransferJournal
+from .library_index import LibraryIndex
+from .manifest import LIBRARY_FILES, Manifest
 from .nikon import NikonScan
 
-__all__ = ["AbstractScan", "get_relative_path", "local_path", "NikonScan"]
+__all__ = [
+    "AbstractScan",
+    "get_relative_path",
+    "LIBRARY_FILES",
+    "LibraryIndex",
+    "local_path",
+    "Manifest",
+    "NikonScan",
+    "TransferJournal",
+]
@@ -0,0 +1,183 @@
+"""
+Journal of the files a transfer has completed.
+
+A transfer keeps a journal in the tams_meta directory of the destination scan. Each file
+is appended to the journal once it has been copied (under a temporary name), synced to
+disk and renamed into place, so every file in the journal is complete. If the transfer
+is interrupted, the next transfer skips the files in the journal and carries on where it
+stopped. The journal records the size and modification time the source had when it was
+copied, so a source rewritten in the meantime is copied again. The journal is deleted
+once the transfer is complete.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path, PurePath
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from typing import TextIO
+
+JOURNAL_NAME: str = "transfer.journal"
+
+# Sync the journal to disk after this many files, so a reboot loses little progress
+_SYNC_EVERY: int = 64
+
+
+class JournalEntry(NamedTuple):
+    """A file recorded in a journal, and the source it was copied from."""
+
+    size: int
+    hash: str
+    source_size: int
+    source_mtime_ns: int
+
+
+class TransferJournal:
+    """The journal of a transfer into a scan directory."""
+
+    def __init__(self, scan_dir: Path | str) -> None:
+        """Initialize an empty journal for a scan directory.
+
+        Use TransferJournal.open to read an existing journal.
+
+        :param scan_dir: destination scan directory
+        """
+
+        self.scan_dir: Path = Path(scan_dir)
+        self.entries: dict[str, JournalEntry] = {}
+        self._file: TextIO | None = None
+        self._unsynced: int = 0
+
+    @property
+    def path(self) -> Path:
+        """Path to the journal file."""
+
+        return self.scan_dir / "tams_meta" / JOURNAL_NAME
+
+    @classmethod
+    def open(cls, scan_dir: Path | str) -> TransferJournal:
+        """Open the journal of a scan, reading the files completed by earlier transfers.
+
+        :param scan_dir: destination scan directory
+        :return: journal, ready to record files
+        """
+
+        journal: TransferJournal = cls(scan_dir)
+        try:
+            with open(journal.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rel_path, size, hash_str, src_size, src_mtime = line.rstrip(
+                            "\n"
+                        ).split("\t")
+                        journal.entries[rel_path] = JournalEntry(
+                            int(size), hash_str, int(src_size), int(src_mtime)
+                        )
+                    except ValueError:
+                        # The last line is torn if the transfer died while writing it
+                        logging.warning("Skipping damaged line in %s", journal.path)
+        except FileNotFoundError:
+            pass
+        if journal.entries:
+            logging.info(
+                "Resuming transfer: %s files already done.", len(journal.entries)
+            )
+
+        journal.path.parent.mkdir(parents=True, exist_ok=True)
+        journal._file = open(  # pylint: disable=consider-using-with
+            journal.path, "a", encoding="utf-8"
+        )
+        return journal
+
+    def rel_path(self, file: Path | str) -> str:
+        """Get the key of a file in the journal (its relative POSIX path)."""
+
+        return PurePath(os.path.relpath(file, self.scan_dir)).as_posix()
+
+    def get(self, file: Path | str, source: Path | str) -> JournalEntry | None:
+        """Get the journal entry of a file if the file is complete.
+
+        A file is complete if it is in the journal and still has the recorded size, and
+        its source still has the size and modification time it had when it was copied.
+
+        :param file: path to the destination file
+        :param source: path to the source file
+        :return: journal entry, or None if the file must be copied
+        """
+
+        entry: JournalEntry | None = self.entries.get(self.rel_path(file))
+        if entry is None:
+            return None
+        try:
+            source_stat: os.stat_result = os.stat(source)
+            if (
+                os.stat(file).st_size == entry.size
+                and source_stat.st_size == entry.source_size
+                and source_stat.st_mtime_ns == entry.source_mtime_ns
+            ):
+                return entry
+        except FileNotFoundError:
+            pass
+        return None
+
+    def record(
+        self,
+        file: Path | str,
+        size: int,
+        hash_str: str | None,
+        source_stat: os.stat_result,
+    ) -> None:
+        """Record a complete file.
+
+        :param file: path to the destination file
+        :param size: size of the file in bytes
+        :param hash_str: SHA3-384 hash of the file, if known
+        :param source_stat: stat of the source, taken before it was copied
+        """
+
+        if self._file is None:
+            raise ValueError("Journal is not open.")
+        rel_path: str = self.rel_path(file)
+        entry: JournalEntry = JournalEntry(
+            size, hash_str or "", source_stat.st_size, source_stat.st_mtime_ns
+        )
+        self.entries[rel_path] = entry
+        self._file.write("\t".join((rel_path, *map(str, entry))) + "\n")
+        # Flush every line, so killing the job loses nothing
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= _SYNC_EVERY:
+            self.sync()
+
+    def sync(self) -> None:
+        """Sync the journal to disk."""
+
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        """Close the journal, keeping it on disk so the transfer can be resumed."""
+
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def complete(self) -> None:
+        """Close and delete the journal once the transfer is complete."""
+
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> TransferJournal:
+        """Return the journal for use in a with statement."""
+
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        """Close the journal, keeping it on disk so the transfer can be resumed."""
+
+        self.close()
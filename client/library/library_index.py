@@ -0,0 +1,349 @@
+"""
+Persistent index of the files in the libraries.
+
+Walking a library is slow, especially on a network drive, and most of the tree does not
+change between jobs. The index records each directory's modification time and the files
+in it in a SQLite database next to the settings. When a tree is refreshed, only the
+directories whose modification time has changed are scanned again; the files in other
+directories are read from the database.
+
+A directory's modification time changes when files are added to, removed from, or
+renamed in it, but not when a file is modified in place. The sizes and times in the
+index can therefore be stale for a file that has been rewritten, so jobs that must be
+exact (e.g., hashing during validation) stat the files they use.
+
+File hashes are not kept here: they belong to a scan, so they are kept in the scan's
+manifest (see client.library.manifest).
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from client import settings
+from client.utils.indexer import REPORT_EVERY, FileTable
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from pathlib import Path
+
+# A directory modified this recently may change again within the same tick of its
+# modification time, so it is scanned again next time
+RACY_WINDOW_NS: int = 2_000_000_000
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS directory (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    parent_id INTEGER REFERENCES directory (id) ON DELETE CASCADE,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS directory_parent_id ON directory (parent_id);
+CREATE TABLE IF NOT EXISTS file (
+    dir_id INTEGER NOT NULL REFERENCES directory (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    PRIMARY KEY (dir_id, name)
+);
+"""
+
+
+class _Refreshed(NamedTuple):
+    """A directory brought up to date in the index."""
+
+    dir_id: int
+    # (name, size, mtime_ns, inode) of each file
+    files: list[tuple[str, int, int, int]]
+    # Paths of the subdirectories
+    subdirs: list[str]
+    # Whether the directory was listed again, rather than read from the index
+    scanned: bool
+
+
+class LibraryIndex:
+    """Index of the directory trees in the libraries."""
+
+    def __init__(self, path: Path | str | None = None, timeout: float = 30.0) -> None:
+        """Open the index, creating it if it does not exist.
+
+        SQLite connections cannot be shared between threads, so each thread should open
+        its own index.
+
+        :param path: database file; defaults to the one next to the settings
+        :param timeout: seconds to wait for another connection to finish writing
+        """
+
+        self.path: Path | str = path or settings.library_index
+        self.conn: sqlite3.Connection = sqlite3.connect(self.path, timeout=timeout)
+        # Let a job write while the GUI reads
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the index."""
+
+        self.conn.close()
+
+    @staticmethod
+    def _list_directory(
+        directory: str,
+    ) -> tuple[list[tuple[str, int, int, int]], list[tuple[str, int]]]:
+        """List the files and subdirectories in a directory.
+
+        :return: (name, size, mtime_ns, inode) of each file, and (path, mtime_ns) of
+            each subdirectory
+        """
+
+        files: list[tuple[str, int, int, int]] = []
+        subdirs: list[tuple[str, int]] = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((entry.path, entry.stat().st_mtime_ns))
+                elif entry.is_file():
+                    stat: os.stat_result = entry.stat()
+                    files.append(
+                        (entry.name, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+                    )
+        return files, subdirs
+
+    def _record_directory(
+        self,
+        dir_id: int,
+        files: list[tuple[str, int, int, int]],
+        subdirs: list[tuple[str, int]],
+    ) -> None:
+        """Replace the files and subdirectories recorded in a directory."""
+
+        # Forget files that no longer exist
+        removed: set[str] = {
+            name
+            for (name,) in self.conn.execute(
+                "SELECT name FROM file WHERE dir_id = ?", (dir_id,)
+            )
+        }.difference(name for name, *_ in files)
+        self.conn.executemany(
+            "DELETE FROM file WHERE dir_id = ? AND name = ?",
+            ((dir_id, name) for name in removed),
+        )
+        self.conn.executemany(
+            """
+            INSERT INTO file (dir_id, name, size, mtime_ns, inode)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (dir_id, name) DO UPDATE SET
+                size = excluded.size,
+                mtime_ns = excluded.mtime_ns,
+                inode = excluded.inode
+            """,
+            ((dir_id, *file) for file in files),
+        )
+
+        # Forget subdirectories that no longer exist (and, by cascade, their contents)
+        removed = {
+            path
+            for (path,) in self.conn.execute(
+                "SELECT path FROM directory WHERE parent_id = ?", (dir_id,)
+            )
+        }.difference(path for path, _ in subdirs)
+        self.conn.executemany(
+            "DELETE FROM directory WHERE path = ?", ((path,) for path in removed)
+        )
+
+    def _upsert_directory(self, path: str, parent_id: int | None) -> tuple[int, int]:
+        """Record a directory, returning its ID and its recorded modification time."""
+
+        self.conn.execute(
+            """
+            INSERT INTO directory (path, parent_id, mtime_ns) VALUES (?, ?, -1)
+            ON CONFLICT (path) DO UPDATE SET
+                parent_id = coalesce(excluded.parent_id, directory.parent_id)
+            """,
+            (path, parent_id),
+        )
+        row: tuple[int, int] = self.conn.execute(
+            "SELECT id, mtime_ns FROM directory WHERE path = ?", (path,)
+        ).fetchone()
+        return row
+
+    def _forget_directory(self, path: str) -> None:
+        """Forget a directory that no longer exists, and everything in it."""
+
+        with self.conn:
+            self.conn.execute("DELETE FROM directory WHERE path = ?", (path,))
+
+    def _refresh_directory(
+        self, directory: str, parent_id: int | None, mtime_ns: int, now: int
+    ) -> _Refreshed | None:
+        """Bring the index of one directory up to date.
+
+        The directory is listed before the index is written, and the index is written
+        in a transaction of its own, so the index is only locked for as long as it takes
+        to record one directory, however slow the storage is.
+
+        :return: the directory as recorded in the index; None if it no longer exists
+        """
+
+        row: tuple[int, int] | None = self.conn.execute(
+            "SELECT id, mtime_ns FROM directory WHERE path = ?", (directory,)
+        ).fetchone()
+        if row is not None and row[1] == mtime_ns:
+            # Unchanged since it was last scanned, so use the recorded entries
+            with self.conn:
+                dir_id, _ = self._upsert_directory(directory, parent_id)
+                files: list[tuple[str, int, int, int]] = self.conn.execute(
+                    "SELECT name, size, mtime_ns, inode FROM file WHERE dir_id = ?",
+                    (dir_id,),
+                ).fetchall()
+                subdirs: list[str] = [
+                    subdir
+                    for (subdir,) in self.conn.execute(
+                        "SELECT path FROM directory WHERE parent_id = ?", (dir_id,)
+                    )
+                ]
+            return _Refreshed(dir_id, files, subdirs, False)
+
+        try:
+            files, listed = self._list_directory(directory)
+        except (FileNotFoundError, NotADirectoryError):
+            # Removed since its parent was listed
+            self._forget_directory(directory)
+            return None
+        with self.conn:
+            dir_id, _ = self._upsert_directory(directory, parent_id)
+            self._record_directory(dir_id, files, listed)
+            # A directory modified just now might change again unnoticed
+            self.conn.execute(
+                "UPDATE directory SET mtime_ns = ? WHERE id = ?",
+                (-1 if now - mtime_ns < RACY_WINDOW_NS else mtime_ns, dir_id),
+            )
+        return _Refreshed(dir_id, files, [path for path, _ in listed], True)
+
+    def refresh(
+        self,
+        root: Path | str,
+        report: Callable[[int, int], None] | None = None,
+        report_every: int = REPORT_EVERY,
+    ) -> FileTable:
+        """Bring the index of a directory tree up to date and return its files.
+
+        Only directories modified since they were last scanned are scanned again. Like
+        indexer.scan_tree, symbolic links to directories are not followed and a missing
+        root gives an empty table.
+
+        Each directory is recorded in a transaction of its own, and report is never
+        called inside one, so a job that is paused or stopped while indexing does not
+        keep other threads and processes from using the index.
+
+        :param root: directory to index
+        :param report: called with the number of files and bytes found so far, every
+            report_every files and once at the end; it may raise to stop refreshing,
+            in which case the directories refreshed so far stay recorded
+        :param report_every: files between reports
+        :return: table of the files, with paths relative to root
+        """
+
+        table: FileTable = FileTable(os.path.abspath(root))
+        now: int = time.time_ns()
+        scanned: int = 0
+        reported: int = 0
+
+        # Directories still to refresh, as (path, relative path, parent ID, mtime)
+        stack: list[tuple[str, str, int | None, int]] = []
+        try:
+            stack.append((table.root, "", None, os.stat(table.root).st_mtime_ns))
+        except FileNotFoundError:
+            self._forget_directory(table.root)
+
+        while stack:
+            directory, rel_dir, parent_id, mtime_ns = stack.pop()
+            refreshed: _Refreshed | None = self._refresh_directory(
+                directory, parent_id, mtime_ns, now
+            )
+            if refreshed is None:
+                continue
+            scanned += refreshed.scanned
+
+            for name, size, file_mtime_ns, _ in refreshed.files:
+                table.add(os.path.join(rel_dir, name), size, file_mtime_ns)
+            for subdir in refreshed.subdirs:
+                try:
+                    subdir_mtime: int = os.stat(subdir).st_mtime_ns
+                except FileNotFoundError:
+                    # Removed without its parent changing, e.g., a mount point
+                    self._forget_directory(subdir)
+                    continue
+                stack.append(
+                    (
+                        subdir,
+                        os.path.join(rel_dir, os.path.basename(subdir)),
+                        refreshed.dir_id,
+                        subdir_mtime,
+                    )
+                )
+
+            if report is not None and len(table) - reported >= report_every:
+                reported = len(table)
+                report(len(table), table.total_size)
+
+        logging.debug(
+            "Refreshed index of %s: scanned %s directories.", table.root, scanned
+        )
+        if report is not None:
+            report(len(table), table.total_size)
+        return table
+
+    def recorded(self, root: Path | str) -> FileTable | None:
+        """Return the files recorded in a directory tree, without refreshing it.
+
+        Nothing is written and the tree is not read, so this is cheap enough for the
+        GUI thread, but the table is as old as the last refresh of the tree.
+
+        :param root: directory whose files to return
+        :return: table of the files, with paths relative to root; None if the tree has
+            not been indexed
+        """
+
+        table: FileTable = FileTable(os.path.abspath(root))
+        rows: list[tuple[str, str, int, int]] = self.conn.execute(
+            """
+            WITH RECURSIVE tree (id, path) AS (
+                SELECT id, path FROM directory WHERE path = ?
+                UNION ALL
+                SELECT directory.id, directory.path
+                FROM directory INNER JOIN tree ON directory.parent_id = tree.id
+            )
+            SELECT tree.path, file.name, file.size, file.mtime_ns
+            FROM tree INNER JOIN file ON file.dir_id = tree.id
+            """,
+            (table.root,),
+        ).fetchall()
+        if not rows and (
+            self.conn.execute(
+                "SELECT 1 FROM directory WHERE path = ?", (table.root,)
+            ).fetchone()
+            is None
+        ):
+            return None
+        for directory, name, size, mtime_ns in rows:
+            rel_dir: str = os.path.relpath(directory, table.root)
+            rel_path: str = (
+                name if rel_dir == os.curdir else os.path.join(rel_dir, name)
+            )
+            table.add(rel_path, size, mtime_ns)
+        return table
+
+    def __enter__(self) -> LibraryIndex:
+        """Return the index for use in a with statement."""
+
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        """Close the index upon exiting its runtime context."""
+
+        self.close()
@@ -0,0 +1,170 @@
+"""
+Checksum manifest of the files in a scan.
+
+Each library keeps a manifest in the tams_meta directory of each scan. It records the
+relative path, size, modification time, and SHA3-384 hash of every file in the scan that
+has been hashed. If a file's size and modification time have not changed since it was
+hashed, the recorded hash can be trusted and the file does not need to be read again.
+
+The manifest describes one library's copy of the scan (modification times differ between
+libraries), so it is not copied from one library to another.
+"""
+from __future__ import annotations
+
+import csv
+import logging
+import os
+from pathlib import Path, PurePath
+from typing import TYPE_CHECKING, NamedTuple
+
+from .journal import JOURNAL_NAME
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+MANIFEST_NAME: str = "manifest.tsv"
+
+# Files in tams_meta that describe a library's own copy of a scan; these are not copied
+# between libraries or compared during validation
+LIBRARY_FILES: frozenset[str] = frozenset({MANIFEST_NAME, JOURNAL_NAME})
+
+_HEADER: tuple[str, ...] = ("path", "size", "mtime_ns", "sha3_384")
+
+
+class ManifestEntry(NamedTuple):
+    """A file recorded in a manifest."""
+
+    size: int
+    mtime_ns: int
+    hash: str
+
+
+class Manifest:
+    """The checksum manifest of one library's copy of a scan."""
+
+    def __init__(self, scan_dir: Path | str) -> None:
+        """Initialize an empty manifest for a scan directory.
+
+        :param scan_dir: scan directory the manifest describes
+        """
+
+        self.scan_dir: Path = Path(scan_dir)
+        self.entries: dict[str, ManifestEntry] = {}
+
+    @property
+    def path(self) -> Path:
+        """Path to the manifest file."""
+
+        return self.scan_dir / "tams_meta" / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, scan_dir: Path | str) -> Manifest:
+        """Load the manifest of a scan, or an empty manifest if there is none.
+
+        :param scan_dir: scan directory the manifest describes
+        :return: manifest
+        """
+
+        manifest: Manifest = cls(scan_dir)
+        try:
+            with open(manifest.path, encoding="utf-8", newline="") as f:
+                reader = csv.reader(f, delimiter="\t")
+                if next(reader, None) != list(_HEADER):
+                    logging.warning("Ignoring manifest with unknown format.")
+                    return manifest
+                for rel_path, size, mtime_ns, hash_str in reader:
+                    manifest.entries[rel_path] = ManifestEntry(
+                        int(size), int(mtime_ns), hash_str
+                    )
+        except FileNotFoundError:
+            logging.debug("No manifest found at %s", manifest.path)
+        except ValueError:
+            # A damaged manifest only costs us a re-hash, so start again
+            logging.warning("Ignoring damaged manifest at %s", manifest.path)
+            manifest.entries.clear()
+        return manifest
+
+    def save(self) -> None:
+        """Write the manifest to the scan's tams_meta directory.
+
+        The manifest is written to a temporary file and renamed into place, so a reader
+        never sees a half-written manifest.
+        """
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path: Path = self.path.with_name(f".{MANIFEST_NAME}.tmp")
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, delimiter="\t", lineterminator="\n")
+            writer.writerow(_HEADER)
+            for rel_path in sorted(self.entries):
+                writer.writerow((rel_path, *self.entries[rel_path]))
+        os.replace(tmp_path, self.path)
+
+    def try_save(self) -> bool:
+        """Save the manifest, logging rather than failing if it cannot be written.
+
+        Manifests only save time, so a read-only library (e.g., a permanent library the
+        user cannot write to) should not stop a job.
+
+        :return: True if the manifest was saved
+        """
+
+        try:
+            self.save()
+        except OSError:
+            logging.warning("Could not save manifest %s", self.path)
+            return False
+        return True
+
+    def rel_path(self, file: Path | str) -> str:
+        """Get the key of a file in the manifest (its relative POSIX path)."""
+
+        return PurePath(os.path.relpath(file, self.scan_dir)).as_posix()
+
+    def lookup(self, file: Path | str, stat: os.stat_result) -> str | None:
+        """Get the recorded hash of a file if the file has not changed since.
+
+        :param file: path to the file
+        :param stat: current stat of the file
+        :return: recorded hash, or None if the file must be hashed
+        """
+
+        entry: ManifestEntry | None = self.entries.get(self.rel_path(file))
+        if (
+            entry is not None
+            and entry.hash
+            and entry.size == stat.st_size
+            and entry.mtime_ns == stat.st_mtime_ns
+        ):
+            return entry.hash
+        return None
+
+    def record(self, file: Path | str, stat: os.stat_result, hash_str: str) -> None:
+        """Record the hash of a file.
+
+        :param file: path to the file
+        :param stat: stat of the file when it was hashed
+        :param hash_str: SHA3-384 hash of the file
+        """
+
+        self.entries[self.rel_path(file)] = ManifestEntry(
+            stat.st_size, stat.st_mtime_ns, hash_str
+        )
+
+    def discard(self, file: Path | str) -> None:
+        """Forget a file, e.g., once it has been deleted.
+
+        :param file: path to the file
+        """
+
+        self.entries.pop(self.rel_path(file), None)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the relative paths in the manifest."""
+
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        """Return the number of files in the manifest."""
+
+        return len(self.entries)
@@ -1,11 +1,15 @@
-from .generic import GenericRunner, RunnerKilledException, RunnerStatus
+from .generic import GenericRunner, Priority, RunnerKilledException, RunnerStatus
 from .save import SaveScans
+from .scheduler import JobScheduler, get_scheduler
 from .validate import ValidateScans
 
 __all__ = [
     "GenericRunner",
+    "JobScheduler",
+    "Priority",
     "RunnerKilledException",
     "RunnerStatus",
     "SaveScans",
     "ValidateScans",
+    "get_scheduler",
 ]
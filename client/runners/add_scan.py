@@ -3,12 +3,16 @@ Runner for adding scans to the local library and the database.
 """
 from __future__ import annotations
 
+import logging
+from collections import Counter
 from typing import TYPE_CHECKING
 
+from client import settings
 from client.library import get_relative_path, local_path
-from client.utils.file import move_item
+from client.utils.transfer import copy_item
 
-from .generic import GenericRunner
+from .generic import GenericRunner, Priority
+from .scheduler import library_resources
 
 if TYPE_CHECKING:
     from client.library import AbstractScan
@@ -29,16 +33,37 @@ class AddScan(GenericRunner):
         # Store the scan
         self.scan: AbstractScan = scan
 
+        # Queue behind other bulk jobs using the scan's disk or the local library
+        self.priority = Priority.BULK
+        self.resources = library_resources(scan.path, settings.get_lib("local"))
+        self.description = f"Add scan {scan_id} to project {prj_id}"
+
+        # Store how files are copied, and count how each file was copied
+        self.transfer_backend: str = settings.get_transfer_backend()
+        self.transfer_methods: Counter[str] = Counter()
+
     def job(self) -> None:
         """Add the scan to the local library."""
 
         directory = local_path(get_relative_path(self.prj_id, self.scan_id))
         # TODO: For now we download everything, but this should be up to the user.
         recon_data = self.scan.get_reconstructions()
+        raw_data = self.scan.get_raw_data()
+        self.tracker.set_totals(len(recon_data) + len(raw_data), 0)
         for item in recon_data:
             new_location = directory / "reconstructions"
-            move_item(self.scan.path / item, new_location, keep_original=True)
-        raw_data = self.scan.get_raw_data()
+            self.transfer_methods += copy_item(
+                self.scan.path / item, new_location, self.transfer_backend
+            )
+            self.tracker.add(1)
+            self.checkpoint()
         for item in raw_data:
             new_location = directory / "raw"
-            move_item(self.scan.path / item, new_location, keep_original=True)
+            self.transfer_methods += copy_item(
+                self.scan.path / item, new_location, self.transfer_backend
+            )
+            self.tracker.add(1)
+            self.checkpoint()
+        logging.info(
+            "Files copied by transfer backend: %s", dict(self.transfer_methods)
+        )
@@ -5,14 +5,25 @@ from __future__ import annotations
 
 import logging
 import sys
+import threading
 import traceback
-from enum import Enum, auto
+from enum import Enum, IntEnum, auto
 from typing import TYPE_CHECKING, Any
 
 from PySide6.QtCore import QObject, QRunnable, Signal, Slot
 
+from client.library import LibraryIndex
+from client.utils.indexer import scan_tree
+
+from .progress import ProgressTracker
+
 if TYPE_CHECKING:
     from collections.abc import Callable
+    from pathlib import Path
+
+    from client.utils.indexer import FileTable
+
+    from .progress import Progress
 
 
 class RunnerKilledException(Exception):
@@ -29,6 +40,34 @@ class RunnerFinishedException(Exception):
         super().__init__(msg)
 
 
+class CancellationToken:
+    """A flag telling a job to stop, cheap enough to check in tight loops.
+
+    Pass the token to code that does not know about the runner, e.g., a helper that
+    copies or hashes files, so it can stop between chunks.
+    """
+
+    def __init__(self) -> None:
+        self._event: threading.Event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        """Check if the job has been cancelled."""
+
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the job."""
+
+        self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        """Raise RunnerKilledException if the job has been cancelled."""
+
+        if self._event.is_set():
+            raise RunnerKilledException
+
+
 class RunnerStatus(Enum):
     """Enum for runner status flags."""
 
@@ -38,12 +77,30 @@ class RunnerStatus(Enum):
     FINISHED = auto()
 
 
+class Priority(IntEnum):
+    """Order in which queued jobs are started by the job scheduler; higher first."""
+
+    # Bulk transfers and checks of whole projects
+    BULK = 0
+    NORMAL = 1
+    # Reads the user is waiting on, e.g., loading a table or a scan's metadata
+    INTERACTIVE = 2
+
+
 class RunnerSignals(QObject):
     """Worker signals."""
 
+    # Emitted when the job leaves the scheduler's queue and starts
+    started: Signal = Signal()
     finished: Signal = Signal()
     kill: Signal = Signal()
+    # Files done since the last emit, and the Progress of the job; both are coalesced
+    # by the runner's ProgressTracker
     progress: Signal = Signal(int)
+    report: Signal = Signal(object)
+    max_progress: Signal = Signal(int)
+    # Files and bytes found so far; bytes can overflow a C++ int, so pass an object
+    indexed: Signal = Signal(int, object)
     error: Signal = Signal(tuple)
     result: Signal = Signal(object)
 
@@ -54,6 +111,13 @@ class GenericRunner(QRunnable):
     Inherits from QRunnable to handle worker thread setup, signals and wrap-up.
     """
 
+    def _emit_progress(self, files: int, progress: Progress) -> None:
+        """Emit the progress reported by the tracker."""
+
+        if files:
+            self.signals.progress.emit(files)
+        self.signals.report.emit(progress)
+
     def __init__(self, func: Callable[[], Any]):
         """Initialize the worker."""
 
@@ -66,16 +130,31 @@ class GenericRunner(QRunnable):
 
         # Status flags
         self.worker_status: RunnerStatus = RunnerStatus.RUNNING
+        # Cancelled when the runner is killed
+        self.cancel_token: CancellationToken = CancellationToken()
+        # Set unless the runner is paused; a paused job waits on it in checkpoint
+        self._unpaused: threading.Event = threading.Event()
+        self._unpaused.set()
 
         self.result_value: Any = None
 
         # By default, progress is out of 100
         self._max_progress: int = 100
 
+        # Count files and bytes done; emits progress at most ten times a second
+        self.tracker: ProgressTracker = ProgressTracker(self._emit_progress)
+
+        # How the job scheduler queues the runner: its priority, the resources it
+        # uses (e.g., libraries and disks), and how the job is shown in the queue
+        self.priority: Priority = Priority.NORMAL
+        self.resources: tuple[str, ...] = ()
+        self.description: str = self.__class__.__name__
+
     @Slot()
     def run(self) -> None:
         """Initialize the runner function with passed args, kwargs."""
 
+        self.signals.started.emit()
         try:
             result: Any = self.fn()
         except Exception:  # pylint: disable=broad-except
@@ -86,6 +165,7 @@ class GenericRunner(QRunnable):
             # Return the result of the processing
             self.signals.result.emit(result)
         finally:
+            self.tracker.flush()
             self.signals.finished.emit()  # Done
 
     def set_max_progress(self, max_progress: int) -> None:
@@ -93,6 +173,7 @@ class GenericRunner(QRunnable):
 
         if isinstance(max_progress, int) and (max_progress > 0):
             self._max_progress = max_progress
+            self.signals.max_progress.emit(max_progress)
         else:
             raise TypeError("max progress must be a positive integer.")
 
@@ -101,30 +182,82 @@ class GenericRunner(QRunnable):
 
         return self._max_progress
 
+    def index_tree(
+        self, root: Path | str, found: tuple[int, int] = (0, 0), fresh: bool = False
+    ) -> FileTable:
+        """Index a directory tree, emitting running totals with the indexed signal.
+
+        The tree is looked up in the library index, so only the directories that have
+        changed since the tree was last indexed are scanned. A file rewritten in place
+        does not change its directory, so its size and time may be out of date; jobs
+        that must see the files as they are now ask for a fresh scan instead.
+
+        :param root: directory to index
+        :param found: files and bytes found in trees indexed before this one, so the
+            totals emitted cover every tree
+        :param fresh: stat every file rather than use the library index
+        :return: table of the files in the tree
+        """
+
+        def report(files: int, size: int) -> None:
+            """Emit the totals so far, and stop indexing if the runner is killed."""
+
+            self.signals.indexed.emit(found[0] + files, found[1] + size)
+            self.checkpoint()
+
+        if fresh:
+            return scan_tree(root, report)
+        with LibraryIndex() as index:
+            return index.refresh(root, report)
+
+    def checkpoint(self) -> bool:
+        """Wait while the runner is paused, and stop the job if it has been killed.
+
+        Jobs call this between units of work. A paused job blocks here without using
+        any CPU until it is resumed, killed or finished.
+
+        :return: False if the runner has finished, so the job should stop
+        """
+
+        self._unpaused.wait()
+        self.cancel_token.raise_if_cancelled()
+        return self.worker_status is not RunnerStatus.FINISHED
+
     def kill(self) -> None:
         """Kill the runner."""
 
         logging.info("%s killed.", self.__class__.__name__)
         self.worker_status = RunnerStatus.KILLED
+        self.cancel_token.cancel()
+        # Wake the job if it is paused, so it can stop
+        self._unpaused.set()
         self.signals.kill.emit()
 
     def pause(self) -> None:
         """Pause the runner."""
 
+        if self.cancel_token.cancelled:
+            return
         logging.info("%s paused.", self.__class__.__name__)
         self.worker_status = RunnerStatus.PAUSED
+        self._unpaused.clear()
 
     def resume(self) -> None:
         """Resume the runner."""
 
+        if self.cancel_token.cancelled:
+            return
         logging.info("%s resumed.", self.__class__.__name__)
         self.worker_status = RunnerStatus.RUNNING
+        self._unpaused.set()
 
     def finish(self) -> None:
         """Finish the runner."""
 
         logging.info("%s finished.", self.__class__.__name__)
         self.worker_status = RunnerStatus.FINISHED
+        # Wake the job if it is paused, so it can stop
+        self._unpaused.set()
         self.signals.finished.emit()
 
     def set_result(self, result: Any) -> None:
@@ -0,0 +1,117 @@
+"""
+Runner for ingesting the metadata of many scans into the database.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from client.db.ingest import IngestResult, ScanRecord, ingest_scans
+from client.library import NikonScan
+from client.utils.toml import load_toml
+
+from .generic import GenericRunner, Priority
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+
+    from client.library import AbstractScan
+
+# Scans parsed before each COPY; each batch is committed on its own, so an interrupted
+# back-fill keeps the batches already loaded
+INGEST_BATCH_SIZE: int = 5000
+
+SCAN_FORMATS: dict[str, type[AbstractScan]] = {"Nikon": NikonScan}
+
+
+def read_scan_record(path: Path, fmt: str = "Nikon") -> ScanRecord | None:
+    """Read the IDs and metadata of a scan directory.
+
+    The IDs are read from the scan's user_form.toml, like the add to library window.
+
+    :param path: scan directory
+    :param fmt: scan format
+    :return: the scan record, or None if the scan has no scan, project or instrument
+        ID (the database needs all three)
+    """
+
+    toml_path: Path = path / "user_form.toml"
+    if not toml_path.exists():
+        return None
+    ids: dict[str, Any] = load_toml(toml_path).get("scan", {})
+    if any(ids.get(key) is None for key in ("scan_id", "project_id", "instrument_id")):
+        return None
+    metadata: dict[str, Any] | None = SCAN_FORMATS[fmt](path).get_metadata()
+    return ScanRecord(
+        ids["scan_id"], ids["project_id"], ids["instrument_id"], metadata or {}
+    )
+
+
+class IngestScans(GenericRunner):
+    """Parse the metadata of scan directories and ingest it into the database."""
+
+    def __init__(
+        self,
+        conn_str: str,
+        paths: Sequence[Path],
+        fmt: str = "Nikon",
+        batch_size: int = INGEST_BATCH_SIZE,
+    ) -> None:
+        """Initialize the runner.
+
+        :param conn_str: psycopg connection string
+        :param paths: scan directories
+        :param fmt: format of the scans
+        :param batch_size: scans to parse before each COPY
+        """
+
+        super().__init__(func=self.job)
+        self.priority = Priority.BULK
+        self.description = f"Ingest {len(paths)} scans"
+        self.conn_str: str = conn_str
+        self.paths: Sequence[Path] = paths
+        self.fmt: str = fmt
+        self.batch_size: int = batch_size
+        self.skipped: list[Path] = []
+
+    def job(self) -> IngestResult:
+        """Ingest the scans in batches; progress is counted in scans parsed.
+
+        :return: the number of scans ingested, and how long it took
+        """
+
+        self.set_max_progress(max(len(self.paths), 1))
+        self.tracker.set_totals(len(self.paths), 0)
+        start: float = time.perf_counter()
+        rows: int = 0
+        batch: list[ScanRecord] = []
+        for path in self.paths:
+            try:
+                record: ScanRecord | None = read_scan_record(path, self.fmt)
+            except FileNotFoundError:
+                record = None
+            if record is None:
+                logging.warning("Skipping %s; it has no scan metadata or IDs", path)
+                self.skipped.append(path)
+            else:
+                batch.append(record)
+            if len(batch) >= self.batch_size:
+                rows += ingest_scans(self.conn_str, batch).rows
+                batch = []
+            self.tracker.add(1)
+
+            # Wait while paused, and stop if killed
+            self.checkpoint()
+        rows += ingest_scans(self.conn_str, batch).rows
+
+        result: IngestResult = IngestResult(rows, time.perf_counter() - start)
+        logging.info(
+            "Ingested %d of %d scans in %.2f s (%.0f rows/s)",
+            result.rows,
+            len(self.paths),
+            result.seconds,
+            result.rows_per_second,
+        )
+        return result
@@ -0,0 +1,197 @@
+"""
+Runners for loading data from the database for the main window.
+
+Queries run on a thread pool rather than the GUI thread, so the window stays responsive
+on a slow network. Each load is tagged with a generation number; the main window starts
+a new generation of table loads whenever the user switches table, and of metadata loads
+whenever the user switches row, kills the runner of the previous generation, and ignores
+any result that arrives from it anyway.
+"""
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from client.db.cursor import PAGE_SIZE
+from client.db.query import Select
+
+from .generic import GenericRunner, Priority, RunnerKilledException
+
+if TYPE_CHECKING:
+    from client.db import DatabaseView
+    from client.db.cursor import KeysetCursor
+
+
+class TableLoad(NamedTuple):
+    """The first page of a table, and the cursor to load the rest from."""
+
+    generation: int
+    rows: list[tuple[Any, ...]]
+    column_headers: tuple[str, ...]
+    total_rows: int
+    cursor: KeysetCursor | None
+
+
+class PageLoad(NamedTuple):
+    """A further page of a table."""
+
+    generation: int
+    rows: list[tuple[Any, ...]]
+    exhausted: bool
+
+
+class MetadataLoad(NamedTuple):
+    """The metadata of a row."""
+
+    generation: int
+    metadata: tuple[tuple[Any, ...], tuple[str, ...]]
+
+
+class LoadTable(GenericRunner):
+    """Load the first page of a table and count its rows."""
+
+    def __init__(
+        self,
+        generation: int,
+        db_view: DatabaseView,
+        table_query: tuple[str, tuple[str, ...]],
+        search: str = "",
+        order_by: tuple[str, bool] | None = None,
+        page_size: int = PAGE_SIZE,
+    ) -> None:
+        """Initialize the runner.
+
+        :param generation: generation of the load, returned with the result
+        :param db_view: database view to query
+        :param table_query: table and columns to show
+        :param search: show only rows containing this text
+        :param order_by: column to sort by, and whether to sort descending
+        :param page_size: rows in the first page
+        """
+
+        super().__init__(func=self.job)
+        self.priority = Priority.INTERACTIVE
+        self.description = f"Load {table_query[0]} table"
+        self.generation: int = generation
+        self.db_view: DatabaseView = db_view
+        self.table_query: tuple[str, tuple[str, ...]] = table_query
+        self.search: str = search
+        self.order_by: tuple[str, bool] | None = order_by
+        self.page_size: int = page_size
+        self.cursor: KeysetCursor | None = None
+
+    def check_killed(self) -> None:
+        """Release the cursor and stop if the load has been superseded."""
+
+        if self.cancel_token.cancelled:
+            if self.cursor is not None:
+                self.cursor.close()
+            raise RunnerKilledException
+
+    def job(self) -> TableLoad:
+        """Open a cursor over the table, fetch the first page and count the rows."""
+
+        query: Select = Select(*self.table_query).search(self.search)
+        if self.order_by is not None:
+            # The cursor breaks ties by the first column, so the order is the same each
+            # time and it can page after any row
+            query.order_by(*self.order_by)
+        self.cursor = self.db_view.cursor(query)
+        try:
+            self.check_killed()
+            rows: list[tuple[Any, ...]] = self.cursor.fetch(self.page_size)
+            self.check_killed()
+            total_rows: int = self.db_view.count(query)
+            self.check_killed()
+        except BaseException:
+            self.cursor.close()
+            raise
+
+        return TableLoad(
+            self.generation,
+            rows,
+            query.columns,
+            max(total_rows, len(rows)),
+            None if self.cursor.exhausted else self.cursor,
+        )
+
+    def kill(self) -> None:
+        """Kill the runner, cancelling the query in progress."""
+
+        super().kill()
+        if self.cursor is not None:
+            self.cursor.cancel()
+
+
+class LoadPage(GenericRunner):
+    """Load the next page of a table from its cursor, as the user scrolls."""
+
+    def __init__(self, generation: int, cursor: KeysetCursor, page_size: int) -> None:
+        """Initialize the runner.
+
+        :param generation: generation of the load, returned with the result
+        :param cursor: cursor to fetch the page from
+        :param page_size: rows in the page
+        """
+
+        super().__init__(func=self.job)
+        self.priority = Priority.INTERACTIVE
+        self.description = "Load more rows"
+        self.generation: int = generation
+        self.cursor: KeysetCursor = cursor
+        self.page_size: int = page_size
+
+    def job(self) -> PageLoad:
+        """Fetch the page."""
+
+        rows: list[tuple[Any, ...]] = self.cursor.fetch(self.page_size)
+        if self.cancel_token.cancelled:
+            raise RunnerKilledException
+        return PageLoad(self.generation, rows, self.cursor.exhausted)
+
+    def kill(self) -> None:
+        """Kill the runner, cancelling the query in progress."""
+
+        super().kill()
+        self.cursor.cancel()
+
+
+class LoadMetadata(GenericRunner):
+    """Load the metadata of a row of a table."""
+
+    def __init__(
+        self, generation: int, db_view: DatabaseView, table: str, key: int
+    ) -> None:
+        """Initialize the runner.
+
+        :param generation: generation of the load, returned with the result
+        :param db_view: database view to query
+        :param table: table of the row
+        :param key: primary key of the row
+        """
+
+        super().__init__(func=self.job)
+        self.priority = Priority.INTERACTIVE
+        self.description = f"Load {table} {key} metadata"
+        self.generation: int = generation
+        self.db_view: DatabaseView = db_view
+        self.table: str = table
+        self.key: int = key
+
+    def job(self) -> MetadataLoad:
+        """Get the metadata; each table has a different metadata format."""
+
+        metadata: tuple[tuple[Any, ...], tuple[str, ...]]
+        if self.table == "project":
+            metadata = self.db_view.get_project_metadata(self.key)
+        elif self.table == "scan":
+            metadata = self.db_view.get_scan_metadata(self.key)
+        elif self.table == "user":
+            metadata = self.db_view.get_user_metadata(self.key)
+        else:
+            raise NotImplementedError(f"Unknown table {self.table}")
+
+        if self.cancel_token.cancelled:
+            logging.debug("Discarding metadata of %s %s.", self.table, self.key)
+            raise RunnerKilledException
+        return MetadataLoad(self.generation, metadata)
@@ -0,0 +1,185 @@
+"""
+Coalesced, byte-weighted progress for runners.
+
+Emitting a signal per file floods the Qt event loop when a job has many small files,
+and a bar that counts files sits still while a large file is copied. Runners therefore
+report progress to a ProgressTracker, in files and in bytes (as often as they like, from
+any thread), and the tracker emits a Progress at most every PROGRESS_INTERVAL seconds.
+Each Progress carries the throughput and the time remaining.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, NamedTuple
+
+from client.utils.file import size_fmt
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# Seconds between progress reports, so at most 10 are emitted a second
+PROGRESS_INTERVAL: float = 0.1
+
+# Weight of the latest throughput measurement in the smoothed throughput
+RATE_SMOOTHING: float = 0.3
+
+# Steps in a progress bar showing the fraction done
+PROGRESS_STEPS: int = 1000
+
+
+def duration_fmt(seconds: float) -> str:
+    """Format a duration to a human-readable format, e.g., 1 h 5 min."""
+
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    minutes, secs = divmod(round(seconds), 60)
+    if minutes < 60:
+        return f"{minutes} min {secs} s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes} min"
+
+
+class Progress(NamedTuple):
+    """The progress of a job."""
+
+    files: int
+    size: int
+    total_files: int
+    total_size: int
+    # Bytes per second, smoothed; 0 until it has been measured
+    rate: float
+    # Seconds, or None until the throughput has been measured
+    remaining: float | None
+
+    @property
+    def fraction(self) -> float:
+        """Get the fraction of the job done, weighted by bytes if sizes are known."""
+
+        if self.total_size > 0:
+            return min(self.size / self.total_size, 1.0)
+        if self.total_files > 0:
+            return min(self.files / self.total_files, 1.0)
+        return 0.0
+
+    def describe(self) -> str:
+        """Describe the throughput and time remaining, e.g., for a dialogue."""
+
+        if not self.rate:
+            return ""
+        text: str = f"{size_fmt(self.rate)}/s"
+        if self.remaining is not None:
+            text = f"{text}, {duration_fmt(self.remaining)} left"
+        return text
+
+
+class ProgressTracker:
+    """Count the files and bytes a job has done, emitting progress at a limited rate.
+
+    Thread-safe, so workers can report bytes as they copy them.
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[int, Progress], None],
+        interval: float = PROGRESS_INTERVAL,
+    ) -> None:
+        """Initialize the tracker.
+
+        :param emit: called with the files done since the last call, and the progress
+        :param interval: least seconds between calls of emit
+        """
+
+        self._emit: Callable[[int, Progress], None] = emit
+        self.interval: float = interval
+        self._lock: threading.Lock = threading.Lock()
+        self.total_files: int = 0
+        self.total_size: int = 0
+        self.files: int = 0
+        self.size: int = 0
+        self._emitted_files: int = 0
+        # Bytes transferred (rather than skipped) when the rate was last measured
+        self._transferred: int = 0
+        self._measured_transferred: int = 0
+        self._measured_at: float = time.monotonic()
+        self._emitted_at: float = 0.0
+        self.rate: float = 0.0
+        # The last progress reported, e.g., for the job queue
+        self.latest: Progress | None = None
+
+    def set_totals(self, files: int, size: int) -> None:
+        """Set the files and bytes in the job."""
+
+        with self._lock:
+            self.total_files = files
+            self.total_size = size
+            # Measure the throughput from now, rather than from before indexing
+            self._measured_at = time.monotonic()
+
+    def _report(self, now: float, final: bool = False) -> tuple[int, Progress]:
+        """Measure the throughput and make a report; the lock must be held.
+
+        :param final: measure the throughput however little time has passed, so a job
+            shorter than the interval still reports it
+        """
+
+        elapsed: float = now - self._measured_at
+        if elapsed >= self.interval or (final and elapsed > 0):
+            latest: float = (self._transferred - self._measured_transferred) / elapsed
+            self.rate = (
+                latest
+                if not self.rate
+                else RATE_SMOOTHING * latest + (1 - RATE_SMOOTHING) * self.rate
+            )
+            self._measured_transferred = self._transferred
+            self._measured_at = now
+
+        remaining: float | None = None
+        if self.rate and self.total_size:
+            remaining = max(self.total_size - self.size, 0) / self.rate
+
+        files: int = self.files - self._emitted_files
+        self._emitted_files = self.files
+        self._emitted_at = now
+        self.latest = Progress(
+            self.files,
+            self.size,
+            self.total_files,
+            self.total_size,
+            self.rate,
+            remaining,
+        )
+        return files, self.latest
+
+    def _count(self, files: int, size: int, transferred: int) -> None:
+        """Count progress, and emit it if the interval has passed."""
+
+        with self._lock:
+            self.files += files
+            self.size += size
+            self._transferred += transferred
+            now: float = time.monotonic()
+            if now - self._emitted_at < self.interval:
+                return
+            report: tuple[int, Progress] = self._report(now)
+        self._emit(*report)
+
+    def add(self, files: int = 0, size: int = 0) -> None:
+        """Count files and bytes transferred; files may be 0 while a file is copied."""
+
+        self._count(files, size, size)
+
+    def skip(self, files: int = 0, size: int = 0) -> None:
+        """Count files and bytes that did not need transferring (e.g., unchanged).
+
+        These count towards the fraction done, but not towards the throughput.
+        """
+
+        self._count(files, size, 0)
+
+    def flush(self) -> None:
+        """Emit the progress now, e.g., when the job ends."""
+
+        with self._lock:
+            report: tuple[int, Progress] = self._report(time.monotonic(), final=True)
+        self._emit(*report)
@@ -0,0 +1,66 @@
+"""
+Runner for asynchronous database queries.
+
+Qt has its own event loop, so asyncio code cannot simply be awaited from a widget. This
+runner submits a query function to the application's asyncio event loop instead, where
+the asynchronous connection pool lives: it opens an AsyncDatabaseView, awaits the query
+function with it, and emits the result with the result signal like any other runner.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+from typing import TYPE_CHECKING, Any
+
+from client.db.async_pool import submit
+from client.db.async_views import AsyncDatabaseView
+
+from .generic import GenericRunner, Priority, RunnerKilledException
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+
+class AsyncQuery(GenericRunner):
+    """Run an asynchronous query function on a pool thread."""
+
+    def __init__(
+        self, conn_str: str, query: Callable[[AsyncDatabaseView], Awaitable[Any]]
+    ) -> None:
+        """Initialize the runner.
+
+        :param conn_str: psycopg connection string
+        :param query: coroutine function taking the view, e.g., one that gathers
+            several of the view's queries
+        """
+
+        super().__init__(func=self.job)
+        self.priority = Priority.INTERACTIVE
+        self.conn_str: str = conn_str
+        self.query: Callable[[AsyncDatabaseView], Awaitable[Any]] = query
+        self._future: concurrent.futures.Future[Any] | None = None
+
+    async def _run(self) -> Any:
+        """Open the view and await the query with it."""
+
+        async with AsyncDatabaseView(self.conn_str) as view:
+            return await self.query(view)
+
+    def job(self) -> Any:
+        """Run the query on the shared event loop, and wait for its result."""
+
+        self._future = submit(self._run())
+        # The runner may have been killed before the query was submitted
+        if self.cancel_token.cancelled:
+            self._future.cancel()
+        try:
+            return self._future.result()
+        except (asyncio.CancelledError, concurrent.futures.CancelledError) as exc:
+            raise RunnerKilledException from exc
+
+    def kill(self) -> None:
+        """Kill the runner, cancelling the queries in progress."""
+
+        super().kill()
+        if self._future is not None:
+            self._future.cancel()
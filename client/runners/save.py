@@ -1,22 +1,33 @@
 """
 Runner for uploading and downloading files to the permanent or local library.
 """
+from __future__ import annotations
+
 import errno
+import functools
 import logging
 import os
-import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any
-
-from PySide6.QtWidgets import QMessageBox, QWidget
+from typing import TYPE_CHECKING, Any
 
 from client import settings
 from client.db.utils import dict_to_conn_str
 from client.db.views import DatabaseView
+from client.library import LIBRARY_FILES, Manifest, TransferJournal
 from client.utils.file import create_dir, move_item
+from client.utils.pool import unordered_map
+from client.utils.sync import SyncPlan, plan_sync
 from client.utils.toml import load_toml
+from client.utils.transfer import batch_files, copy_file
 
-from .generic import GenericRunner, RunnerKilledException, RunnerStatus
+from .generic import GenericRunner, Priority
+from .scheduler import library_resources
+
+if TYPE_CHECKING:
+    from client.utils.indexer import FileTable
+    from client.utils.transfer import TransferResult
 
 
 class SaveScans(GenericRunner):
@@ -27,8 +38,22 @@ class SaveScans(GenericRunner):
         prj_id: int,
         *scan_ids: int,
         download: bool,
+        sync: bool = False,
+        delete: bool = False,
+        dry_run: bool = False,
     ) -> None:
-        """Initialize the runner."""
+        """Initialize the runner.
+
+        :param prj_id: project ID
+        :param scan_ids: scan IDs, or none to save every scan in the project
+        :param download: save from the permanent library to the local library, rather
+            than the other way around
+        :param sync: only copy files that are new or have changed
+        :param delete: delete files in the destination that are not in the source
+            (implies sync)
+        :param dry_run: plan the sync and report it, without changing anything (implies
+            sync)
+        """
 
         super().__init__(func=self.job)
 
@@ -38,14 +63,20 @@ class SaveScans(GenericRunner):
         # Store download flag
         self.download: bool = download
 
+        # Store the sync options, and the plan followed for each scan
+        self.sync: bool = sync or delete or dry_run
+        self.delete: bool = delete
+        self.dry_run: bool = dry_run
+        self.plans: dict[str, SyncPlan] = {}
+
         # Store the permanent storage directory name
         self.perm_dir_name: str = settings.get_perm_dir_name()
 
-        if not self.download:
-            # If uploading, the source is the raw scans dir in the root scan dir
-            self.glob_arg: str = f"{self.perm_dir_name}/*"
-        else:
-            self.glob_arg = "*"
+        # Store how files are copied, and count how each file was copied
+        self.transfer_backend: str = settings.get_transfer_backend()
+        self.hash_on_copy: bool = settings.get_hash_on_copy()
+        self.transfer_workers: int = settings.get_transfer_workers()
+        self.transfer_methods: Counter[str] = Counter()
 
         perm_lib: Path = Path(settings.get_lib("permanent"))
         local_lib: Path = Path(settings.get_lib("local"))
@@ -79,48 +110,23 @@ class SaveScans(GenericRunner):
         # Check required directories exist
         self.run_checks()
 
-        # Create directories in destination library if they do not already exist
-        create_dir(self.dest_prj_dir)
-        for scan_id in self.scan_ids:
-            create_dir(self.dest_prj_dir / str(scan_id))
-
-        # Count files to be moved for progress bar
-        # This can take a long time, so ask user if they want to continue
-        dlg: QWidget = QWidget()
-        response: QMessageBox.StandardButton = QMessageBox.information(
-            dlg,
-            "Indexing files",
-            (
-                "Depending on the size of the data, this may take a long time."
-                "Are you sure you would like to continue?"
-            ),
-            QMessageBox.StandardButton.Ok | QMessageBox.StandardButton.Cancel,
+        # Queue behind other bulk jobs using either library
+        self.priority = Priority.BULK
+        self.resources = library_resources(self.source_lib, self.dest_lib)
+        self.description = (
+            f"{'Download' if self.download else 'Upload'} project {prj_id},"
+            f" scans {', '.join(self.scan_ids)}"
         )
-        if response == QMessageBox.StandardButton.Cancel:
-            raise ValueError("User cancelled indexing files.")
-        dlg.close()
 
-        logging.info(
-            "Indexing files in %s, this may take a while...", self.source_prj_dir
-        )
-        total_files: int = 0
+        # Create directories in destination library if they do not already exist
+        if not self.dry_run:
+            create_dir(self.dest_prj_dir)
+            for scan_id in self.scan_ids:
+                create_dir(self.dest_prj_dir / str(scan_id))
+
+        # Files are indexed when the job starts, so the GUI does not freeze
+        self.file_tables: dict[str, FileTable] = {}
         self.size_in_bytes: int = 0
-        for scan_id in self.scan_ids:
-            scan_dir = self.source_prj_dir / str(scan_id) / self.perm_dir_name
-            # Note: the os.walk method is much faster than Path.rglob
-            for root, _, files in os.walk(scan_dir):
-                # Add number of files in the directory to total
-                total_files += len(files)
-                # Add size of files in the directory to total
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    self.size_in_bytes += os.stat(file_path).st_size
-        if not total_files or not self.size_in_bytes:
-            logging.warning("No files found in %s", self.source_prj_dir)
-            raise FileNotFoundError(
-                errno.ENOENT, os.strerror(errno.ENOENT), self.source_prj_dir
-            )
-        self.set_max_progress(total_files - 1)  # Count from 0
 
     def run_checks(self) -> None:
         """Check if the directories exist before saving files."""
@@ -175,8 +181,206 @@ class SaveScans(GenericRunner):
         db = DatabaseView(conn_str)
         return db.get_scan_form_data(scan_id)
 
-    def job(self) -> None:
-        """Save data from source to destination library."""
+    def index(self) -> None:
+        """Index the files to be saved, emitting the totals as they are found."""
+
+        logging.info("Indexing files in %s...", self.source_prj_dir)
+        total_files: int = 0
+        for scan_id in self.scan_ids:
+            table: FileTable = self.index_tree(
+                self.source_prj_dir / scan_id / self.perm_dir_name,
+                (total_files, self.size_in_bytes),
+            )
+            self.file_tables[scan_id] = table
+            total_files += len(table)
+            self.size_in_bytes += table.total_size
+        if not total_files or not self.size_in_bytes:
+            logging.warning("No files found in %s", self.source_prj_dir)
+            raise FileNotFoundError(
+                errno.ENOENT, os.strerror(errno.ENOENT), self.source_prj_dir
+            )
+        self.set_max_progress(total_files - 1)  # Count from 0
+        self.tracker.set_totals(total_files, self.size_in_bytes)
+
+    def list_files(
+        self, table: FileTable, source_scan_dir: Path, dest_scan_dir: Path
+    ) -> list[tuple[tuple[Path, Path], int]]:
+        """List the files in a scan's permanent storage directory to be saved.
+
+        Destination files keep the directory structure of the scan.
+
+        :param table: index of the scan's permanent storage directory
+        :return: ((source file, destination file), size in bytes) for each file
+        """
+
+        source_dir: Path = source_scan_dir / self.perm_dir_name
+        dest_dir: Path = dest_scan_dir / self.perm_dir_name
+        return [
+            ((source_dir / entry.rel_path, dest_dir / entry.rel_path), entry.size)
+            for entry in table
+        ]
+
+    def plan_files(
+        self,
+        table: FileTable,
+        source_scan_dir: Path,
+        dest_scan_dir: Path,
+        source_manifest: Manifest,
+        dest_manifest: Manifest,
+    ) -> SyncPlan:
+        """Plan which files in a scan's permanent storage directory to copy and delete.
+
+        Without sync, every file is copied and nothing is deleted.
+        """
+
+        files: list[tuple[tuple[Path, Path], int]] = self.list_files(
+            table, source_scan_dir, dest_scan_dir
+        )
+        if not self.sync:
+            return SyncPlan(files, 0, [])
+        return plan_sync(
+            files,
+            dest_scan_dir / self.perm_dir_name,
+            source_manifest,
+            dest_manifest,
+            delete=self.delete,
+        )
+
+    def copy_batch(
+        self, batch: list[tuple[Path, Path]]
+    ) -> list[tuple[Path, os.stat_result, Path, TransferResult]]:
+        """Copy a batch of files; this runs in a worker thread.
+
+        :return: (source file, source stat, destination file, result) for each file
+        """
+
+        results: list[tuple[Path, os.stat_result, Path, TransferResult]] = []
+        for item, dest_file in batch:
+            # Stop after the current file if the runner is killed; files not copied
+            # are not in the journal, so they are copied if the transfer is resumed
+            if self.cancel_token.cancelled:
+                break
+            source_stat: os.stat_result = os.stat(item)
+            # Keep modification times, so the next sync can skip unchanged files
+            result: TransferResult = copy_file(
+                item,
+                dest_file,
+                self.transfer_backend,
+                want_hash=self.hash_on_copy,
+                atomic=True,
+                keep_times=True,
+                # Count bytes as they are copied, so large files move the progress bar
+                progress=functools.partial(self.tracker.add, 0),
+            )
+            results.append((item, source_stat, dest_file, result))
+        return results
+
+    def save_files(
+        self,
+        files: list[tuple[tuple[Path, Path], int]],
+        dest_scan_dir: Path,
+        source_manifest: Manifest,
+        dest_manifest: Manifest,
+    ) -> bool:
+        """Save files to a scan directory.
+
+        Files are copied by a pool of workers: large files are copied alone and small
+        files in batches. If hashing on copy, each file is hashed as it is copied and
+        the hash is recorded in the manifests of both libraries; otherwise, the file is
+        copied using the fastest transfer backend available. Returns False if the runner
+        finished before every file was saved.
+
+        Each file is copied under a temporary name, renamed into place, and recorded in
+        the transfer journal, so an interrupted transfer resumes where it stopped.
+        """
+
+        with TransferJournal.open(dest_scan_dir) as journal:
+            # Skip files completed by an earlier transfer that was interrupted
+            to_copy: list[tuple[tuple[Path, Path], int]] = [
+                (paths, size)
+                for paths, size in files
+                if journal.get(paths[1], paths[0]) is None
+            ]
+            if len(to_copy) < len(files):
+                logging.info(
+                    "Skipping %s files already saved to %s",
+                    len(files) - len(to_copy),
+                    dest_scan_dir,
+                )
+                self.tracker.skip(
+                    len(files) - len(to_copy),
+                    sum(size for _, size in files) - sum(size for _, size in to_copy),
+                )
+
+            # Create the destination directories before the workers need them
+            for dest_dir in {dest_file.parent for (_, dest_file), _ in to_copy}:
+                create_dir(dest_dir)
+
+            executor: ThreadPoolExecutor = ThreadPoolExecutor(
+                max_workers=self.transfer_workers
+            )
+            try:
+                # New batches are only submitted as results are consumed, so pausing
+                # the runner stops the workers after their current batch, and killing
+                # it after their current file
+                for _, results in unordered_map(
+                    executor,
+                    self.copy_batch,
+                    batch_files(to_copy),
+                    2 * self.transfer_workers,
+                ):
+                    # Manifests and the journal are only touched from this thread
+                    for item, source_stat, dest_file, result in results:
+                        self.transfer_methods[result.method] += 1
+                        journal.record(dest_file, result.size, result.hash, source_stat)
+                        if result.hash:
+                            source_manifest.record(item, source_stat, result.hash)
+                            dest_manifest.record(
+                                dest_file, os.stat(dest_file), result.hash
+                            )
+
+                    # Count the files; their bytes were counted as they were copied
+                    self.tracker.add(len(results))
+
+                    # Wait while paused, stop if killed, and break if finished
+                    if not self.checkpoint():
+                        return False
+            finally:
+                # Let the batches in flight finish, but do not start any more
+                executor.shutdown(wait=True, cancel_futures=True)
+
+            # Every file has been saved, so there is nothing left to resume
+            journal.complete()
+        return True
+
+    def delete_files(
+        self,
+        files: list[tuple[Path, int]],
+        dest_scan_dir: Path,
+        dest_manifest: Manifest,
+    ) -> None:
+        """Delete files that are no longer in the source library.
+
+        Directories left empty are deleted too, up to the permanent storage directory.
+        """
+
+        perm_dir: Path = dest_scan_dir / self.perm_dir_name
+        for file, _ in files:
+            logging.info("Deleting %s", file)
+            file.unlink(missing_ok=True)
+            dest_manifest.discard(file)
+            parent: Path = file.parent
+            while parent != perm_dir and not any(parent.iterdir()):
+                parent.rmdir()
+                parent = parent.parent
+
+    def job(self) -> dict[str, SyncPlan]:
+        """Save data from source to destination library.
+
+        :return: the plan followed for each scan
+        """
+
+        self.index()
 
         # Save each scan in scan list
         for scan in self.scan_ids:
@@ -186,32 +390,54 @@ class SaveScans(GenericRunner):
             # Save to local library
             dest_scan_dir: Path = self.dest_prj_dir / Path(scan)
 
+            # Work out what needs to move
+            source_manifest: Manifest = Manifest.load(source_scan_dir)
+            dest_manifest: Manifest = Manifest.load(dest_scan_dir)
+            plan: SyncPlan = self.plan_files(
+                self.file_tables[scan],
+                source_scan_dir,
+                dest_scan_dir,
+                source_manifest,
+                dest_manifest,
+            )
+            self.plans[scan] = plan
+            logging.info("Scan %s: %s", scan, plan.report())
+            if self.dry_run:
+                self.tracker.skip(
+                    len(plan.copy) + plan.unchanged, self.file_tables[scan].total_size
+                )
+                continue
+
             # Copy metadata
             for item in (source_scan_dir / "tams_meta").glob("*"):
+                if item.name in LIBRARY_FILES:
+                    # Each library keeps its own manifest
+                    continue
                 dest_path: Path = dest_scan_dir / "tams_meta"
                 move_item(item, dest_path, keep_original=True)
 
-            # Move files
-            for item in source_scan_dir.rglob(self.glob_arg):
-                # Move item
-                if not item.is_file():
-                    # Skip directories
-                    continue
-                dest = dest_scan_dir / self.perm_dir_name
-
-                move_item(item, dest, keep_original=True)
-
-                # Increment progress bar
-                self.signals.progress.emit(1)
+            # Unchanged files count as saved
+            if plan.unchanged:
+                self.tracker.skip(
+                    plan.unchanged,
+                    self.file_tables[scan].total_size - plan.copy_bytes,
+                )
 
-                # Pause if worker is paused
-                while self.worker_status is RunnerStatus.PAUSED:
-                    # Keep waiting until resumed
-                    time.sleep(0)
+            # Move files, keeping the manifests up to date even if the job is stopped
+            try:
+                finished_early: bool = not self.save_files(
+                    plan.copy, dest_scan_dir, source_manifest, dest_manifest
+                )
+                if not finished_early:
+                    self.delete_files(plan.delete, dest_scan_dir, dest_manifest)
+            finally:
+                # The source library may be read-only; its manifest is a bonus
+                source_manifest.try_save()
+                dest_manifest.save()
+            if finished_early:
+                break
 
-                # Check if worker has been killed
-                if self.worker_status is RunnerStatus.KILLED:
-                    raise RunnerKilledException
-                if self.worker_status is RunnerStatus.FINISHED:
-                    # Break loop if job is finished
-                    break
+        logging.info(
+            "Files copied by transfer backend: %s", dict(self.transfer_methods)
+        )
+        return self.plans
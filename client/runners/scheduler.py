@@ -0,0 +1,206 @@
+"""
+Central scheduler for the jobs run by runners.
+
+Each dialogue used to start its runner on a thread pool of its own, so starting several
+transfers ran them all at once, fighting over the same disks. Runners are submitted to
+one scheduler instead. It runs them on a shared thread pool, starting queued jobs in
+order of priority, and holds a job back while any library or disk it uses is busy with
+as many jobs as it is allowed. One worker is kept free of bulk jobs, so loading a table
+or a scan's metadata never waits behind a transfer.
+"""
+from __future__ import annotations
+
+import functools
+import itertools
+import logging
+import os
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, NamedTuple
+
+from PySide6.QtCore import QObject, QThreadPool, Signal
+
+from client import settings
+
+from .generic import Priority
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from .generic import GenericRunner
+
+
+def library_resources(*libraries: Path | str) -> tuple[str, ...]:
+    """Get the resources used by a job reading or writing libraries.
+
+    :param libraries: library directories
+    :return: a resource for each library, and one for each disk the libraries are on
+    """
+
+    resources: list[str] = []
+    for library in libraries:
+        path: str = os.path.abspath(library)
+        resources.append(f"library:{path}")
+        try:
+            resources.append(f"disk:{os.stat(path).st_dev}")
+        except OSError:
+            # The job reports the missing library when it runs
+            pass
+    # Libraries on the same disk share its resource
+    return tuple(dict.fromkeys(resources))
+
+
+class ScheduledJob(NamedTuple):
+    """A job in the scheduler, as shown in the queue."""
+
+    runner: GenericRunner
+    running: bool
+
+
+class JobScheduler(QObject):
+    """Run jobs on a shared thread pool, by priority and within resource limits."""
+
+    # Emitted when a job is queued, starts, finishes or reports progress
+    changed: Signal = Signal()
+
+    def __init__(
+        self,
+        workers: int,
+        limits: dict[str, int] | None = None,
+        parent: QObject | None = None,
+    ) -> None:
+        """Initialize the scheduler.
+
+        :param workers: jobs run at once, including the one kept for interactive jobs
+        :param limits: jobs using a kind of resource (e.g., "disk") at once; kinds not
+            given are not limited
+        """
+
+        super().__init__(parent)
+        self.workers: int = max(workers, 2)
+        self.limits: dict[str, int] = limits or {}
+        self._pool: QThreadPool = QThreadPool()
+        self._pool.setMaxThreadCount(self.workers)
+        self._lock: threading.Lock = threading.Lock()
+        # Queued jobs are kept as (-priority, order submitted, runner)
+        self._queue: list[tuple[int, int, GenericRunner]] = []
+        self._order: itertools.count[int] = itertools.count()
+        self._running: list[GenericRunner] = []
+        self._in_use: Counter[str] = Counter()
+
+    def _can_start(self, runner: GenericRunner) -> bool:
+        """Check if a queued job can start; the lock must be held."""
+
+        # A killed job only has to wind down, so let it run at once
+        if runner.cancel_token.cancelled:
+            return True
+        if len(self._running) >= self.workers:
+            return False
+        if runner.priority < Priority.INTERACTIVE:
+            bulk: int = sum(
+                job.priority < Priority.INTERACTIVE for job in self._running
+            )
+            if bulk >= self.workers - 1:
+                return False
+        return all(
+            self._in_use[resource] < self.limits.get(resource.split(":")[0], 1 << 30)
+            for resource in runner.resources
+        )
+
+    def _dispatch(self) -> list[GenericRunner]:
+        """Take the queued jobs that can start now; the lock must be held.
+
+        A job held back by its resources does not hold back the jobs behind it.
+        """
+
+        started: list[GenericRunner] = []
+        for entry in sorted(self._queue):
+            runner: GenericRunner = entry[2]
+            if not self._can_start(runner):
+                continue
+            self._queue.remove(entry)
+            self._running.append(runner)
+            self._in_use.update(runner.resources)
+            started.append(runner)
+        return started
+
+    def _start(self, runners: list[GenericRunner]) -> None:
+        """Start jobs taken from the queue on the pool."""
+
+        for runner in runners:
+            logging.info("Starting %s.", runner.description)
+            self._pool.start(functools.partial(self._run, runner), runner.priority)
+
+    def _on_kill(self) -> None:
+        """Start a killed job that is still queued, so it winds down at once."""
+
+        with self._lock:
+            started: list[GenericRunner] = self._dispatch()
+        self._start(started)
+        self.changed.emit()
+
+    def _run(self, runner: GenericRunner) -> None:
+        """Run a job on a pool thread, then start the jobs waiting for its resources."""
+
+        try:
+            runner.run()
+        finally:
+            with self._lock:
+                self._running.remove(runner)
+                self._in_use.subtract(runner.resources)
+                started: list[GenericRunner] = self._dispatch()
+            self._start(started)
+            self.changed.emit()
+
+    def submit(self, runner: GenericRunner) -> None:
+        """Queue a job, starting it at once if its priority and resources allow.
+
+        :param runner: runner to run; its priority and resources decide when it starts
+        """
+
+        runner.signals.report.connect(self.changed)
+        runner.signals.kill.connect(self._on_kill)
+        with self._lock:
+            self._queue.append((-runner.priority, next(self._order), runner))
+            started: list[GenericRunner] = self._dispatch()
+        if runner not in started:
+            logging.info("Queued %s.", runner.description)
+        self._start(started)
+        self.changed.emit()
+
+    def jobs(self) -> list[ScheduledJob]:
+        """Get the running jobs, then the queued jobs in the order they will start."""
+
+        with self._lock:
+            return [ScheduledJob(runner, True) for runner in self._running] + [
+                ScheduledJob(entry[2], False) for entry in sorted(self._queue)
+            ]
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for every job, including those queued, to finish.
+
+        :param timeout: seconds to wait, or None to wait for ever
+        :return: False if the timeout passed first
+        """
+
+        return self._pool.waitForDone(-1 if timeout is None else int(timeout * 1000))
+
+
+_scheduler: JobScheduler | None = None
+_scheduler_lock: threading.Lock = threading.Lock()
+
+
+def get_scheduler() -> JobScheduler:
+    """Get the scheduler shared by the application, creating it on first use."""
+
+    global _scheduler  # pylint: disable=global-statement
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler(
+                settings.get_job_workers(),
+                {
+                    "library": settings.get_jobs_per_library(),
+                    "disk": settings.get_jobs_per_disk(),
+                },
+            )
+        return _scheduler
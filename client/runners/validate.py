@@ -2,37 +2,71 @@
 Runner for checking that the local and permanent scans are the same.
 
 This involves first doing a shallow check (for example, comparing file names) and then
-doing a deep check (comparing file contents) by comparing file hashes.
+doing a deep check (comparing file contents) by comparing file hashes. Files are hashed
+in parallel by a pool of workers (see client.utils.hash.HashEngine): threads by default,
+or one process per core, which scales with the cores on a server where hashing is
+CPU-bound.
+
+Each library records the hashes of a scan's files in a manifest (see
+client.library.manifest); files that have not changed since they were hashed are not
+read again unless a deep validation is requested.
 
 Note: file validation is very slow, so it uses os instead of pathlib, which is faster.
 """
+from __future__ import annotations
+
 import errno
 import glob
 import logging
 import os
-import time
-from filecmp import dircmp
 from pathlib import Path
-
-from PySide6.QtWidgets import QMessageBox, QWidget
+from typing import TYPE_CHECKING
 
 from client import settings
-from client.utils.hash import hash_in_chunks
+from client.library import LIBRARY_FILES, Manifest
+from client.utils.hash import HashEngine
+from client.utils.indexer import scan_tree
+
+from .generic import GenericRunner, Priority, RunnerStatus
+from .scheduler import library_resources
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
 
-from .generic import GenericRunner, RunnerKilledException, RunnerStatus
+    from client.utils.indexer import FileTable
 
 
 class ValidateScans(GenericRunner):
     """Runner that validates data in the local library."""
 
-    def __init__(self, prj_id: int, *scan_ids: int) -> None:
-        """Initialize the runner."""
+    def __init__(
+        self,
+        prj_id: int,
+        *scan_ids: int,
+        deep: bool = False,
+        executor: str | None = None,
+    ) -> None:
+        """Initialize the runner.
+
+        :param prj_id: project ID
+        :param scan_ids: scan IDs to validate; all scans in the project if none given
+        :param deep: re-hash every file, ignoring the hashes recorded in the manifests
+        :param executor: pool that hashes files, "thread" or "process" (one process per
+            core); by default, the one in the settings
+        """
 
         super().__init__(func=self.job)
 
         # Store the project ID
         self.prj_id: int = prj_id
 
+        # Store the deep validation flag
+        self.deep: bool = deep
+
+        # Store how files are hashed
+        self.hash_workers: int = settings.get_hash_workers()
+        self.hash_executor: str = executor or settings.get_hash_executor()
+
         # Store the permanent storage directory name
         self.perm_dir_name: str = settings.get_perm_dir_name()
 
@@ -45,6 +79,11 @@ class ValidateScans(GenericRunner):
         # Check library and project directories exist
         self.run_checks()
 
+        # Queue behind other bulk jobs using either library
+        self.priority = Priority.BULK
+        self.resources = library_resources(self.perm_lib, self.local_lib)
+        self.description = f"Validate project {prj_id}"
+
         # If no scan IDs are provided, save all scans in project
         if not scan_ids:
             # Assume each directory in the project directory is a scan
@@ -102,37 +141,11 @@ class ValidateScans(GenericRunner):
             os.path.join(self.local_prj_dir, str(scan_id)) for scan_id in self.scan_ids
         )
 
-        # Count files to be moved for progress bar
-        dlg: QWidget = QWidget()
-        response: QMessageBox.StandardButton = QMessageBox.information(
-            dlg,
-            "Indexing files",
-            (
-                "Depending on the size of the data, this may take a long time. Are you"
-                " sure you would like to continue?"
-            ),
-            QMessageBox.StandardButton.Ok | QMessageBox.StandardButton.Cancel,
-        )
-        if response == QMessageBox.StandardButton.Cancel:
-            raise InterruptedError("User cancelled validation.")
-        dlg.close()
-
-        total_files: int = 0
+        # Files are indexed when the job starts, so the GUI does not freeze
+        self.meta_tables: dict[int, FileTable] = {}
+        self.perm_tables: dict[int, FileTable] = {}
+        self.local_tables: dict[int, FileTable] = {}
         self.size_in_bytes: int = 0
-        for scan_id in self.scan_ids:
-            perm_scan_dir = os.path.join(self.perm_prj_dir, str(scan_id))
-            # Note: the os.walk method is much faster than Path.rglob
-            for root, _, files in os.walk(perm_scan_dir):
-                total_files += len(files)
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    self.size_in_bytes += os.stat(file_path).st_size
-        if not total_files or not self.size_in_bytes:
-            # If negative, total_files is 0 and no files are found
-            raise FileNotFoundError(
-                errno.ENOENT, os.strerror(errno.ENOENT), self.local_prj_dir
-            )
-        self.set_max_progress(total_files - 1)
 
     def run_checks(self) -> None:
         """Check if directories exist before validating files."""
@@ -167,28 +180,198 @@ class ValidateScans(GenericRunner):
                 errno.ENOTDIR, os.strerror(errno.ENOTDIR), self.perm_lib
             )
 
-    @classmethod
-    def has_differences(cls, comparison: dircmp[str]) -> bool:
-        """Check if two directories have differences."""
+    def index(self) -> None:
+        """Index the files to be validated, emitting the totals as they are found."""
 
-        differences: list[str] = (
-            comparison.left_only + comparison.right_only + comparison.diff_files
+        logging.info("Indexing files in %s...", self.perm_prj_dir)
+        found: tuple[int, int] = (0, 0)
+        for scan_id in self.scan_ids:
+            perm_scan_dir: str = os.path.join(self.perm_prj_dir, str(scan_id))
+            local_scan_dir: str = os.path.join(self.local_prj_dir, str(scan_id))
+            self.meta_tables[scan_id] = scan_tree(
+                os.path.join(perm_scan_dir, "tams_meta")
+            )
+            for tables, scan_dir in (
+                (self.perm_tables, perm_scan_dir),
+                (self.local_tables, local_scan_dir),
+            ):
+                # Stat every file, so the shallow check compares the sizes as they
+                # are now, not as the library index last saw them
+                tables[scan_id] = self.index_tree(
+                    os.path.join(scan_dir, self.perm_dir_name), found, fresh=True
+                )
+                found = (
+                    found[0] + len(tables[scan_id]),
+                    found[1] + tables[scan_id].total_size,
+                )
+            self.size_in_bytes += self.perm_tables[scan_id].total_size
+
+        # One step per scan directory checked, and one per file compared; the files
+        # that describe each library's own copy are not compared
+        meta_sizes: list[int] = [
+            entry.size
+            for scan_id in self.scan_ids
+            for entry in self.meta_tables[scan_id]
+            if os.path.basename(entry.rel_path) not in LIBRARY_FILES
+        ]
+        total_files: int = (
+            len(self.scan_ids)
+            + len(meta_sizes)
+            + sum(len(self.perm_tables[scan_id]) for scan_id in self.scan_ids)
         )
-        if differences:
-            return True
-        for sub_dir in comparison.subdirs.values():
-            # Recursively check subdirectories
-            if cls.has_differences(sub_dir):
-                return True
-        return False
+        if not self.size_in_bytes:
+            raise FileNotFoundError(
+                errno.ENOENT, os.strerror(errno.ENOENT), self.perm_prj_dir
+            )
+        self.set_max_progress(total_files - 1)
+        # Progress is weighted by the bytes of the permanent copy of each file hashed
+        self.tracker.set_totals(total_files, self.size_in_bytes + sum(meta_sizes))
+
+    @staticmethod
+    def get_file_pairs(
+        table: FileTable, local_dir: str, exclude: frozenset[str] = frozenset()
+    ) -> list[tuple[str, str]]:
+        """Pair each file indexed in a permanent directory with its local counterpart.
+
+        Files with a name in exclude are skipped.
+        """
+
+        return [
+            (table.path(rel_path), os.path.join(local_dir, rel_path))
+            for rel_path in table.rel_paths
+            if os.path.basename(rel_path) not in exclude
+        ]
+
+    @staticmethod
+    def file_sizes(*tables: FileTable) -> dict[str, int]:
+        """Get the size of each file indexed in permanent directories, by path."""
+
+        return {
+            table.path(rel_path): size
+            for table in tables
+            for rel_path, size in table.size_by_path().items()
+        }
+
+    def check_hashes(
+        self,
+        perm_file: str,
+        perm_hash: str | None,
+        local_hash: str | None,
+        size: int = 0,
+    ) -> bool:
+        """Check the hashes of a pair of files match.
+
+        Sets the result to False if they do not. Returns False if the job should stop.
+        """
+
+        # Count the file and its bytes towards the progress
+        self.tracker.add(1, size)
+
+        if perm_hash is None or local_hash is None:
+            logging.info("%s not found, validation fail.", os.path.basename(perm_file))
+            self.set_result(False)
+        elif perm_hash != local_hash:
+            logging.info(
+                "Hashes do not match: file %s is invalid.", os.path.basename(perm_file)
+            )
+            self.set_result(False)
+
+        # Wait while paused, stop if killed, and stop if finished
+        return self.checkpoint()
+
+    def recorded_hash(
+        self, file: str, manifest: Manifest | None, stats: dict[str, os.stat_result]
+    ) -> str | None:
+        """Get the hash of a file from a manifest if the file has not changed.
+
+        The stat of the file is stored in stats so that the hash can be recorded later.
+        Returns None if the file must be hashed.
+        """
+
+        if manifest is None:
+            return None
+        try:
+            stats[file] = os.stat(file)
+        except FileNotFoundError:
+            # Hashing will report the missing file
+            return None
+        if self.deep:
+            return None
+        return manifest.lookup(file, stats[file])
+
+    def compare_hashes(
+        self,
+        engine: HashEngine,
+        pairs: list[tuple[str, str]],
+        sizes: dict[str, int],
+        perm_manifest: Manifest | None = None,
+        local_manifest: Manifest | None = None,
+    ) -> bool:
+        """Check the hashes of each pair of files match.
+
+        Hashes recorded in the manifests are used for files that have not changed since
+        they were hashed (unless this is a deep validation); the remaining files are
+        hashed in parallel and their hashes are recorded in the manifests.
+
+        Sets the result to False and returns False on the first difference.
+
+        :param engine: pool of workers that hashes the files
+        :param pairs: (permanent file, local file) for each file
+        :param sizes: size of each permanent file, for the progress
+        """
+
+        # Use recorded hashes where possible
+        stats: dict[str, os.stat_result] = {}
+        to_hash: list[tuple[str, str]] = []
+        for perm_file, local_file in pairs:
+            perm_hash: str | None = self.recorded_hash(perm_file, perm_manifest, stats)
+            local_hash: str | None = self.recorded_hash(
+                local_file, local_manifest, stats
+            )
+            if perm_hash is None or local_hash is None:
+                to_hash.append((perm_file, local_file))
+            elif not self.check_hashes(
+                perm_file, perm_hash, local_hash, sizes.get(perm_file, 0)
+            ):
+                return False
+        logging.info("%s of %s files need hashing.", len(to_hash), len(pairs))
+
+        # Hash the rest; worker processes hash shards of pairs, streaming the hashes
+        # of each shard back as it finishes
+        results: Iterator[tuple[tuple[str, str], str | None, str | None]] = (
+            engine.hash_pair_shards((pair, sizes.get(pair[0], 0)) for pair in to_hash)
+            if engine.processes
+            else engine.hash_pairs(to_hash)
+        )
+        for (perm_file, local_file), perm_hash, local_hash in results:
+            # Remember the hashes for next time
+            if perm_manifest is not None and perm_hash and perm_file in stats:
+                perm_manifest.record(perm_file, stats[perm_file], perm_hash)
+            if local_manifest is not None and local_hash and local_file in stats:
+                local_manifest.record(local_file, stats[local_file], local_hash)
+
+            if not self.check_hashes(
+                perm_file, perm_hash, local_hash, sizes.get(perm_file, 0)
+            ):
+                return False
+        return True
 
     def job(self) -> None:
         """Save data to local library."""
 
+        self.index()
+
+        # One pool of hash workers serves every scan, as starting processes is slow
+        with HashEngine(self.hash_workers, self.hash_executor) as engine:
+            self.check_scans(engine)
+
+    def check_scans(self, engine: HashEngine) -> None:
+        """Check the local copy of each scan matches the permanent copy."""
+
         # Check local scan directories exist
         for scan_dir in self.local_scan_dirs:
-            # Increment progress bar
-            self.signals.progress.emit(1)
+            # Count the directory towards the progress; it has no bytes to hash
+            self.tracker.skip(1)
             if not os.path.exists(scan_dir) or not os.path.isdir(scan_dir):
                 # If local scan directory does not exist, download is invalid
                 logging.info(
@@ -197,112 +380,59 @@ class ValidateScans(GenericRunner):
                 self.set_result(False)
                 return
 
-        # Check scan meta
+        # Check scan meta (except the files that describe each library's own copy)
+        meta_pairs: list[tuple[str, str]] = []
         for scan_id in self.scan_ids:
-            perm_dir: str = os.path.join(self.perm_prj_dir, str(scan_id), "tams_meta")
             local_dir: str = os.path.join(self.local_prj_dir, str(scan_id), "tams_meta")
-            for root, _, files in os.walk(perm_dir):
-                for file in files:
-                    # Increment progress bar
-                    self.signals.progress.emit(1)
-
-                    try:
-                        # rel_path of the form "/..." where "/" is the root of the scan
-                        rel_path: str = file
-                        local_file: str = os.path.join(local_dir, rel_path)
-
-                        # Hash the files
-                        target_hash: str = hash_in_chunks(os.path.join(root, rel_path))
-                        local_hash: str = hash_in_chunks(local_file)
-
-                        # Compare hashes
-                        if target_hash != local_hash:
-                            logging.info(
-                                "Hashes do not match: file %s is invalid.", file
-                            )
-                            self.set_result(False)
-
-                    except FileNotFoundError:
-                        logging.info(
-                            "%s not found, validation fail.", os.path.basename(file)
-                        )
-                        self.set_result(False)
-
-                    # Pause if worker is paused
-                    while self.worker_status is RunnerStatus.PAUSED:
-                        # Keep waiting until resumed
-                        time.sleep(0)
-                    # Check if worker has been killed
-                    if self.worker_status is RunnerStatus.KILLED:
-                        raise RunnerKilledException
-                    if self.worker_status is RunnerStatus.FINISHED:
-                        # Break loop if job is finished
-                        return
+            meta_pairs.extend(
+                self.get_file_pairs(self.meta_tables[scan_id], local_dir, LIBRARY_FILES)
+            )
+        if not self.compare_hashes(
+            engine,
+            meta_pairs,
+            self.file_sizes(*(self.meta_tables[scan_id] for scan_id in self.scan_ids)),
+        ):
+            return
 
         # Check the contents of each scan directory
         for scan_id in self.scan_ids:
-            perm_dir = os.path.join(
-                self.perm_prj_dir, str(scan_id), settings.get_perm_dir_name()
-            )
+            perm_scan_dir: str = os.path.join(self.perm_prj_dir, str(scan_id))
+            local_scan_dir: str = os.path.join(self.local_prj_dir, str(scan_id))
             # Local directory appended with subdirectory
-            local_dir = os.path.join(
-                self.local_prj_dir, str(scan_id), settings.get_perm_dir_name()
-            )
+            local_dir = os.path.join(local_scan_dir, self.perm_dir_name)
 
-            # Do a shallow identity check (e.g., names and metadata)
+            # Do a shallow identity check (e.g., names and sizes)
             # This doesn't check the contents of the files, but if we catch a difference
             # here, we can be sure that the files are different and skip the lengthy
             # hashing process.
             logging.info("Performing shallow identity check.")
-            comparison = dircmp(perm_dir, local_dir)
-            same = not self.has_differences(comparison)
-            if not same:
+            if (
+                self.perm_tables[scan_id].size_by_path()
+                != self.local_tables[scan_id].size_by_path()
+            ):
                 logging.info("Shallow identity check failed.")
                 self.set_result(False)
                 return
 
             # Do a deep identity check (e.g., contents of files)
             logging.info("Performing deep identity check.")
-            for root, _, files in os.walk(perm_dir):
-                for file in files:
-                    # Increment progress bar
-                    self.signals.progress.emit(1)
-
-                    try:
-                        # rel_path of the form "/..." where "/" is the root of the scan
-                        rel_path = file
-                        local_file = os.path.join(local_dir, rel_path)
-
-                        # Hash the files
-                        target_hash = hash_in_chunks(os.path.join(root, rel_path))
-                        local_hash = hash_in_chunks(local_file)
-
-                        # Compare hashes
-                        if target_hash != local_hash:
-                            logging.info(
-                                "Hashes do not match: file %s is invalid.", file
-                            )
-                            self.set_result(False)
-
-                    except FileNotFoundError:
-                        logging.info(
-                            "%s not found, validation fail.", os.path.basename(file)
-                        )
-                        self.set_result(False)
-
-                    # Pause if worker is paused
-                    while self.worker_status is RunnerStatus.PAUSED:
-                        # Keep waiting until resumed
-                        time.sleep(0)
-                    # Check if worker has been killed
-                    if self.worker_status is RunnerStatus.KILLED:
-                        raise RunnerKilledException
-                    if self.worker_status is RunnerStatus.FINISHED:
-                        # Break loop if job is finished
-                        return
-
-            if self.worker_status is not RunnerStatus.FINISHED:
-                logging.info("Scan %s validated successfully.", scan_id)
+            perm_manifest: Manifest = Manifest.load(perm_scan_dir)
+            local_manifest: Manifest = Manifest.load(local_scan_dir)
+            try:
+                same: bool = self.compare_hashes(
+                    engine,
+                    self.get_file_pairs(self.perm_tables[scan_id], local_dir),
+                    self.file_sizes(self.perm_tables[scan_id]),
+                    perm_manifest,
+                    local_manifest,
+                )
+            finally:
+                perm_manifest.try_save()
+                local_manifest.try_save()
+            if not same:
+                return
+
+            logging.info("Scan %s validated successfully.", scan_id)
 
         # If the job reached the end without finishing, it means it was successful
         if self.worker_status is not RunnerStatus.FINISHED:
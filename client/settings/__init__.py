@@ -18,6 +18,7 @@ TAMS_DIR: Path = Path(__file__).parents[1]
 general: Path = TAMS_DIR / "settings" / "general.toml"
 database: Path = TAMS_DIR / "settings" / "database.toml"
 log_file: Path = TAMS_DIR / "settings" / "file.log"
+library_index: Path = TAMS_DIR / "settings" / "library_index.sqlite3"
 placeholder_image: Path = TAMS_DIR / "resources" / "404.png"
 logo: Path = TAMS_DIR / "resources" / "tams.png"
 splash: Path = TAMS_DIR / "resources" / "splash.png"
@@ -30,6 +31,19 @@ default_general_settings: dict[str, Any] = {
     "structure": {
         "perm_dir_name": "raw",
     },
+    "performance": {
+        "hash_workers": 0,
+        "hash_executor": "thread",
+        "transfer_backend": "auto",
+        "transfer_workers": 4,
+        "hash_on_copy": True,
+        "db_pool_min_size": 1,
+        "db_pool_max_size": 4,
+        "db_pool_max_idle": 300,
+        "job_workers": 4,
+        "jobs_per_library": 1,
+        "jobs_per_disk": 1,
+    },
 }
 
 
@@ -51,6 +65,19 @@ def access_settings(func: Callable[..., Any]) -> Callable[..., Any]:
     return wrapper
 
 
+def get_setting(section: str, key: str) -> Any:
+    """Get a setting, falling back to the default if it is not in the settings file.
+
+    Settings files created by older versions do not have the newer sections, so fall
+    back to the defaults rather than raising a KeyError.
+    """
+
+    try:
+        return load_toml(general)[section][key]
+    except KeyError:
+        return default_general_settings[section][key]
+
+
 @access_settings
 def get_lib(lib_title: str) -> str:
     """Get the current library to present to the user."""
@@ -63,3 +90,82 @@ def get_perm_dir_name() -> str:
     """Get the name of the permanent storage directory."""
 
     return str(load_toml(general)["structure"]["perm_dir_name"])
+
+
+@access_settings
+def get_hash_workers() -> int:
+    """Get the number of workers used to hash files (0 lets the pool decide)."""
+
+    return int(get_setting("performance", "hash_workers"))
+
+
+@access_settings
+def get_hash_executor() -> str:
+    """Get the type of pool used to hash files ("thread" or "process")."""
+
+    return str(get_setting("performance", "hash_executor"))
+
+
+@access_settings
+def get_transfer_backend() -> str:
+    """Get the backend used to copy files ("auto" tries the fastest first)."""
+
+    return str(get_setting("performance", "transfer_backend"))
+
+
+@access_settings
+def get_hash_on_copy() -> bool:
+    """Get whether files are hashed as they are copied between libraries."""
+
+    return bool(get_setting("performance", "hash_on_copy"))
+
+
+@access_settings
+def get_transfer_workers() -> int:
+    """Get the number of files copied between libraries at once."""
+
+    return max(1, int(get_setting("performance", "transfer_workers")))
+
+
+@access_settings
+def get_db_pool_min_size() -> int:
+    """Get the number of database connections kept open while idle."""
+
+    return max(0, int(get_setting("performance", "db_pool_min_size")))
+
+
+@access_settings
+def get_db_pool_max_size() -> int:
+    """Get the maximum number of database connections open at once."""
+
+    return max(
+        1, get_db_pool_min_size(), int(get_setting("performance", "db_pool_max_size"))
+    )
+
+
+@access_settings
+def get_db_pool_max_idle() -> float:
+    """Get the seconds an idle database connection is kept open."""
+
+    return float(get_setting("performance", "db_pool_max_idle"))
+
+
+@access_settings
+def get_job_workers() -> int:
+    """Get the number of jobs (e.g., transfers and table loads) run at once."""
+
+    return max(2, int(get_setting("performance", "job_workers")))
+
+
+@access_settings
+def get_jobs_per_library() -> int:
+    """Get the number of jobs using a library at once."""
+
+    return max(1, int(get_setting("performance", "jobs_per_library")))
+
+
+@access_settings
+def get_jobs_per_disk() -> int:
+    """Get the number of jobs using a disk at once."""
+
+    return max(1, int(get_setting("performance", "jobs_per_disk")))
@@ -0,0 +1,70 @@
+"""
+Test the runner bridging asynchronous queries to Qt.
+"""
+import asyncio
+import threading
+import time
+import unittest
+from typing import Any
+
+from client.runners.generic import RunnerKilledException
+from client.runners.query import AsyncQuery
+
+
+class TestAsyncQuery(unittest.TestCase):
+    """Test the AsyncQuery runner."""
+
+    def run_query(self, query: Any) -> tuple[list[Any], list[Any]]:
+        """Run a query function with the runner, collecting its results and errors."""
+
+        results: list[Any] = []
+        errors: list[Any] = []
+        runner = AsyncQuery("dbname=test", query)
+        runner.signals.result.connect(results.append)
+        runner.signals.error.connect(errors.append)
+        runner.run()
+        return results, errors
+
+    def test_concurrent(self) -> None:
+        """Test gathered queries run at the same time, not one after another."""
+
+        async def query(view: Any) -> list[int]:
+            async def lookup(value: int) -> int:
+                await asyncio.sleep(0.2)
+                return value
+
+            return await asyncio.gather(lookup(1), lookup(2), lookup(3))
+
+        start = time.perf_counter()
+        results, errors = self.run_query(query)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual([[1, 2, 3]], results)
+        self.assertEqual([], errors)
+
+    def test_kill(self) -> None:
+        """Test killing the runner cancels the query."""
+
+        started = threading.Event()
+
+        async def query(view: Any) -> None:
+            started.set()
+            await asyncio.sleep(10)
+
+        errors: list[BaseException] = []
+        runner = AsyncQuery("dbname=test", query)
+
+        def run() -> None:
+            """Run the job, keeping the exception it raises."""
+
+            try:
+                runner.job()
+            except Exception as exc:  # pylint: disable=broad-except
+                errors.append(exc)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        started.wait(5)
+        runner.kill()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertIsInstance(errors[0], RunnerKilledException)
@@ -0,0 +1,140 @@
+"""
+Test running jobs from the command line.
+"""
+import contextlib
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from client import settings
+from client.cli import (
+    EXIT_ERROR,
+    EXIT_INTERRUPTED,
+    EXIT_OK,
+    JsonLines,
+    main,
+    parse_args,
+    run_job,
+)
+from client.runners.generic import GenericRunner, RunnerKilledException
+
+
+class CountingRunner(GenericRunner):
+    """Runner counting files, then returning a result or raising an exception."""
+
+    def __init__(self, error: BaseException | None = None) -> None:
+        super().__init__(func=self.job)
+        self.description = "Count"
+        self.error: BaseException | None = error
+
+    def job(self) -> int:
+        """Count three files of 10 bytes."""
+
+        self.tracker.set_totals(3, 30)
+        for _ in range(3):
+            self.tracker.add(1, 10)
+        if self.error is not None:
+            raise self.error
+        return 3
+
+
+class TestRunJob(unittest.TestCase):
+    """Test jobs are run with their progress written as JSON lines."""
+
+    def run_job(self, runner: GenericRunner) -> tuple[int, list[dict]]:
+        """Run a job, returning its exit code and events."""
+
+        stream: io.StringIO = io.StringIO()
+        exit_code: int = run_job(runner, JsonLines(stream)).exit_code
+        return exit_code, [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    def test_success(self) -> None:
+        """Test a job that succeeds reports its progress to the end."""
+
+        exit_code, events = self.run_job(CountingRunner())
+        self.assertEqual(EXIT_OK, exit_code)
+        self.assertEqual("start", events[0]["event"])
+        self.assertEqual(
+            {"event": "progress", "job": "Count", "files": 3, "size": 30},
+            {key: events[-1][key] for key in ("event", "job", "files", "size")},
+        )
+
+    def test_error(self) -> None:
+        """Test a job that raises an exception reports it."""
+
+        exit_code, events = self.run_job(CountingRunner(ValueError("bad")))
+        self.assertEqual(EXIT_ERROR, exit_code)
+        self.assertEqual(
+            {"event": "error", "job": "Count", "type": "ValueError", "message": "bad"},
+            events[-1],
+        )
+
+    def test_killed(self) -> None:
+        """Test a job that is killed is reported as interrupted."""
+
+        exit_code, events = self.run_job(CountingRunner(RunnerKilledException()))
+        self.assertEqual(EXIT_INTERRUPTED, exit_code)
+        self.assertEqual("interrupted", events[-1]["event"])
+
+
+class TestMain(unittest.TestCase):
+    """Test commands write nothing to stdout but JSON lines."""
+
+    def setUp(self) -> None:
+        """Create a permanent library holding a scan, and an empty local library."""
+
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        scan_dir: Path = self.tmp_dir / "permanent" / "1" / "2"
+        (scan_dir / "raw").mkdir(parents=True)
+        (scan_dir / "tams_meta").mkdir()
+        for name in ("1.tif", "2.tif"):
+            (scan_dir / "raw" / name).write_bytes(b"slice" * 100)
+        (scan_dir / "tams_meta" / "user_form.toml").write_text("[scan]\nid = 2\n")
+        (self.tmp_dir / "local").mkdir()
+
+    def tearDown(self) -> None:
+        """Delete the libraries."""
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_download_json_lines(self) -> None:
+        """Test every line a download writes to stdout is a JSON event."""
+
+        stdout: io.StringIO = io.StringIO()
+        with mock.patch.object(
+            settings, "get_lib", lambda title: str(self.tmp_dir / title)
+        ), mock.patch.object(
+            settings, "library_index", self.tmp_dir / "index.sqlite3"
+        ), contextlib.redirect_stdout(
+            stdout
+        ):
+            exit_code: int = main(["download", "1", "--sync"])
+
+        self.assertEqual(EXIT_OK, exit_code)
+        events: list[dict] = [
+            json.loads(line) for line in stdout.getvalue().splitlines()
+        ]
+        self.assertEqual("result", events[-1]["event"])
+        self.assertTrue(
+            (
+                self.tmp_dir / "local" / "1" / "2" / "tams_meta" / "user_form.toml"
+            ).exists()
+        )
+
+
+class TestParseArgs(unittest.TestCase):
+    """Test the command line is parsed."""
+
+    def test_parse_args(self) -> None:
+        """Test the options of each command."""
+
+        args = parse_args(["download", "1", "2", "3", "--sync"])
+        self.assertEqual((1, [2, 3], True), (args.project, args.scans, args.sync))
+        args = parse_args(["validate", "4", "--deep"])
+        self.assertEqual((4, [], True), (args.project, args.scans, args.deep))
+        with self.assertRaises(SystemExit):
+            parse_args(["validate"])
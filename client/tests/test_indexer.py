@@ -0,0 +1,58 @@
+"""
+Test the file indexer.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from client.utils.indexer import scan_tree
+
+
+class TestIndexer(unittest.TestCase):
+    """Test functions in indexer.py utils file."""
+
+    def setUp(self) -> None:
+        """Create a directory tree with files at several depths."""
+
+        self.root = Path(tempfile.mkdtemp())
+        (self.root / "a" / "b").mkdir(parents=True)
+        for i, rel_path in enumerate(("top.tif", "a/mid.tif", "a/b/deep.tif")):
+            (self.root / rel_path).write_bytes(b"x" * (i + 1))
+
+    def tearDown(self) -> None:
+        """Delete the directory tree."""
+
+        shutil.rmtree(self.root)
+
+    def test_scan_tree(self) -> None:
+        """Test every file is indexed with its size and modification time."""
+
+        table = scan_tree(self.root)
+        self.assertEqual(3, len(table))
+        self.assertEqual(6, table.total_size)
+        self.assertEqual(
+            {
+                "top.tif": 1,
+                os.path.join("a", "mid.tif"): 2,
+                os.path.join("a", "b", "deep.tif"): 3,
+            },
+            table.size_by_path(),
+        )
+        for entry in table:
+            stat = os.stat(table.path(entry.rel_path))
+            self.assertEqual(stat.st_mtime_ns, entry.mtime_ns)
+
+    def test_report(self) -> None:
+        """Test partial totals are reported while indexing."""
+
+        reports: list[tuple[int, int]] = []
+        scan_tree(self.root, lambda *totals: reports.append(totals), report_every=2)
+        self.assertEqual(2, reports[0][0])
+        self.assertEqual((3, 6), reports[-1])
+
+    def test_missing_root(self) -> None:
+        """Test a missing directory has no files."""
+
+        self.assertEqual(0, len(scan_tree(self.root / "missing")))
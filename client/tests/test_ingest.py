@@ -0,0 +1,68 @@
+"""
+Test reading scan directories for the bulk ingest.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from client.db.ingest import IngestResult, ScanRecord
+from client.runners.ingest import read_scan_record
+from client.utils.toml import create_toml
+
+CTPROFILE: str = (
+    "<CTProfile><XraySettings><kV>160</kV><uA>62</uA></XraySettings></CTProfile>"
+)
+XTEKCT: str = "[XTekCT]\nName=Mug\n"
+
+
+class TestReadScanRecord(unittest.TestCase):
+    """Test reading the IDs and metadata of a scan directory."""
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        (self.path / "mug.ctprofile.xml").write_text(CTPROFILE, encoding="utf8")
+        (self.path / "mug.xtekct").write_text(XTEKCT, encoding="utf8")
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_nikon(self) -> None:
+        """Test a Nikon scan is read with the IDs from its user form."""
+
+        create_toml(
+            self.path / "user_form.toml",
+            {"scan": {"scan_id": 4, "project_id": 2, "instrument_id": 1}},
+        )
+        self.assertEqual(
+            ScanRecord(4, 2, 1, {"voltage": 160, "amperage": 62, "scan_name": "Mug"}),
+            read_scan_record(self.path),
+        )
+
+    def test_missing_ids(self) -> None:
+        """Test a scan without a scan ID and project ID is skipped."""
+
+        self.assertIsNone(read_scan_record(self.path))
+        create_toml(self.path / "user_form.toml", {"scan": {"scan_id": 4}})
+        self.assertIsNone(read_scan_record(self.path))
+
+    def test_missing_instrument_id(self) -> None:
+        """Test a scan without an instrument ID is skipped, as the column is not null.
+
+        Otherwise it would fail the COPY, and the whole batch with it.
+        """
+
+        create_toml(
+            self.path / "user_form.toml", {"scan": {"scan_id": 4, "project_id": 2}}
+        )
+        self.assertIsNone(read_scan_record(self.path))
+
+
+class TestIngestResult(unittest.TestCase):
+    """Test the ingest throughput."""
+
+    def test_rows_per_second(self) -> None:
+        """Test the throughput is the rows over the time taken."""
+
+        self.assertEqual(2000, IngestResult(1000, 0.5).rows_per_second)
+        self.assertEqual(0, IngestResult(0, 0).rows_per_second)
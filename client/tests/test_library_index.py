@@ -0,0 +1,134 @@
+"""
+Test the persistent library index.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from client import settings
+from client.library import LibraryIndex
+from client.runners.generic import GenericRunner
+from client.utils.indexer import scan_tree
+
+
+class TestLibraryIndex(unittest.TestCase):
+    """Test the LibraryIndex class."""
+
+    def setUp(self) -> None:
+        """Create a library with a scan, and an index in a temporary directory."""
+
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.scan_dir = self.tmp_dir / "library" / "1" / "2"
+        (self.scan_dir / "raw" / "sub").mkdir(parents=True)
+        for i, rel_path in enumerate(("raw/a.tif", "raw/sub/b.tif", "raw/sub/c.tif")):
+            (self.scan_dir / rel_path).write_bytes(b"x" * (i + 1))
+        self.make_old()
+        self.index = LibraryIndex(self.tmp_dir / "index.sqlite3")
+
+    def tearDown(self) -> None:
+        """Close the index and delete the library."""
+
+        self.index.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def make_old(self) -> None:
+        """Date the directories in the library, so the index trusts their times."""
+
+        for root, _, _ in os.walk(self.tmp_dir / "library"):
+            os.utime(root, ns=(0, 0))
+
+    def test_refresh(self) -> None:
+        """Test a refreshed index lists the same files as a scan of the tree."""
+
+        for _ in range(2):
+            self.assertEqual(
+                scan_tree(self.scan_dir).size_by_path(),
+                self.index.refresh(self.scan_dir).size_by_path(),
+            )
+
+    def test_unchanged_directory(self) -> None:
+        """Test a directory is not scanned again if it has not been modified."""
+
+        self.index.refresh(self.scan_dir)
+
+        # Rewriting a file does not change the modification time of its directory
+        (self.scan_dir / "raw" / "a.tif").write_bytes(b"rewritten")
+        self.make_old()
+        sizes = self.index.refresh(self.scan_dir).size_by_path()
+        self.assertEqual(1, sizes[os.path.join("raw", "a.tif")])
+
+    def test_fresh_index_tree(self) -> None:
+        """Test runners asking for a fresh index see files rewritten in place."""
+
+        runner = GenericRunner(func=lambda: None)
+        with mock.patch.object(settings, "library_index", self.tmp_dir / "runner.db"):
+            runner.index_tree(self.scan_dir)
+            (self.scan_dir / "raw" / "a.tif").write_bytes(b"rewritten")
+            self.make_old()
+            rel_path = os.path.join("raw", "a.tif")
+            self.assertEqual(
+                1, runner.index_tree(self.scan_dir).size_by_path()[rel_path]
+            )
+            self.assertEqual(
+                9, runner.index_tree(self.scan_dir, fresh=True).size_by_path()[rel_path]
+            )
+
+    def test_changed_directory(self) -> None:
+        """Test added and removed files and directories are picked up."""
+
+        self.index.refresh(self.scan_dir)
+
+        (self.scan_dir / "raw" / "new.tif").write_bytes(b"new")
+        shutil.rmtree(self.scan_dir / "raw" / "sub")
+        table = self.index.refresh(self.scan_dir)
+        self.assertEqual(
+            {os.path.join("raw", "a.tif"): 1, os.path.join("raw", "new.tif"): 3},
+            table.size_by_path(),
+        )
+
+    def test_nested_refresh(self) -> None:
+        """Test refreshing a scan after its project keeps both up to date."""
+
+        self.index.refresh(self.scan_dir.parent)
+        self.assertEqual(3, len(self.index.refresh(self.scan_dir)))
+
+        (self.scan_dir / "raw" / "new.tif").write_bytes(b"new")
+        self.assertEqual(4, len(self.index.refresh(self.scan_dir.parent)))
+
+    def test_missing_root(self) -> None:
+        """Test a missing directory has no files."""
+
+        self.index.refresh(self.scan_dir)
+        shutil.rmtree(self.scan_dir)
+        self.assertEqual(0, len(self.index.refresh(self.scan_dir)))
+
+    def test_unlocked_while_reporting(self) -> None:
+        """Test the index can be written by others while a refresh reports progress."""
+
+        def report(files: int, size: int) -> None:
+            """Write to the index from another connection, without waiting."""
+
+            conn = sqlite3.connect(self.tmp_dir / "index.sqlite3", timeout=0)
+            try:
+                with conn:
+                    conn.execute("DELETE FROM file WHERE name = 'none'")
+            finally:
+                conn.close()
+
+        self.index.refresh(self.scan_dir, report, report_every=1)
+
+    def test_recorded(self) -> None:
+        """Test the recorded files are those of the last refresh, without a refresh."""
+
+        self.assertIsNone(self.index.recorded(self.scan_dir))
+        self.index.refresh(self.scan_dir.parent)
+        (self.scan_dir / "raw" / "new.tif").write_bytes(b"new")
+        self.assertEqual(
+            scan_tree(self.scan_dir).size_by_path().keys()
+            - {os.path.join("raw", "new.tif")},
+            self.index.recorded(self.scan_dir).size_by_path().keys(),
+        )
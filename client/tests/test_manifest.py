@@ -0,0 +1,130 @@
+"""
+Test the scan checksum manifest and transfer journal.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from client.library import Manifest, TransferJournal
+from client.utils.hash import hash_in_chunks
+
+TEST_DIR = Path(__file__).parent
+
+
+class TestManifest(unittest.TestCase):
+    """Test the Manifest class."""
+
+    def setUp(self) -> None:
+        """Create a scan directory with a file in a subdirectory."""
+
+        self.scan_dir = Path(tempfile.mkdtemp())
+        self.file = self.scan_dir / "raw" / "copy_me.txt"
+        self.file.parent.mkdir()
+        self.source = self.scan_dir / "source.txt"
+        shutil.copy(TEST_DIR / "text_files" / "copy_me.txt", self.source)
+        shutil.copy(self.source, self.file)
+
+    def tearDown(self) -> None:
+        """Delete the scan directory."""
+
+        shutil.rmtree(self.scan_dir)
+
+    def test_save_and_load(self) -> None:
+        """Test a recorded hash survives a round trip through the manifest file."""
+
+        manifest = Manifest.load(self.scan_dir)
+        self.assertEqual(0, len(manifest))
+        manifest.record(self.file, os.stat(self.file), hash_in_chunks(self.file))
+        manifest.save()
+
+        loaded = Manifest.load(self.scan_dir)
+        self.assertEqual(["raw/copy_me.txt"], list(loaded))
+        self.assertEqual(
+            hash_in_chunks(self.file), loaded.lookup(self.file, os.stat(self.file))
+        )
+
+    def test_changed_file(self) -> None:
+        """Test the recorded hash is not used once the file has changed."""
+
+        manifest = Manifest(self.scan_dir)
+        manifest.record(self.file, os.stat(self.file), hash_in_chunks(self.file))
+
+        with open(self.file, "a", encoding="utf-8") as f:
+            f.write("Changed!")
+        self.assertIsNone(manifest.lookup(self.file, os.stat(self.file)))
+
+    def test_damaged_manifest(self) -> None:
+        """Test a damaged manifest is treated as empty."""
+
+        manifest = Manifest(self.scan_dir)
+        manifest.path.parent.mkdir()
+        manifest.path.write_text("path\tsize\tmtime_ns\tsha3_384\nraw\tbad\n")
+        self.assertEqual(0, len(Manifest.load(self.scan_dir)))
+
+
+class TestTransferJournal(unittest.TestCase):
+    """Test the TransferJournal class."""
+
+    def setUp(self) -> None:
+        """Create a scan directory with a file in a subdirectory."""
+
+        self.scan_dir = Path(tempfile.mkdtemp())
+        self.file = self.scan_dir / "raw" / "copy_me.txt"
+        self.file.parent.mkdir()
+        self.source = self.scan_dir / "source.txt"
+        shutil.copy(TEST_DIR / "text_files" / "copy_me.txt", self.source)
+        shutil.copy(self.source, self.file)
+
+    def tearDown(self) -> None:
+        """Delete the scan directory."""
+
+        shutil.rmtree(self.scan_dir)
+
+    def test_resume(self) -> None:
+        """Test files recorded before an interruption are complete when reopened."""
+
+        size = os.stat(self.file).st_size
+        with TransferJournal.open(self.scan_dir) as journal:
+            self.assertIsNone(journal.get(self.file, self.source))
+            journal.record(
+                self.file, size, hash_in_chunks(self.file), os.stat(self.source)
+            )
+        # Simulate a transfer killed while writing a line
+        with open(journal.path, "a", encoding="utf-8") as f:
+            f.write("raw/torn")
+
+        with TransferJournal.open(self.scan_dir) as journal:
+            entry = journal.get(self.file, self.source)
+            self.assertIsNotNone(entry)
+            self.assertEqual(hash_in_chunks(self.file), entry.hash)
+
+            # A file that no longer has the recorded size must be copied again
+            with open(self.file, "a", encoding="utf-8") as f:
+                f.write("Changed!")
+            self.assertIsNone(journal.get(self.file, self.source))
+
+    def test_source_changed(self) -> None:
+        """Test a file is copied again if its source was rewritten since the copy."""
+
+        with TransferJournal.open(self.scan_dir) as journal:
+            journal.record(
+                self.file, os.stat(self.file).st_size, None, os.stat(self.source)
+            )
+        # Rewrite the source in place, keeping its size
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        with TransferJournal.open(self.scan_dir) as journal:
+            self.assertIsNone(journal.get(self.file, self.source))
+
+    def test_complete(self) -> None:
+        """Test the journal is deleted once the transfer is complete."""
+
+        journal = TransferJournal.open(self.scan_dir)
+        journal.record(
+            self.file, os.stat(self.file).st_size, None, os.stat(self.source)
+        )
+        journal.complete()
+        self.assertFalse(journal.path.exists())
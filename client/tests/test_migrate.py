@@ -0,0 +1,58 @@
+"""
+Test finding and splitting schema migrations.
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from client.db.migrate import MIGRATIONS_DIR, find_migrations, split_statements
+
+
+class TestFindMigrations(unittest.TestCase):
+    """Test finding the migrations in a directory."""
+
+    def test_order(self) -> None:
+        """Test migrations are sorted by version, not by name."""
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("10_later.sql", "2_earlier.sql", "notes.txt"):
+                (Path(tmp) / name).touch()
+            migrations = find_migrations(Path(tmp))
+        self.assertEqual([(2, "earlier"), (10, "later")], [m[:2] for m in migrations])
+
+    def test_invalid(self) -> None:
+        """Test badly named and duplicate migrations are refused."""
+
+        for names in (("indexes.sql",), ("1_indexes.sql", "01_search.sql")):
+            with tempfile.TemporaryDirectory() as tmp:
+                for name in names:
+                    (Path(tmp) / name).touch()
+                with self.assertRaises(ValueError):
+                    find_migrations(Path(tmp))
+
+    def test_shipped(self) -> None:
+        """Test the shipped migrations are numbered from one without gaps."""
+
+        versions = [m.version for m in find_migrations(MIGRATIONS_DIR)]
+        self.assertEqual(list(range(1, len(versions) + 1)), versions)
+
+
+class TestSplitStatements(unittest.TestCase):
+    """Test splitting SQL into statements."""
+
+    def test_split(self) -> None:
+        """Test statements are split on semicolons, leaving out comments."""
+
+        text = "/* header; */\ncreate table a (b int); -- trailing; comment\n\nselect 1"
+        self.assertEqual(["create table a (b int)", "select 1"], split_statements(text))
+
+    def test_quoted(self) -> None:
+        """Test semicolons in strings, identifiers and function bodies are kept."""
+
+        statements = [
+            "select 'a;b', 'it''s;'",
+            'select 1 as "x;y"',
+            "create function f() returns int as $body$ select 1; $body$ language sql",
+            "do $$ begin perform 1; end $$",
+        ]
+        self.assertEqual(statements, split_statements(";\n".join(statements) + ";"))
@@ -0,0 +1,82 @@
+"""
+Test the shared database connection pools.
+"""
+import asyncio
+import unittest
+from contextlib import asynccontextmanager
+from typing import Any
+from unittest import mock
+
+from client import settings
+from client.db import AsyncDatabaseView, async_pool, get_pool, pool
+from client.db.async_pool import get_async_pool, submit
+
+
+class FakeAsyncPool:
+    """Stand-in for psycopg_pool.AsyncConnectionPool, so no server is needed."""
+
+    def __init__(self, conn_str: str, **kwargs: Any) -> None:
+        self.conn_str: str = conn_str
+        self.kwargs: dict[str, Any] = kwargs
+        self.opened: int = 0
+        self.borrowed: int = 0
+
+    @staticmethod
+    async def check_connection(conn: Any) -> None:
+        pass
+
+    async def open(self) -> None:
+        """Yield to the event loop while opening, as the real pool does."""
+
+        await asyncio.sleep(0.01)
+        self.opened += 1
+
+    async def close(self) -> None:
+        pass
+
+    @asynccontextmanager
+    async def connection(self) -> Any:
+        """Lend a fake connection whose queries return one row."""
+
+        self.borrowed += 1
+        conn = mock.Mock()
+        cur = mock.Mock()
+        conn.execute = mock.AsyncMock(return_value=cur)
+        cur.fetchall = mock.AsyncMock(return_value=[(1,)])
+        yield conn
+
+
+class TestGetPool(unittest.TestCase):
+    """Test each database gets one shared pool."""
+
+    def test_get_pool(self) -> None:
+        """Test the pool is created once per database, sized by the settings."""
+
+        with mock.patch.dict(pool._pools, clear=True), mock.patch.object(
+            pool, "ConnectionPool", side_effect=lambda *args, **kwargs: mock.Mock()
+        ) as pool_class:
+            self.assertIs(get_pool("dbname=a"), get_pool("dbname=a"))
+            self.assertIsNot(get_pool("dbname=a"), get_pool("dbname=b"))
+        self.assertEqual(2, pool_class.call_count)
+        kwargs: dict[str, Any] = pool_class.call_args.kwargs
+        self.assertEqual(settings.get_db_pool_min_size(), kwargs["min_size"])
+        self.assertEqual(settings.get_db_pool_max_size(), kwargs["max_size"])
+
+    def test_get_async_pool(self) -> None:
+        """Test concurrent views of a database share one pool, opened once."""
+
+        async def query() -> list[Any]:
+            async def view_projects() -> list[Any]:
+                async with AsyncDatabaseView("dbname=a") as view:
+                    return await view.get_projects()
+
+            return await asyncio.gather(view_projects(), view_projects())
+
+        with mock.patch.dict(async_pool._pools, clear=True), mock.patch.object(
+            async_pool, "AsyncConnectionPool", FakeAsyncPool
+        ):
+            self.assertEqual([[(1,)], [(1,)]], submit(query()).result(5))
+            shared = submit(get_async_pool("dbname=a")).result(5)
+        self.assertEqual(1, shared.opened)
+        self.assertEqual(2, shared.borrowed)
+        self.assertEqual(0, shared.kwargs["min_size"])
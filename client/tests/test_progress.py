@@ -0,0 +1,73 @@
+"""
+Test coalescing progress and estimating the time remaining.
+"""
+import time
+import unittest
+
+from client.runners.progress import Progress, ProgressTracker, duration_fmt
+
+
+class TestProgressTracker(unittest.TestCase):
+    """Test the progress tracker."""
+
+    def setUp(self) -> None:
+        self.reports: list[tuple[int, Progress]] = []
+        self.tracker = ProgressTracker(
+            lambda files, progress: self.reports.append((files, progress)),
+            interval=0.05,
+        )
+        self.tracker.set_totals(1000, 1000)
+
+    def test_throttled(self) -> None:
+        """Test many small updates are coalesced into a few reports."""
+
+        for _ in range(1000):
+            self.tracker.add(1, 1)
+        self.tracker.flush()
+
+        self.assertLess(len(self.reports), 10)
+        # No file is lost by coalescing
+        self.assertEqual(1000, sum(files for files, _ in self.reports))
+        self.assertEqual(1.0, self.reports[-1][1].fraction)
+
+    def test_rate_and_remaining(self) -> None:
+        """Test the throughput is measured from bytes transferred."""
+
+        self.tracker.add(0, 100)
+        time.sleep(0.1)
+        self.tracker.add(1, 100)
+        progress: Progress = self.reports[-1][1]
+
+        self.assertGreater(progress.rate, 0)
+        self.assertIsNotNone(progress.remaining)
+        self.assertAlmostEqual(800 / progress.rate, progress.remaining)
+        self.assertIn("/s", progress.describe())
+
+    def test_skip_not_counted_in_rate(self) -> None:
+        """Test skipped bytes count towards the fraction done but not the throughput."""
+
+        time.sleep(0.1)
+        self.tracker.skip(500, 500)
+        progress: Progress = self.reports[-1][1]
+
+        self.assertEqual(0.5, progress.fraction)
+        self.assertEqual(0, progress.rate)
+        self.assertIsNone(progress.remaining)
+        self.assertEqual("", progress.describe())
+
+    def test_fraction_without_sizes(self) -> None:
+        """Test the fraction is counted in files if no sizes are known."""
+
+        self.assertEqual(0.25, Progress(1, 0, 4, 0, 0, None).fraction)
+        self.assertEqual(0.0, Progress(0, 0, 0, 0, 0, None).fraction)
+
+
+class TestDurationFmt(unittest.TestCase):
+    """Test formatting durations."""
+
+    def test_duration_fmt(self) -> None:
+        """Test durations are formatted in the largest units that fit."""
+
+        self.assertEqual("42 s", duration_fmt(42))
+        self.assertEqual("2 min 5 s", duration_fmt(125))
+        self.assertEqual("1 h 5 min", duration_fmt(3900))
@@ -0,0 +1,70 @@
+"""
+Test the select statement builder.
+"""
+import unittest
+
+from client.db.query import Select, like_pattern
+
+
+class TestSelect(unittest.TestCase):
+    """Test building select statements."""
+
+    def test_params(self) -> None:
+        """Test values are bound as parameters in the order of their placeholders."""
+
+        query = (
+            Select("scan", ("scan_id", "scan_name"))
+            .where("project_id", 1)
+            .search("50%")
+            .where_any("instrument_id", (1, 2))
+            .order_by("scan_name", descending=True)
+            .limit(10)
+        )
+        _, params = query.query()
+        self.assertEqual((1, r"%50\%%", r"%50\%%", [1, 2], 10), params)
+
+    def test_count_ignores_limit(self) -> None:
+        """Test counting binds the same values, without the limit."""
+
+        query = Select("project", ("project_id",)).where("project_id", 3).limit(5)
+        self.assertEqual((3,), query.count()[1])
+
+    def test_empty_search(self) -> None:
+        """Test an empty search selects every row."""
+
+        query = Select("user", ("user_id",))
+        self.assertEqual(query.query(), query.search("").query())
+
+    def test_invalid(self) -> None:
+        """Test values that would change the statement are refused."""
+
+        query = Select("scan", ("scan_id",))
+        with self.assertRaises(ValueError):
+            query.order_by("scan_name")
+        with self.assertRaises(ValueError):
+            query.where("scan_id", 1, operator="; drop table scan; --")
+        with self.assertRaises(ValueError):
+            Select("scan", ())
+
+    def test_after(self) -> None:
+        """Test paging after a row binds its sort keys, leaving the original alone."""
+
+        query = Select("scan", ("scan_id", "scan_name")).order_by(
+            "scan_name", descending=True
+        )
+        page = query.copy().order_by("scan_id").after((5, "b")).limit(10)
+        self.assertEqual(("b", "b", 5, 10), page.query()[1])
+        self.assertEqual((), query.query()[1])
+        self.assertEqual((("scan_name", True),), query.sort_keys)
+
+        # After a null, only nulls with a later tie breaker follow in ascending order
+        page = Select("scan", ("scan_id", "scan_name")).order_by("scan_name")
+        page.order_by("scan_id").after((5, None))
+        self.assertEqual((5,), page.query()[1])
+        with self.assertRaises(ValueError):
+            Select("scan", ("scan_id",)).after((1,))
+
+    def test_like_pattern(self) -> None:
+        """Test wildcards in the search text are matched literally."""
+
+        self.assertEqual(r"%a\_b\\c%", like_pattern(r"a_b\c"))
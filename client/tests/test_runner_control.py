@@ -0,0 +1,80 @@
+"""
+Test pausing, resuming and killing runners.
+"""
+import threading
+import time
+import unittest
+
+from client.runners.generic import GenericRunner, RunnerKilledException
+
+
+class CountingRunner(GenericRunner):
+    """Runner counting up until it is finished or killed."""
+
+    def __init__(self) -> None:
+        super().__init__(func=self.job)
+        self.count: int = 0
+        self.error: BaseException | None = None
+
+    def job(self) -> None:
+        """Count, passing a checkpoint each time."""
+
+        try:
+            while self.checkpoint():
+                self.count += 1
+                time.sleep(0.001)
+        except RunnerKilledException as exc:
+            self.error = exc
+
+
+class TestRunnerControl(unittest.TestCase):
+    """Test the control surface of GenericRunner."""
+
+    def setUp(self) -> None:
+        self.runner = CountingRunner()
+        self.thread = threading.Thread(target=self.runner.job)
+        self.thread.start()
+        time.sleep(0.05)
+
+    def tearDown(self) -> None:
+        self.runner.kill()
+        self.thread.join(5)
+
+    def test_pause_waits_without_spinning(self) -> None:
+        """Test a paused job stops working and uses no CPU until resumed."""
+
+        self.runner.pause()
+        time.sleep(0.05)
+        count: int = self.runner.count
+        cpu: float = time.process_time()
+        time.sleep(0.3)
+        self.assertLess(time.process_time() - cpu, 0.1)
+        self.assertEqual(count, self.runner.count)
+
+        self.runner.resume()
+        time.sleep(0.05)
+        self.assertGreater(self.runner.count, count)
+
+    def test_kill_while_paused(self) -> None:
+        """Test killing a paused job wakes it and stops it."""
+
+        self.runner.pause()
+        self.runner.kill()
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertIsInstance(self.runner.error, RunnerKilledException)
+        self.assertTrue(self.runner.cancel_token.cancelled)
+
+        # A killed runner cannot be paused again, so its checkpoints never block
+        self.runner.pause()
+        with self.assertRaises(RunnerKilledException):
+            self.runner.checkpoint()
+
+    def test_finish_while_paused(self) -> None:
+        """Test finishing a paused job wakes it and ends it without an error."""
+
+        self.runner.pause()
+        self.runner.finish()
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertIsNone(self.runner.error)
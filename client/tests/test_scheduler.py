@@ -0,0 +1,120 @@
+"""
+Test the job scheduler's priorities and resource limits.
+"""
+import tempfile
+import threading
+import unittest
+
+from client.runners.generic import GenericRunner, Priority
+from client.runners.scheduler import JobScheduler, library_resources
+
+
+class BlockingRunner(GenericRunner):
+    """Runner that records when it starts, then waits until it is released."""
+
+    def __init__(
+        self,
+        name: str,
+        started: list[str],
+        priority: Priority = Priority.BULK,
+        resources: tuple[str, ...] = (),
+    ) -> None:
+        super().__init__(func=self.job)
+        self.description = name
+        self.priority = priority
+        self.resources = resources
+        self.started: list[str] = started
+        self.release: threading.Event = threading.Event()
+        self.running: threading.Event = threading.Event()
+
+    def job(self) -> None:
+        """Record the start, and wait to be released or killed."""
+
+        self.started.append(self.description)
+        self.running.set()
+        while not self.release.wait(0.01):
+            self.checkpoint()
+
+
+class TestJobScheduler(unittest.TestCase):
+    """Test when the scheduler starts jobs."""
+
+    def setUp(self) -> None:
+        self.scheduler = JobScheduler(3, {"disk": 1})
+        self.started: list[str] = []
+        self.runners: list[BlockingRunner] = []
+
+    def tearDown(self) -> None:
+        for runner in self.runners:
+            runner.release.set()
+        self.assertTrue(self.scheduler.wait(5))
+
+    def submit(self, name: str, *args) -> BlockingRunner:
+        """Submit a blocking runner."""
+
+        runner: BlockingRunner = BlockingRunner(name, self.started, *args)
+        self.runners.append(runner)
+        self.scheduler.submit(runner)
+        return runner
+
+    def test_resource_limit(self) -> None:
+        """Test jobs using a busy disk wait, while jobs using another disk run."""
+
+        first: BlockingRunner = self.submit("first", Priority.BULK, ("disk:1",))
+        second: BlockingRunner = self.submit("second", Priority.BULK, ("disk:1",))
+        other: BlockingRunner = self.submit("other", Priority.BULK, ("disk:2",))
+        self.assertTrue(first.running.wait(5))
+        self.assertTrue(other.running.wait(5))
+        self.assertFalse(second.running.wait(0.1))
+        self.assertEqual(
+            [True, True, False], [job.running for job in self.scheduler.jobs()]
+        )
+
+        first.release.set()
+        self.assertTrue(second.running.wait(5))
+
+    def test_interactive_not_blocked(self) -> None:
+        """Test bulk jobs leave a worker free for interactive jobs, which go first."""
+
+        bulk: list[BlockingRunner] = [
+            self.submit(f"bulk {i}", Priority.BULK) for i in range(3)
+        ]
+        self.assertTrue(bulk[0].running.wait(5))
+        self.assertTrue(bulk[1].running.wait(5))
+        self.assertFalse(bulk[2].running.wait(0.1))
+
+        interactive: BlockingRunner = self.submit("load", Priority.INTERACTIVE)
+        self.assertTrue(interactive.running.wait(5))
+
+        # Queued jobs start in order of priority
+        normal: BlockingRunner = self.submit("normal", Priority.NORMAL)
+        bulk[0].release.set()
+        self.assertTrue(normal.running.wait(5))
+        self.assertFalse(bulk[2].running.is_set())
+
+    def test_kill_queued(self) -> None:
+        """Test a killed job leaves the queue at once, so it can wind down."""
+
+        self.submit("first", Priority.BULK, ("disk:1",))
+        queued: BlockingRunner = self.submit("queued", Priority.BULK, ("disk:1",))
+        self.assertFalse(queued.running.wait(0.1))
+
+        queued.kill()
+        self.assertTrue(queued.running.wait(5))
+        self.assertEqual(["first", "queued"], self.started)
+
+
+class TestLibraryResources(unittest.TestCase):
+    """Test the resources of jobs using libraries."""
+
+    def test_library_resources(self) -> None:
+        """Test each library is a resource, and libraries on one disk share it."""
+
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory(
+            dir=first
+        ) as second:
+            resources: tuple[str, ...] = library_resources(first, second)
+        self.assertEqual(3, len(resources))
+        self.assertEqual(
+            ["library", "disk", "library"], [res.split(":")[0] for res in resources]
+        )
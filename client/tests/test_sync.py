@@ -0,0 +1,79 @@
+"""
+Test the incremental sync between libraries.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from client.library import Manifest
+from client.utils.hash import hash_in_chunks
+from client.utils.sync import needs_copy, plan_sync
+
+
+class TestSync(unittest.TestCase):
+    """Test functions in sync.py utils file."""
+
+    def setUp(self) -> None:
+        """Create a source and a destination scan holding the same file."""
+
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.src = self.tmp_dir / "source" / "raw" / "slice.tif"
+        self.dest = self.tmp_dir / "dest" / "raw" / "slice.tif"
+        self.src.parent.mkdir(parents=True)
+        self.dest.parent.mkdir(parents=True)
+        self.src.write_bytes(os.urandom(1000))
+        shutil.copy2(self.src, self.dest)
+
+    def tearDown(self) -> None:
+        """Delete the scans."""
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_needs_copy(self) -> None:
+        """Test only new or changed files are copied."""
+
+        self.assertFalse(needs_copy(self.src, self.dest))
+        self.assertTrue(needs_copy(self.src, self.dest.with_name("new.tif")))
+
+        # A changed size is always copied
+        with open(self.src, "ab") as f:
+            f.write(b"more")
+        self.assertTrue(needs_copy(self.src, self.dest))
+
+    def test_needs_copy_manifest(self) -> None:
+        """Test a touched file is skipped if the manifests show it is unchanged."""
+
+        os.utime(self.dest, ns=(0, 0))
+        self.assertTrue(needs_copy(self.src, self.dest))
+
+        source_manifest = Manifest(self.tmp_dir / "source")
+        dest_manifest = Manifest(self.tmp_dir / "dest")
+        for manifest, file in ((source_manifest, self.src), (dest_manifest, self.dest)):
+            manifest.record(file, os.stat(file), hash_in_chunks(file))
+        self.assertFalse(
+            needs_copy(self.src, self.dest, source_manifest, dest_manifest)
+        )
+
+    def test_plan_sync(self) -> None:
+        """Test the plan lists new files and, if asked, files to delete."""
+
+        new = self.src.with_name("new.tif")
+        new.write_bytes(b"new")
+        old = self.dest.with_name("old.tif")
+        old.write_bytes(b"old")
+        files = [
+            ((src, self.dest.parent / src.name), src.stat().st_size)
+            for src in (self.src, new)
+        ]
+
+        plan = plan_sync(files, self.dest.parent)
+        self.assertEqual([files[1]], plan.copy)
+        self.assertEqual(1, plan.unchanged)
+        self.assertEqual([], plan.delete)
+        self.assertEqual(3, plan.copy_bytes)
+
+        plan = plan_sync(files, self.dest.parent, delete=True)
+        self.assertEqual([(old, 3)], plan.delete)
+        self.assertIn("1 to delete", plan.report())
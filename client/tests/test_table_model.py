@@ -0,0 +1,93 @@
+"""
+Test the lazily loaded table model.
+"""
+import unittest
+from typing import Any
+
+from PySide6.QtCore import QModelIndex, Qt
+
+from client.widgets.table import TableModel
+
+
+class FakeCursor:
+    """Stand-in for a cursor over a list of rows."""
+
+    def __init__(self, rows: list[tuple[Any, ...]]) -> None:
+        self.rows: list[tuple[Any, ...]] = rows
+        self.fetched: int = 0
+        self.exhausted: bool = False
+
+    def fetch(self, size: int) -> list[tuple[Any, ...]]:
+        """Fetch the next page of rows."""
+
+        page: list[tuple[Any, ...]] = self.rows[self.fetched : self.fetched + size]
+        self.fetched += len(page)
+        if len(page) < size:
+            self.close()
+        return page
+
+    def cancel(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.exhausted = True
+
+
+class TestTableModel(unittest.TestCase):
+    """Test the TableModel class."""
+
+    def setUp(self) -> None:
+        """Create a model over a cursor of 25 rows, loading 10 at a time."""
+
+        self.cursor = FakeCursor([(i, f"scan {i}") for i in range(25)])
+        # Run each page's runner as soon as it is started, rather than on a pool
+        self.started: list[Any] = []
+        self.model = TableModel(
+            [],
+            ("scan_id", "title"),
+            cursor=self.cursor,
+            total_rows=25,
+            page_size=10,
+            start=self.started.append,
+        )
+
+    def run_page(self) -> None:
+        """Run the runner fetching the page requested."""
+
+        self.started[-1].run()
+
+    def test_fetch_more(self) -> None:
+        """Test rows are loaded a page at a time until the cursor is exhausted."""
+
+        loaded: list[tuple[int, int]] = []
+        self.model.rows_loaded.connect(lambda *counts: loaded.append(counts))
+        self.assertEqual(0, self.model.rowCount())
+        self.assertEqual(2, self.model.columnCount())
+
+        while self.model.canFetchMore(QModelIndex()):
+            self.model.fetchMore(QModelIndex())
+            # No more pages are requested while a page is loading
+            self.assertFalse(self.model.canFetchMore(QModelIndex()))
+            self.run_page()
+        self.assertEqual(3, len(self.started))
+        self.assertEqual([(10, 25), (20, 25), (25, 25)], loaded)
+        self.assertEqual(25, self.model.rowCount())
+        self.assertEqual((24, "scan 24"), self.model.get_row_data(24))
+        self.assertEqual(
+            "scan 3",
+            self.model.data(self.model.index(3, 1), Qt.ItemDataRole.DisplayRole),
+        )
+
+    def test_close(self) -> None:
+        """Test closing the model releases the cursor and stops loading."""
+
+        self.model.fetchMore(QModelIndex())
+        self.run_page()
+        self.model.fetchMore(QModelIndex())
+        self.model.close()
+        self.assertTrue(self.cursor.exhausted)
+        self.assertFalse(self.model.canFetchMore(QModelIndex()))
+
+        # A page loading when the model was closed is discarded
+        self.run_page()
+        self.assertEqual(10, self.model.rowCount())
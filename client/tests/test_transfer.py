@@ -0,0 +1,90 @@
+"""
+Test the file transfer backends.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pytest
+
+from client.utils.hash import hash_in_chunks
+from client.utils.transfer import (
+    BACKENDS,
+    batch_files,
+    copy_file,
+    copy_item,
+    partial_path,
+)
+
+
+class TestTransfer(unittest.TestCase):
+    """Test functions in transfer.py utils file."""
+
+    def setUp(self) -> None:
+        """Create a directory with a file larger than the buffer."""
+
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        self.src = self.tmp_dir / "src" / "data.bin"
+        self.src.parent.mkdir()
+        self.src.write_bytes(os.urandom(3 * 1048576 + 123))
+
+    def tearDown(self) -> None:
+        """Delete the directory."""
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_copy_file(self) -> None:
+        """Test each backend copies the file or falls back to one that can."""
+
+        for backend in ("auto", *BACKENDS):
+            dest = self.tmp_dir / f"{backend}.bin"
+            result = copy_file(self.src, dest, backend)
+            self.assertIn(result.method, (backend, "buffered", *BACKENDS))
+            self.assertEqual(self.src.stat().st_size, result.size)
+            self.assertIsNone(result.hash)
+            self.assertEqual(self.src.read_bytes(), dest.read_bytes())
+
+        with pytest.raises(ValueError):
+            copy_file(self.src, self.tmp_dir / "bad.bin", "carrier_pigeon")
+
+    def test_copy_file_with_hash(self) -> None:
+        """Test the hash is returned when it is wanted."""
+
+        result = copy_file(self.src, self.tmp_dir / "hashed.bin", want_hash=True)
+        self.assertEqual(hash_in_chunks(self.src), result.hash)
+
+    def test_copy_file_atomic(self) -> None:
+        """Test an atomic copy leaves no partial file behind, even if it fails."""
+
+        dest = self.tmp_dir / "atomic.bin"
+        copy_file(self.src, dest, atomic=True)
+        self.assertEqual(self.src.read_bytes(), dest.read_bytes())
+        self.assertFalse(Path(partial_path(dest)).exists())
+
+        with pytest.raises(FileNotFoundError):
+            copy_file(self.tmp_dir / "missing.bin", dest, atomic=True)
+        self.assertEqual(["atomic.bin", "src"], sorted(os.listdir(self.tmp_dir)))
+
+    def test_copy_item(self) -> None:
+        """Test a directory is copied with its structure."""
+
+        (self.src.parent / "sub").mkdir()
+        shutil.copy(self.src, self.src.parent / "sub" / "more.bin")
+
+        methods = copy_item(self.src.parent, self.tmp_dir / "dest")
+        self.assertEqual(2, sum(methods.values()))
+        self.assertTrue((self.tmp_dir / "dest" / "src" / "sub" / "more.bin").is_file())
+
+        # Existing directories are skipped
+        self.assertEqual(
+            0, sum(copy_item(self.src.parent, self.tmp_dir / "dest").values())
+        )
+
+    def test_batch_files(self) -> None:
+        """Test large files are batched alone and small files are grouped."""
+
+        files = [("a", 1), ("b", 100), ("c", 2), ("d", 3), ("e", 4), ("f", 5)]
+        batches = list(batch_files(files, small_file_size=50, batch_size=6))
+        self.assertEqual([["b"], ["a", "c", "d"], ["e", "f"]], batches)
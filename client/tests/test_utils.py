@@ -3,6 +3,7 @@ Test utils module.
 """
 import shutil
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from os import remove
 from pathlib import Path
 from shutil import rmtree
@@ -10,8 +11,15 @@ from shutil import rmtree
 import pytest
 import tomli_w
 
-from client.utils.file import create_dir, find_and_move, move_item
-from client.utils.hash import hash_in_chunks
+from client.utils.file import (
+    copy_and_hash,
+    create_dir,
+    find_and_move,
+    move_item,
+    size_fmt,
+)
+from client.utils.hash import HashEngine, hash_in_chunks
+from client.utils.pool import ordered_map, unordered_map
 from client.utils.toml import create_toml, load_toml, update_toml
 
 TEST_DIR = Path(__file__).parent
@@ -191,6 +199,32 @@ class TestFile(unittest.TestCase):
         # Move files back after test
         find_and_move("*.txt", target_dir, source_dir)
 
+    def test_copy_and_hash(self) -> None:
+        """Test function that copies a file and returns the hash of its contents."""
+
+        source = TEST_DIR / Path("text_files/copy_me.txt")
+        dest = TEST_DIR / Path("example_directory/copy_me.txt")
+        assert not dest.is_file()
+
+        hash_value: str = copy_and_hash(source, dest)
+
+        self.assertEqual(source.read_bytes(), dest.read_bytes())
+        self.assertEqual(hash_in_chunks(source), hash_value)
+
+        # Delete file after test
+        dest.unlink()
+
+    def test_size_fmt(self) -> None:
+        """Test sizes are shown in the largest unit they reach, including gigabytes."""
+
+        self.assertEqual("512.00 B", size_fmt(512))
+        self.assertEqual("1.50 KB", size_fmt(1536))
+        self.assertEqual("2.0 GB", size_fmt(2 * 1024**3, dec_places=1))
+        self.assertEqual("1.00 TB", size_fmt(1024**4))
+        self.assertEqual("2048.00 PB", size_fmt(2 * 1024**6))
+        with self.assertRaises(ValueError):
+            size_fmt(-1)
+
 
 class TestTOML(unittest.TestCase):
     """Test functions in toml.py utils file."""
@@ -244,3 +278,62 @@ class TestHash(unittest.TestCase):
             "47d7f25678e02dd969b7699a2f0309128bc2dbc6c09daa64c135cf9af7630883511a073db91c10c4694846db8c77d63d",  # noqa
             hash_value,
         )
+
+    def test_hash_engine(self) -> None:
+        """Test the engine hashes pairs of files in order and flags missing files."""
+
+        copy_me: Path = TEST_DIR / Path("text_files/copy_me.txt")
+        move_me: Path = TEST_DIR / Path("text_files/move_me.txt")
+        missing: Path = TEST_DIR / Path("text_files/missing.txt")
+        pairs = [(copy_me, move_me), (move_me, missing), (copy_me, copy_me)]
+
+        with HashEngine(workers=2) as engine:
+            results = list(engine.hash_pairs(pairs))
+
+        self.assertEqual(pairs, [pair for pair, _, _ in results])
+        self.assertEqual(hash_in_chunks(copy_me), results[0][1])
+        self.assertEqual(hash_in_chunks(move_me), results[0][2])
+        self.assertIsNone(results[1][2])
+        self.assertEqual(results[2][1], results[2][2])
+
+    def test_hash_pair_shards(self) -> None:
+        """Test a process pool hashes shards of pairs, yielding every pair once."""
+
+        copy_me: Path = TEST_DIR / Path("text_files/copy_me.txt")
+        move_me: Path = TEST_DIR / Path("text_files/move_me.txt")
+        missing: Path = TEST_DIR / Path("text_files/missing.txt")
+        pairs = [(copy_me, move_me), (move_me, missing), (copy_me, copy_me)]
+
+        with HashEngine(workers=2, executor="process") as engine:
+            results = list(engine.hash_pair_shards((pair, 1) for pair in pairs))
+
+        by_pair = {pair: (first, second) for pair, first, second in results}
+        self.assertEqual(set(pairs), set(by_pair))
+        self.assertEqual(
+            (hash_in_chunks(copy_me), hash_in_chunks(move_me)),
+            by_pair[(copy_me, move_me)],
+        )
+        self.assertIsNone(by_pair[(move_me, missing)][1])
+
+
+class TestPool(unittest.TestCase):
+    """Test functions in pool.py utils file."""
+
+    def test_ordered_map(self) -> None:
+        """Test results are yielded in order regardless of the window size."""
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for window in (1, 3, 100):
+                results = list(ordered_map(executor, abs, range(-10, 0), window))
+                self.assertEqual([(i, -i) for i in range(-10, 0)], results)
+
+            with pytest.raises(ValueError):
+                list(ordered_map(executor, abs, range(3), 0))
+
+    def test_unordered_map(self) -> None:
+        """Test every result is yielded, whatever order the tasks finish in."""
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for window in (1, 3, 100):
+                results = list(unordered_map(executor, abs, range(-10, 0), window))
+                self.assertEqual([(i, -i) for i in range(-10, 0)], sorted(results))
@@ -1,11 +1,17 @@
 """
 Common file operation methods.
 """
+from __future__ import annotations
 
 import logging
 import os
 import shutil
+from hashlib import sha3_384
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
 
 
 def create_dir(path: Path | str) -> None:
@@ -42,15 +48,13 @@ def move_item(item: Path, dest_dir: Path, keep_original: bool = True) -> None:
 
     item_dest: Path = dest_dir / item.name
 
-    print(item_dest)
-
     try:
         # Check file or directory is a file or directory, respectively
         if item.is_file():
-            print("File")
+            logging.debug("Copying file to %s", item_dest)
             shutil.copy(item, item_dest)
         elif item.is_dir():
-            print("Copying directory")
+            logging.debug("Copying directory to %s", item_dest)
             shutil.copytree(item, item_dest)
         else:
             raise RuntimeError("Item is not a file or directory.")
@@ -67,6 +71,56 @@ def move_item(item: Path, dest_dir: Path, keep_original: bool = True) -> None:
         logging.info("File already exists at %s, skipping", item_dest)
 
 
+def copy_and_hash(
+    src: Path | str,
+    dest: Path | str,
+    progress: Callable[[int], None] | None = None,
+) -> str:
+    """Copy a file and return the SHA3-384 hash of the bytes copied.
+
+    The file is read once: each chunk is hashed as it is written to the destination.
+    The copy is verified by checking the destination holds exactly the number of bytes
+    that were read and hashed, and that this is the size of the source file; if not, the
+    destination is deleted and an OSError is raised.
+
+    :param src: file to copy
+    :param dest: path of the copy (not a directory)
+    :param progress: called with the bytes copied after each chunk
+    :return: hash of the file
+    """
+
+    # Read files in 128 KB chunks, the same as client.utils.hash.hash_in_chunks
+    buf: bytearray = bytearray(131072)
+    view: memoryview = memoryview(buf)
+    sha3 = sha3_384()
+    copied: int = 0
+
+    with open(src, "rb") as f_src, open(dest, "wb") as f_dest:
+        src_size: int = os.fstat(f_src.fileno()).st_size
+        while True:
+            read: int = f_src.readinto(buf)
+            if not read:
+                break
+            sha3.update(view[:read])
+            f_dest.write(view[:read])
+            copied += read
+            if progress is not None:
+                progress(read)
+        f_dest.flush()
+        dest_size: int = os.fstat(f_dest.fileno()).st_size
+
+    if not copied == dest_size == src_size:
+        os.remove(dest)
+        raise OSError(
+            f"Copy of {src} is incomplete: read {copied} of {src_size} bytes and"
+            f" wrote {dest_size} bytes."
+        )
+
+    # Copy permissions, as shutil.copy does
+    shutil.copymode(src, dest)
+    return sha3.hexdigest()
+
+
 def find_and_move(
     glob_arg: str,
     search_dir: Path,
@@ -108,7 +162,7 @@ def size_fmt(num_of_bytes: int | float, dec_places: int = 2) -> str:
     if num_of_bytes < 0:
         raise ValueError("Number of bytes must be positive.")
 
-    for unit in ("B", "KB", "MB", "TB", "PB"):
+    for unit in ("B", "KB", "MB", "GB", "TB", "PB"):
         if num_of_bytes < 1024 or unit == "PB":
             return f"{num_of_bytes:.{dec_places}f} {unit}"
         num_of_bytes /= 1024
@@ -3,10 +3,19 @@ File hashing algorithms.
 """
 from __future__ import annotations
 
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from hashlib import sha3_384
-from typing import TYPE_CHECKING
+from itertools import chain
+from typing import TYPE_CHECKING, Any
+
+from .pool import ordered_map, unordered_map
+from .transfer import batch_files
 
 if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+    from concurrent.futures import Executor
     from pathlib import Path
 
 
@@ -31,3 +40,137 @@ def hash_in_chunks(file: Path | str) -> str:
     # Get the hash of the file
     hash_str: str = sha3.hexdigest()
     return hash_str
+
+
+def hash_or_none(file: Path | str) -> str | None:
+    """Hash a file, returning None if the file does not exist.
+
+    Missing files are expected during validation (they are what we are looking for), so
+    they are reported as a value rather than an exception crossing the worker boundary.
+    """
+
+    try:
+        return hash_in_chunks(file)
+    except FileNotFoundError:
+        return None
+
+
+def hash_pair_shard(
+    shard: list[tuple[Path | str, Path | str]]
+) -> list[tuple[str | None, str | None]]:
+    """Hash both files of each pair in a shard; this runs in a worker.
+
+    :return: (first hash, second hash) for each pair, in the order given
+    """
+
+    return [(hash_or_none(first), hash_or_none(second)) for first, second in shard]
+
+
+def cpu_count() -> int:
+    """Get the number of cores this process may run on."""
+
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class HashEngine:
+    """Hash many files at once using a pool of workers.
+
+    Use as a context manager so that pending work is cancelled if the caller stops early
+    (for example, if the runner is killed).
+
+    SHA3 in hashlib releases the GIL while it digests each chunk, so threads are a good
+    default; the process executor is there for when the Python-level loop is the
+    bottleneck, e.g., on a server with many cores. Worker processes are spawned rather
+    than forked, as forking a process running Qt threads is unsafe.
+    """
+
+    def __init__(self, workers: int = 0, executor: str = "thread") -> None:
+        """Initialize the engine.
+
+        :param workers: number of workers; 0 lets the executor choose (one process
+            per core)
+        :param executor: "thread" or "process"
+        """
+
+        if workers < 0:
+            raise ValueError("Number of workers cannot be negative.")
+        max_workers: int | None = workers or None
+
+        self._executor: Executor
+        match executor:
+            case "thread":
+                self._executor = ThreadPoolExecutor(max_workers=max_workers)
+            case "process":
+                max_workers = max_workers or cpu_count()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            case _:
+                raise ValueError(f"Unknown executor {executor}.")
+        self.processes: bool = executor == "process"
+
+        # Keep a couple of tasks queued per worker so workers never sit idle
+        self.window: int = 2 * (max_workers or os.cpu_count() or 1)
+
+    def shutdown(self) -> None:
+        """Cancel queued hashes and shut down the pool without waiting."""
+
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def hash_files(
+        self, files: Iterable[Path | str]
+    ) -> Iterator[tuple[Path | str, str | None]]:
+        """Hash files in parallel, yielding (file, hash) in the order given.
+
+        The hash is None if the file does not exist.
+        """
+
+        yield from ordered_map(self._executor, hash_or_none, files, self.window)
+
+    def hash_pairs(
+        self, pairs: Iterable[tuple[Path | str, Path | str]]
+    ) -> Iterator[tuple[tuple[Path | str, Path | str], str | None, str | None]]:
+        """Hash pairs of files, yielding ((first, second), first hash, second hash).
+
+        Both sides of a pair are separate tasks, so they are hashed at the same time
+        (e.g., the permanent and local copy of a file are read from their libraries
+        concurrently). Pairs are yielded in the order given.
+        """
+
+        results = self.hash_files(chain.from_iterable(pairs))
+        # Consecutive results belong to the same pair
+        for (first, first_hash), (second, second_hash) in zip(results, results):
+            yield (first, second), first_hash, second_hash
+
+    def hash_pair_shards(
+        self, pairs: Iterable[tuple[tuple[Path | str, Path | str], int]]
+    ) -> Iterator[tuple[tuple[Path | str, Path | str], str | None, str | None]]:
+        """Hash pairs of files in shards, yielding each pair's hashes as its shard ends.
+
+        Each task hashes a shard of pairs: a large pair alone, or many small pairs
+        together. A process pool then spends its time hashing, rather than passing a
+        path and a hash between processes for every file. Results stream back in the
+        order the shards finish, so a large file does not hold up the rest.
+
+        :param pairs: ((first, second), size in bytes) for each pair
+        :return: iterator of ((first, second), first hash, second hash)
+        """
+
+        for shard, hashes in unordered_map(
+            self._executor, hash_pair_shard, batch_files(pairs), self.window
+        ):
+            for pair, (first_hash, second_hash) in zip(shard, hashes):
+                yield pair, first_hash, second_hash
+
+    def __enter__(self) -> HashEngine:
+        """Return the engine for use in a with statement."""
+
+        return self
+
+    def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        """Cancel any queued work and release the workers."""
+
+        self.shutdown()
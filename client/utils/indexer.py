@@ -0,0 +1,123 @@
+"""
+Index the files in a directory tree.
+
+The tree is walked with os.scandir, which returns the type of each entry with its name,
+so directories are told apart from files without a stat call (and on Windows, the size
+and modification time come with the entry too). The result is a compact file table that
+jobs reuse rather than walking the tree again.
+"""
+from __future__ import annotations
+
+import os
+from array import array
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+# Report partial totals after this many files
+REPORT_EVERY: int = 1000
+
+
+class FileEntry(NamedTuple):
+    """A file in a file table."""
+
+    rel_path: str
+    size: int
+    mtime_ns: int
+
+
+class FileTable:
+    """The files in a directory tree, with their sizes and modification times.
+
+    Sizes and times are stored in arrays rather than one object per file, so the table
+    of a project with hundreds of thousands of files stays small.
+    """
+
+    def __init__(self, root: Path | str) -> None:
+        """Initialize an empty table.
+
+        :param root: directory the file paths are relative to
+        """
+
+        self.root: str = os.fspath(root)
+        self.rel_paths: list[str] = []
+        self.sizes: array[int] = array("q")
+        self.mtimes_ns: array[int] = array("q")
+        self.total_size: int = 0
+
+    def add(self, rel_path: str, size: int, mtime_ns: int) -> None:
+        """Add a file to the table.
+
+        :param rel_path: path relative to the root
+        :param size: size in bytes
+        :param mtime_ns: modification time in nanoseconds
+        """
+
+        self.rel_paths.append(rel_path)
+        self.sizes.append(size)
+        self.mtimes_ns.append(mtime_ns)
+        self.total_size += size
+
+    def path(self, rel_path: str) -> str:
+        """Get the full path of a file in the table."""
+
+        return os.path.join(self.root, rel_path)
+
+    def size_by_path(self) -> dict[str, int]:
+        """Get the size of each file, keyed by relative path."""
+
+        return dict(zip(self.rel_paths, self.sizes))
+
+    def __iter__(self) -> Iterator[FileEntry]:
+        """Iterate over the files in the table."""
+
+        for entry in zip(self.rel_paths, self.sizes, self.mtimes_ns):
+            yield FileEntry(*entry)
+
+    def __len__(self) -> int:
+        """Return the number of files in the table."""
+
+        return len(self.rel_paths)
+
+
+def scan_tree(
+    root: Path | str,
+    report: Callable[[int, int], None] | None = None,
+    report_every: int = REPORT_EVERY,
+) -> FileTable:
+    """Index the files in a directory tree.
+
+    Symbolic links to files are indexed as files; symbolic links to directories are not
+    followed, as with os.walk. A missing root gives an empty table.
+
+    :param root: directory to index
+    :param report: called with the number of files and bytes found so far, every
+        report_every files and once at the end; it may raise to stop indexing
+    :param report_every: files between reports
+    :return: table of the files, with paths relative to root
+    """
+
+    table: FileTable = FileTable(root)
+    # Directories still to scan, as (path, path relative to root)
+    stack: list[tuple[str, str]] = [(table.root, "")]
+    while stack:
+        directory, rel_dir = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                rel_path: str = os.path.join(rel_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_path))
+                elif entry.is_file():
+                    stat: os.stat_result = entry.stat()
+                    table.add(rel_path, stat.st_size, stat.st_mtime_ns)
+                    if report is not None and len(table) % report_every == 0:
+                        report(len(table), table.total_size)
+    if report is not None:
+        report(len(table), table.total_size)
+    return table
@@ -0,0 +1,91 @@
+"""
+Worker pool helpers.
+
+The executors in concurrent.futures will happily accept every task up front, which is a
+problem when there are hundreds of thousands of files to process: the futures pile up in
+memory, and killing the job leaves a long queue to cancel. These helpers keep a bounded
+number of tasks in flight instead.
+"""
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from itertools import islice
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from concurrent.futures import Executor, Future
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(
+    executor: Executor,
+    func: Callable[[T], R],
+    items: Iterable[T],
+    window: int,
+) -> Iterator[tuple[T, R]]:
+    """Map a function over items using an executor, yielding results in order.
+
+    At most window tasks are submitted to the executor at any one time, so items are
+    consumed lazily and the caller can stop (e.g., if a runner is killed) without
+    waiting for the whole iterable to be processed.
+
+    :param executor: executor that runs the tasks
+    :param func: function applied to each item
+    :param items: items to process
+    :param window: maximum number of tasks in flight
+    :return: iterator of (item, result) tuples in the order the items were given
+    """
+
+    if window < 1:
+        raise ValueError("Window must be a positive integer.")
+
+    pending: deque[tuple[T, Future[R]]] = deque()
+    for item in items:
+        pending.append((item, executor.submit(func, item)))
+        if len(pending) >= window:
+            done_item, future = pending.popleft()
+            yield done_item, future.result()
+
+    # Drain the remaining tasks
+    while pending:
+        done_item, future = pending.popleft()
+        yield done_item, future.result()
+
+
+def unordered_map(
+    executor: Executor,
+    func: Callable[[T], R],
+    items: Iterable[T],
+    window: int,
+) -> Iterator[tuple[T, R]]:
+    """Map a function over items using an executor, yielding results as they finish.
+
+    Like ordered_map, at most window tasks are in flight at once, but a slow task does
+    not hold up the results of the tasks submitted after it.
+
+    :param executor: executor that runs the tasks
+    :param func: function applied to each item
+    :param items: items to process
+    :param window: maximum number of tasks in flight
+    :return: iterator of (item, result) tuples in the order the tasks finished
+    """
+
+    if window < 1:
+        raise ValueError("Window must be a positive integer.")
+
+    remaining: Iterator[T] = iter(items)
+    pending: dict[Future[R], T] = {
+        executor.submit(func, item): item for item in islice(remaining, window)
+    }
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            done_item: T = pending.pop(future)
+            # Keep the window full
+            for item in islice(remaining, 1):
+                pending[executor.submit(func, item)] = item
+            yield done_item, future.result()
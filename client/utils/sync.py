@@ -0,0 +1,123 @@
+"""
+Incremental sync between the copies of a scan in two libraries.
+
+Like rsync's quick check, a file is only copied if it is new, if its size has changed,
+or if its modification time has changed and the hashes recorded in the manifests do not
+show the contents to be the same. Transfers preserve modification times, so a file
+saved once is skipped by later syncs until it is changed.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from .file import size_fmt
+
+if TYPE_CHECKING:
+    from client.library import Manifest
+
+# Modification times closer than this are treated as equal; FAT and some SMB servers
+# only store times to 2 seconds
+MTIME_WINDOW_NS: int = 2_000_000_000
+
+
+class SyncPlan(NamedTuple):
+    """The changes a sync makes to the destination copy of a scan."""
+
+    copy: list[tuple[tuple[Path, Path], int]]
+    unchanged: int
+    delete: list[tuple[Path, int]]
+
+    @property
+    def copy_bytes(self) -> int:
+        """Bytes that are copied."""
+
+        return sum(size for _, size in self.copy)
+
+    @property
+    def delete_bytes(self) -> int:
+        """Bytes that are deleted from the destination."""
+
+        return sum(size for _, size in self.delete)
+
+    def report(self) -> str:
+        """Describe the plan, e.g., for a dry run."""
+
+        return (
+            f"{len(self.copy)} files to copy ({size_fmt(self.copy_bytes)}),"
+            f" {self.unchanged} unchanged,"
+            f" {len(self.delete)} to delete ({size_fmt(self.delete_bytes)})"
+        )
+
+
+def needs_copy(
+    src: Path,
+    dest: Path,
+    source_manifest: Manifest | None = None,
+    dest_manifest: Manifest | None = None,
+) -> bool:
+    """Check if a file must be copied to bring the destination up to date.
+
+    :param src: source file
+    :param dest: destination file
+    :param source_manifest: manifest of the source copy of the scan
+    :param dest_manifest: manifest of the destination copy of the scan
+    :return: True if the file is new or has changed
+    """
+
+    try:
+        dest_stat: os.stat_result = os.stat(dest)
+    except FileNotFoundError:
+        return True
+    src_stat: os.stat_result = os.stat(src)
+
+    if src_stat.st_size != dest_stat.st_size:
+        return True
+    if abs(src_stat.st_mtime_ns - dest_stat.st_mtime_ns) <= MTIME_WINDOW_NS:
+        return False
+
+    # Same size but a different time, so only skip the file if both hashes are known
+    # and the same; hashing the files here would cost as much as copying them
+    src_hash: str | None = (
+        source_manifest.lookup(src, src_stat) if source_manifest else None
+    )
+    dest_hash: str | None = (
+        dest_manifest.lookup(dest, dest_stat) if dest_manifest else None
+    )
+    return src_hash is None or src_hash != dest_hash
+
+
+def plan_sync(
+    files: list[tuple[tuple[Path, Path], int]],
+    dest_dir: Path,
+    source_manifest: Manifest | None = None,
+    dest_manifest: Manifest | None = None,
+    delete: bool = False,
+) -> SyncPlan:
+    """Plan a sync of files into a destination directory.
+
+    :param files: ((source file, destination file), size in bytes) for each file
+    :param dest_dir: destination directory the files are synced into
+    :param source_manifest: manifest of the source copy of the scan
+    :param dest_manifest: manifest of the destination copy of the scan
+    :param delete: delete files in the destination directory that are not in files
+    :return: plan of the files to copy and delete
+    """
+
+    copy: list[tuple[tuple[Path, Path], int]] = [
+        (paths, size)
+        for paths, size in files
+        if needs_copy(*paths, source_manifest, dest_manifest)
+    ]
+
+    to_delete: list[tuple[Path, int]] = []
+    if delete:
+        keep: set[str] = {os.path.normcase(dest) for (_, dest), _ in files}
+        for root, _, dest_files in os.walk(dest_dir):
+            for file in dest_files:
+                path: str = os.path.join(root, file)
+                if os.path.normcase(path) not in keep:
+                    to_delete.append((Path(path), os.stat(path).st_size))
+
+    return SyncPlan(copy, len(files) - len(copy), to_delete)
@@ -0,0 +1,380 @@
+"""
+File transfer backends.
+
+shutil does not reliably use the kernel's copy offload on network and parallel
+filesystems, so copies of large scans burn user-space CPU shuffling bytes. The backends
+here are tried in order, falling back to the next if the kernel or filesystem does not
+support one:
+
+reflink          clone the file's extents (copy-on-write filesystems, e.g. Btrfs, XFS)
+copy_file_range  server-side/in-kernel copy (Linux; offloaded by NFS 4.2, CephFS, ...)
+sendfile         in-kernel copy between file descriptors (Linux)
+buffered         large aligned reads and writes in user space (everywhere)
+
+If a hash of the file is wanted, the bytes have to pass through user space anyway, so
+the file is copied and hashed in a single buffered pass (see file.copy_and_hash).
+"""
+from __future__ import annotations
+
+import contextlib
+import errno
+import logging
+import os
+import shutil
+import sys
+from collections import Counter
+from typing import TYPE_CHECKING, NamedTuple, TypeVar
+
+from .file import copy_and_hash, create_dir
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+    from pathlib import Path
+
+T = TypeVar("T")
+
+# Linux ioctl to clone a file (FICLONE from linux/fs.h)
+_FICLONE: int = 0x40049409
+
+# 1 MB buffer; a multiple of the page and block size of any filesystem we care about
+BUF_SIZE: int = 1048576
+
+# Files smaller than this are copied in batches to amortise the per-task overhead; a
+# batch holds up to BATCH_FILES files or BATCH_SIZE bytes
+SMALL_FILE_SIZE: int = 8388608  # 8 MB
+BATCH_SIZE: int = 67108864  # 64 MB
+BATCH_FILES: int = 256
+
+# Most bytes a kernel copy is asked for at once, so progress can be reported during a
+# large file
+KERNEL_CHUNK_SIZE: int = 67108864  # 64 MB
+
+# Suffix of the temporary name a file is copied to before it is renamed into place
+PARTIAL_SUFFIX: str = ".part"
+
+# Errors meaning the backend is not supported for this pair of files
+_UNSUPPORTED: frozenset[int] = frozenset(
+    {
+        errno.EBADF,
+        errno.EINVAL,
+        errno.ENOSYS,
+        errno.ENOTSUP,
+        errno.ENOTTY,
+        errno.EOPNOTSUPP,
+        errno.EPERM,
+        errno.EXDEV,
+    }
+)
+
+
+class TransferResult(NamedTuple):
+    """How a file was transferred."""
+
+    method: str
+    size: int
+    hash: str | None
+
+
+class UnsupportedBackend(OSError):
+    """Raised by a backend that cannot copy a given pair of files."""
+
+
+def _no_progress(_size: int) -> None:
+    """Ignore progress; the default progress callback."""
+
+
+def _reflink(
+    src_fd: int, dest_fd: int, size: int, progress: Callable[[int], None]
+) -> None:
+    """Clone the source file into the destination file."""
+
+    if not sys.platform.startswith("linux"):
+        raise UnsupportedBackend("Reflinks are only supported on Linux.")
+
+    # fcntl does not exist on Windows, so import it here
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    fcntl.ioctl(dest_fd, _FICLONE, src_fd)
+    progress(size)
+
+
+def _copy_file_range(
+    src_fd: int, dest_fd: int, size: int, progress: Callable[[int], None]
+) -> None:
+    """Copy the file in the kernel using copy_file_range."""
+
+    if not hasattr(os, "copy_file_range"):
+        raise UnsupportedBackend("copy_file_range is not available.")
+
+    copied: int = 0
+    while copied < size:
+        sent: int = os.copy_file_range(
+            src_fd, dest_fd, min(size - copied, KERNEL_CHUNK_SIZE)
+        )
+        if not sent:
+            # Some kernels report 0 bytes for filesystems they cannot copy between
+            raise UnsupportedBackend("copy_file_range copied no data.")
+        copied += sent
+        progress(sent)
+
+
+def _sendfile(
+    src_fd: int, dest_fd: int, size: int, progress: Callable[[int], None]
+) -> None:
+    """Copy the file in the kernel using sendfile."""
+
+    if not sys.platform.startswith("linux"):
+        # Other platforms only support sendfile to sockets
+        raise UnsupportedBackend("sendfile between files is only supported on Linux.")
+
+    copied: int = 0
+    while copied < size:
+        sent: int = os.sendfile(
+            dest_fd, src_fd, copied, min(size - copied, KERNEL_CHUNK_SIZE)
+        )
+        if not sent:
+            raise UnsupportedBackend("sendfile copied no data.")
+        copied += sent
+        progress(sent)
+
+
+def _buffered(
+    src_fd: int, dest_fd: int, _size: int, progress: Callable[[int], None]
+) -> None:
+    """Copy the file in user space using a large buffer."""
+
+    buf: bytearray = bytearray(BUF_SIZE)
+    view: memoryview = memoryview(buf)
+    while True:
+        read: int = os.readv(src_fd, (buf,))
+        if not read:
+            break
+        written: int = 0
+        while written < read:
+            written += os.write(dest_fd, view[written:read])
+        progress(read)
+
+
+# Backends in the order they are tried
+BACKENDS: dict[str, Callable[[int, int, int, Callable[[int], None]], None]] = {
+    "reflink": _reflink,
+    "copy_file_range": _copy_file_range,
+    "sendfile": _sendfile,
+    "buffered": _buffered,
+}
+
+
+def partial_path(dest: Path | str) -> str:
+    """Get the temporary name a file is written to before it is renamed into place."""
+
+    head, tail = os.path.split(dest)
+    return os.path.join(head, f".{tail}{PARTIAL_SUFFIX}")
+
+
+def _copy_with_backends(
+    src: Path | str, dest: Path | str, backend: str, progress: Callable[[int], None]
+) -> TransferResult:
+    """Copy a file using the first transfer backend that works; see copy_file."""
+
+    if backend == "auto":
+        names: tuple[str, ...] = tuple(BACKENDS)
+    elif backend in BACKENDS:
+        names = (backend, "buffered")
+    else:
+        raise ValueError(f"Unknown transfer backend {backend}.")
+
+    src_fd: int = os.open(src, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        size: int = os.fstat(src_fd).st_size
+        dest_fd: int = os.open(
+            dest,
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0),
+            0o666,
+        )
+        try:
+            for name in names:
+                # Bytes reported by this backend, taken back if it gives up
+                reported: list[int] = []
+
+                def report(copied: int) -> None:
+                    """Pass on the progress of the backend, remembering it."""
+
+                    reported.append(copied)
+                    progress(copied)
+
+                try:
+                    BACKENDS[name](src_fd, dest_fd, size, report)
+                except OSError as exc:
+                    if name == "buffered" or not (
+                        isinstance(exc, UnsupportedBackend) or exc.errno in _UNSUPPORTED
+                    ):
+                        raise
+                    logging.debug("Transfer backend %s unsupported: %s", name, exc)
+                    progress(-sum(reported))
+                    # Start again from the beginning with the next backend
+                    os.ftruncate(dest_fd, 0)
+                    os.lseek(src_fd, 0, os.SEEK_SET)
+                    os.lseek(dest_fd, 0, os.SEEK_SET)
+                    continue
+                method: str = name
+                break
+        finally:
+            os.close(dest_fd)
+    finally:
+        os.close(src_fd)
+
+    # Copy permissions, as shutil.copy does
+    shutil.copymode(src, dest)
+    logging.debug("Copied %s using %s", src, method)
+    return TransferResult(method, size, None)
+
+
+def _copy_file(
+    src: Path | str,
+    dest: Path | str,
+    backend: str,
+    want_hash: bool,
+    keep_times: bool,
+    progress: Callable[[int], None],
+) -> TransferResult:
+    """Copy a file; see copy_file."""
+
+    if want_hash:
+        hash_str: str = copy_and_hash(src, dest, progress)
+        result: TransferResult = TransferResult(
+            "buffered", os.stat(dest).st_size, hash_str
+        )
+    else:
+        result = _copy_with_backends(src, dest, backend, progress)
+
+    if keep_times:
+        # Copy access and modification times, as shutil.copy2 does
+        src_stat: os.stat_result = os.stat(src)
+        os.utime(dest, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return result
+
+
+def fsync_file(path: Path | str) -> None:
+    """Flush a file's data to disk.
+
+    :param path: file to sync
+    """
+
+    # Windows only syncs files opened for writing
+    fd: int = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def copy_file(
+    src: Path | str,
+    dest: Path | str,
+    backend: str = "auto",
+    want_hash: bool = False,
+    atomic: bool = False,
+    keep_times: bool = False,
+    progress: Callable[[int], None] = _no_progress,
+) -> TransferResult:
+    """Copy a file using the fastest backend that works.
+
+    :param src: file to copy
+    :param dest: path of the copy (not a directory)
+    :param backend: "auto" to try each backend in turn, or the name of the backend to
+        try before falling back to a buffered copy
+    :param want_hash: hash the file while copying it (forces a buffered copy)
+    :param atomic: write the copy under a temporary name, sync it to disk and rename it
+        into place, so dest never holds a partial file, even after a power loss
+    :param keep_times: give the copy the access and modification times of src
+    :param progress: called with the bytes copied as the copy goes on, e.g., every
+        chunk; the bytes of a copy that fails are not taken back
+    :return: the backend used, the size of the file, and its hash (if wanted)
+    """
+
+    if not atomic:
+        return _copy_file(src, dest, backend, want_hash, keep_times, progress)
+
+    tmp_dest: str = partial_path(dest)
+    try:
+        result: TransferResult = _copy_file(
+            src, tmp_dest, backend, want_hash, keep_times, progress
+        )
+        # Sync before renaming, or a power loss could leave a complete name (and a
+        # journal entry) over data that never reached the disk
+        fsync_file(tmp_dest)
+        os.replace(tmp_dest, dest)
+    except BaseException:
+        # Do not leave partial files behind
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_dest)
+        raise
+    return result
+
+
+def copy_item(item: Path, dest_dir: Path, backend: str = "auto") -> Counter[str]:
+    """Copy a file or directory into a directory using the transfer backends.
+
+    Like file.move_item, a directory is skipped if it already exists at the destination.
+
+    :param item: file or directory to copy
+    :param dest_dir: directory to copy the item into
+    :param backend: transfer backend (see copy_file)
+    :return: the number of files copied by each backend
+    """
+
+    methods: Counter[str] = Counter()
+    create_dir(dest_dir)
+    item_dest: Path = dest_dir / item.name
+
+    if item.is_file():
+        methods[copy_file(item, item_dest, backend).method] += 1
+    elif item.is_dir():
+        if item_dest.exists():
+            logging.info("Directory already exists at %s, skipping", item_dest)
+            return methods
+        for root, _, files in os.walk(item):
+            dest_root: str = os.path.join(item_dest, os.path.relpath(root, item))
+            create_dir(dest_root)
+            for file in files:
+                result: TransferResult = copy_file(
+                    os.path.join(root, file), os.path.join(dest_root, file), backend
+                )
+                methods[result.method] += 1
+    else:
+        raise RuntimeError("Item is not a file or directory.")
+    return methods
+
+
+def batch_files(
+    files: Iterable[tuple[T, int]],
+    small_file_size: int = SMALL_FILE_SIZE,
+    batch_size: int = BATCH_SIZE,
+    batch_files_max: int = BATCH_FILES,
+) -> Iterator[list[T]]:
+    """Group files into batches for a pool of workers.
+
+    Large files are put in a batch of their own, so they are copied alone; small files
+    are grouped until the batch is full.
+
+    :param files: (file, size in bytes) pairs
+    :param small_file_size: files at least this size are not grouped
+    :param batch_size: maximum bytes in a batch of small files
+    :param batch_files_max: maximum files in a batch of small files
+    :return: iterator of batches
+    """
+
+    batch: list[T] = []
+    batch_bytes: int = 0
+    for file, size in files:
+        if size >= small_file_size:
+            yield [file]
+            continue
+        batch.append(file)
+        batch_bytes += size
+        if batch_bytes >= batch_size or len(batch) >= batch_files_max:
+            yield batch
+            batch = []
+            batch_bytes = 0
+    if batch:
+        yield batch
@@ -7,9 +7,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any
 
-import psycopg
-from psycopg import sql
-from PySide6.QtCore import Qt, QThreadPool
+from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QCheckBox,
     QComboBox,
@@ -25,8 +23,10 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
 )
 
+from client.db.ingest import ScanRecord, ingest_scans
 from client.library import NikonScan, get_relative_path, local_path
 from client.runners.add_scan import AddScan
+from client.runners.scheduler import get_scheduler
 from client.utils.file import create_dir
 from client.utils.toml import load_toml
 
@@ -49,9 +49,8 @@ class AddToLibraryProgress(QDialog):
         #  download functionality; it should be possible to copy and paste.
         self.setLayout(layout)
 
-        self.threadpool: QThreadPool = QThreadPool()
         self.runner: AddScan = runner
-        self.threadpool.start(self.runner)
+        get_scheduler().submit(self.runner)
 
         self.show()
 
@@ -227,34 +226,16 @@ class AddToLibrary(QDialog):
                 scan = NikonScan(self.scan_loc)
                 scan_metadata = scan.get_metadata()
 
-        # Update scan metadata with user input.
-        with psycopg.connect(self.conn_str) as conn:
-            # Create project and scan if it does not exist already.
-            with conn.cursor() as cur:
-                cur.execute(
-                    (
-                        "insert into project (project_id) values (%s) on conflict on"
-                        " constraint project_pk do nothing;"
-                    ),
-                    (self.prj_id,),
-                )
-                cur.execute(
-                    (
-                        "insert into scan (scan_id, project_id, instrument_id) values"
-                        " (%s, %s, %s) on conflict on constraint scan_pk do nothing;"
-                    ),
-                    (self.scan_id, self.prj_id, self.instrument_id),
-                )
-                # Update scan metadata.
-                for col, value in scan_metadata.items():
-                    # Perform pyscopg gymnastics for safe(r) SQL queries.
-                    # See https://www.psycopg.org/psycopg3/docs/api/sql.html
-                    cur.execute(
-                        sql.SQL("update scan set {col} = %s where scan_id = %s").format(
-                            col=sql.Identifier(col)
-                        ),
-                        (value, self.scan_id),
-                    )
+        # Create the project and scan if they do not exist, and update the scan's
+        # metadata with one upsert rather than an update per column
+        ingest_scans(
+            self.conn_str,
+            (
+                ScanRecord(
+                    self.scan_id, self.prj_id, self.instrument_id, scan_metadata or {}
+                ),
+            ),
+        )
 
     def add_scan(self) -> None:
         """Add the scan to the library."""
@@ -8,7 +8,6 @@ import logging
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-import psycopg
 from PySide6.QtCore import QDate, Qt
 from PySide6.QtWidgets import (
     QDateEdit,
@@ -23,6 +22,7 @@ from PySide6.QtWidgets import (
 
 from client import settings
 from client.db.exceptions import exc_gui
+from client.db.pool import get_pool
 from client.utils import file
 
 if TYPE_CHECKING:
@@ -106,7 +106,7 @@ class CreatePrj(QDialog):
             )
             raise ValueError("Project title cannot be empty.")
 
-        with psycopg.connect(self.conn_str) as conn:
+        with get_pool(self.conn_str).connection() as conn:
             with conn.cursor() as cur:
                 # Create project in database
                 cur.execute(
@@ -4,10 +4,10 @@ specified by the input connection string.
 """
 from __future__ import annotations
 
+import asyncio
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-import psycopg
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QCompleter,
@@ -21,7 +21,11 @@ from PySide6.QtWidgets import (
 )
 
 from client import settings
+from client.db import Select
+from client.db.pool import get_pool
 from client.db.views import DatabaseView
+from client.runners.query import AsyncQuery
+from client.runners.scheduler import get_scheduler
 from client.utils import file, log, toml
 
 from .decorators import handle_common_exc
@@ -31,6 +35,16 @@ if TYPE_CHECKING:
 
     from PySide6.QtWidgets import QWidget
 
+    from client.db.async_views import AsyncDatabaseView
+
+
+async def load_options(
+    view: AsyncDatabaseView,
+) -> tuple[list[tuple[Any, ...]], list[tuple[Any, ...]]]:
+    """Get the projects and instruments a scan can be created for."""
+
+    return await asyncio.gather(view.get_projects(), view.get_instruments())
+
 
 class CreateScan(QDialog):
     """
@@ -53,35 +67,12 @@ class CreateScan(QDialog):
 
         header_label: QLabel = QLabel("Create new scan")
 
-        # Get project ID options
+        # Project and instrument ID options are loaded in the background
         self.new_scan_prj_id_entry: QLineEdit = QLineEdit()
-        with psycopg.connect(self.conn_str) as conn:
-            with conn.cursor() as cur:
-                cur.execute("select project_id, title from project;")
-                raw_prj_ids: list[tuple[Any, ...]] = cur.fetchall()
-                # Hack the output into a value QComboBox likes (a list of strings)
-                prj_ids: list[str] = [
-                    f"{tuple_value[0]} ({tuple_value[1]})"
-                    for tuple_value in raw_prj_ids
-                ]
-        completer = QCompleter(prj_ids)
-        completer.setFilterMode(Qt.MatchContains)
-        self.new_scan_prj_id_entry.setCompleter(completer)
-
-        # Get instrument ID options
+        self.new_scan_prj_id_entry.setPlaceholderText("Loading projects...")
         self.new_scan_instrument_id_entry = QLineEdit()
-        with psycopg.connect(self.conn_str) as conn:
-            with conn.cursor() as cur:
-                cur.execute("select instrument_id, name from instrument;")
-                raw_instrument_ids: list[tuple[Any, ...]] = cur.fetchall()
-                # Hack the output into a value the Qt ComboBox likes (a list of strings)
-                instrument_ids: list[str] = [
-                    f"{tuple_value[0]} ({tuple_value[1]})"
-                    for tuple_value in raw_instrument_ids
-                ]
-        completer = QCompleter(instrument_ids)
-        completer.setFilterMode(Qt.MatchContains)
-        self.new_scan_instrument_id_entry.setCompleter(completer)
+        self.new_scan_instrument_id_entry.setPlaceholderText("Loading instruments...")
+        self.load_options()
 
         # Arrange QLineEdit widgets in a QFormLayout
         dlg_form: QFormLayout = QFormLayout()
@@ -102,15 +93,48 @@ class CreateScan(QDialog):
         create_prj_v_box.addStretch()
         self.setLayout(create_prj_v_box)
 
+    def load_options(self) -> None:
+        """Load the project and instrument ID options concurrently, off the GUI thread.
+
+        Both queries are sent at once, so the options arrive in about one round trip.
+        """
+
+        self.options_runner: AsyncQuery = AsyncQuery(self.conn_str, load_options)
+        self.options_runner.signals.result.connect(self.set_options)
+        self.options_runner.signals.error.connect(self.options_failed)
+        get_scheduler().submit(self.options_runner)
+
+    def options_failed(self, error: tuple[type, BaseException, str]) -> None:
+        """Report that the options could not be loaded."""
+
+        _, value, _ = error
+        log.logger(__name__).error("Failed to load scan options: %s", value)
+        for entry in (self.new_scan_prj_id_entry, self.new_scan_instrument_id_entry):
+            entry.setPlaceholderText("Could not load options")
+
+    def set_options(
+        self, options: tuple[list[tuple[Any, ...]], list[tuple[Any, ...]]]
+    ) -> None:
+        """Offer the loaded project and instrument IDs as completions."""
+
+        for entry, rows in zip(
+            (self.new_scan_prj_id_entry, self.new_scan_instrument_id_entry), options
+        ):
+            # Hack the output into a value QCompleter likes (a list of strings)
+            completer = QCompleter([f"{row[0]} ({row[1]})" for row in rows])
+            completer.setFilterMode(Qt.MatchContains)
+            entry.setCompleter(completer)
+            entry.setPlaceholderText("")
+
     def get_scan_form_data(self, scan_id: int) -> dict[str, dict[str, Any]]:
         """Get scan form data for user_form.toml."""
 
         # Get immutable data (data that should not be changed by the user)
         db_view: DatabaseView = DatabaseView(self.conn_str)
-        immutable_data, immutable_column_headers = db_view.view_select_from_where(
-            "scan_id, project_id, instrument_id",
-            "scan",
-            f"scan_id={scan_id}",
+        immutable_data, immutable_column_headers = db_view.select(
+            Select("scan", ("scan_id", "project_id", "instrument_id")).where(
+                "scan_id", scan_id
+            )
         )
         data: dict[str, dict[str, Any]] = {
             "hardcoded": dict(zip(immutable_column_headers, immutable_data[0])),
@@ -139,7 +163,7 @@ class CreateScan(QDialog):
                 "Tried to create a scan with an instrument ID that does not exist."
             )
 
-        with psycopg.connect(self.conn_str) as conn:
+        with get_pool(self.conn_str).connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     (
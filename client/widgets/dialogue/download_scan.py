@@ -6,7 +6,6 @@ from __future__ import annotations
 import logging
 from typing import TYPE_CHECKING
 
-from PySide6.QtCore import QThreadPool
 from PySide6.QtWidgets import (
     QDialog,
     QHBoxLayout,
@@ -17,13 +16,16 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
 )
 
-from client.runners.generic import RunnerStatus
+from client.runners.generic import RunnerKilledException, RunnerStatus
+from client.runners.progress import PROGRESS_STEPS
+from client.runners.scheduler import get_scheduler
 from client.utils.file import size_fmt
 
 if TYPE_CHECKING:
     from PySide6.QtGui import QCloseEvent
     from PySide6.QtWidgets import QWidget
 
+    from client.runners.progress import Progress
     from client.runners.save import SaveScans
 
 
@@ -46,12 +48,9 @@ class DownloadScans(QDialog):
         layout: QVBoxLayout = QVBoxLayout()
         bar_layout: QHBoxLayout = QHBoxLayout()
 
-        # Create label
-        label = QLabel(
-            f"Downloading {runner.get_max_progress() + 1} items..."
-            f" ({size_fmt(runner.size_in_bytes)})"
-        )
-        layout.addWidget(label)
+        # Create label; files are counted once the runner starts
+        self.label: QLabel = QLabel("Waiting for other jobs to finish...")
+        layout.addWidget(self.label)
 
         # Create buttons
         btn_stop: QPushButton = QPushButton("Stop")
@@ -72,37 +71,83 @@ class DownloadScans(QDialog):
         # Set the layout
         self.setLayout(layout)
 
-        # Thread runner
-        self.threadpool: QThreadPool = QThreadPool()
+        # What the job is doing, shown with its throughput once it starts
+        self.summary: str = ""
+
+        # Set if the job raises an exception
+        self.failed: bool = False
 
         # Create a runner
         self.runner: SaveScans = runner
-        self.runner.signals.progress.connect(self.update_progress)
+        self.runner.signals.started.connect(self.job_started)
+        self.runner.signals.report.connect(self.update_progress)
+        self.runner.signals.indexed.connect(self.update_indexed)
+        self.runner.signals.max_progress.connect(self.update_max_progress)
+        self.runner.signals.error.connect(self.job_failed)
         self.runner.signals.finished.connect(self.job_done)
         self.runner.signals.kill.connect(self.close)
-        self.threadpool.start(self.runner)
+        # Run the job once the libraries it uses are free
+        get_scheduler().submit(self.runner)
 
         # Connect the buttons
         btn_stop.pressed.connect(self.runner.kill)
         btn_pause.pressed.connect(self.runner.pause)
         btn_resume.pressed.connect(self.runner.resume)
 
-        # Update progress bar
-        self.progress.setRange(0, self.runner.get_max_progress())
+        # Show a busy progress bar until the files are counted
+        self.progress.setRange(0, 0)
 
         # Show the dialogue
         if not hide:
             self.show()
 
-    def update_progress(self, value_increment: int) -> None:
-        """Update the progress bar."""
+    def update_progress(self, progress: Progress) -> None:
+        """Update the progress bar, and show the throughput and time remaining."""
+
+        if not self.summary:
+            # Still indexing
+            return
+        self.progress.setValue(int(progress.fraction * PROGRESS_STEPS))
+        speed: str = progress.describe()
+        self.label.setText(f"{self.summary} {speed}" if speed else self.summary)
+
+    def job_started(self) -> None:
+        """Show the files are being indexed once the job leaves the queue."""
 
-        value: int = self.progress.value()
-        self.progress.setValue(value + value_increment)
+        self.label.setText("Indexing files...")
+
+    def update_indexed(self, files: int, size_in_bytes: int) -> None:
+        """Show the files found so far while indexing."""
+
+        self.label.setText(
+            f"Indexing files... {files} found ({size_fmt(size_in_bytes)})"
+        )
+
+    def update_max_progress(self, max_progress: int) -> None:
+        """Show the files to be downloaded once they have been counted."""
+
+        self.summary = (
+            f"Downloading {max_progress + 1} items..."
+            f" ({size_fmt(self.runner.size_in_bytes)})"
+        )
+        self.label.setText(self.summary)
+        # The bar shows the fraction of bytes done, so large files move it smoothly
+        self.progress.setRange(0, PROGRESS_STEPS)
+
+    def job_failed(self, error: tuple[type[BaseException], BaseException, str]) -> None:
+        """Show a message box if the job raised an exception."""
+
+        self.failed = True
+        if not issubclass(error[0], RunnerKilledException):
+            QMessageBox.critical(self, "Error", f"{error[1]}")
 
     def job_done(self) -> None:
         """Show a message box when the job is done."""
 
+        if self.failed:
+            self.close()
+            return
+
         # Show a message box
         QMessageBox.information(
             self,
@@ -5,8 +5,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from PySide6.QtCore import QThreadPool
 from PySide6.QtWidgets import (
+    QCheckBox,
     QDialog,
     QHBoxLayout,
     QLabel,
@@ -16,14 +16,17 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
 )
 
-from client.runners import RunnerStatus
+from client.runners import RunnerKilledException, RunnerStatus, get_scheduler
+from client.runners.progress import PROGRESS_STEPS
 from client.utils import log
+from client.utils.file import size_fmt
 
 if TYPE_CHECKING:
     from PySide6.QtGui import QCloseEvent
     from PySide6.QtWidgets import QWidget
 
     from client.runners import ValidateScans
+    from client.runners.progress import Progress
 
 logger = log.logger(__name__)
 
@@ -37,7 +40,12 @@ class Validate(QDialog):
         hide: bool = False,
         parent_widget: QWidget | None = None,
     ) -> None:
-        """Initialize the dialogue."""
+        """Initialize the dialogue; the job is queued once the user presses Start.
+
+        :param runner: validation runner, not yet submitted
+        :param hide: queue the job straight away, without showing the dialogue
+        :param parent_widget: parent widget
+        """
 
         super().__init__(parent=parent_widget)
 
@@ -47,12 +55,20 @@ class Validate(QDialog):
         layout: QVBoxLayout = QVBoxLayout()
         bar_layout: QHBoxLayout = QHBoxLayout()
 
-        # Create label
-        # TODO: Display size in bytes
-        label = QLabel(f"Validating {runner.get_max_progress() + 1} items... ")
-        layout.addWidget(label)
+        # Create label; files are counted once the runner starts
+        self.label: QLabel = QLabel("Press Start to validate the data.")
+        layout.addWidget(self.label)
+
+        # Create checkbox; a deep validation reads every file again, which is slow
+        self.deep_checkbox: QCheckBox = QCheckBox(
+            "Deep validation (hash every file again)"
+        )
+        self.deep_checkbox.setChecked(runner.deep)
+        layout.addWidget(self.deep_checkbox)
 
         # Create buttons
+        self.btn_start: QPushButton = QPushButton("Start")
+        bar_layout.addWidget(self.btn_start)
         btn_stop: QPushButton = QPushButton("Stop")
         btn_pause: QPushButton = QPushButton("Pause")
         btn_resume: QPushButton = QPushButton("Resume")
@@ -68,39 +84,96 @@ class Validate(QDialog):
 
         # Set the layout
         self.setLayout(layout)
-        self.setLayout(layout)
 
-        # Thread runner
-        self.threadpool: QThreadPool = QThreadPool()
+        # What the job is doing, shown with its throughput once it starts
+        self.summary: str = ""
+
+        # Set if the job raises an exception
+        self.failed: bool = False
 
         # Create a runner
         self.runner: ValidateScans = runner
-        self.runner.signals.progress.connect(self.update_progress)
+        self.runner.signals.started.connect(self.job_started)
+        self.runner.signals.report.connect(self.update_progress)
+        self.runner.signals.indexed.connect(self.update_indexed)
+        self.runner.signals.max_progress.connect(self.update_max_progress)
+        self.runner.signals.error.connect(self.job_failed)
         self.runner.signals.finished.connect(self.job_done)
         self.runner.signals.kill.connect(self.close)
-        self.threadpool.start(self.runner)
 
         # Connect the buttons
+        self.btn_start.pressed.connect(self.start)
         btn_stop.pressed.connect(self.runner.kill)
         btn_pause.pressed.connect(self.runner.pause)
         btn_resume.pressed.connect(self.runner.resume)
 
-        # Update progress bar
-        self.progress.setRange(0, self.runner.get_max_progress())
-
-        # Show the dialogue
-        if not hide:
+        # Show the dialogue, or start straight away if there is no one to press Start
+        if hide:
+            self.start()
+        else:
             self.show()
 
-    def update_progress(self, value_increment: int) -> None:
-        """Update the progress bar."""
+    def start(self) -> None:
+        """Queue the job, with the chosen depth of validation."""
+
+        self.runner.deep = self.deep_checkbox.isChecked()
+        self.deep_checkbox.setEnabled(False)
+        self.btn_start.setEnabled(False)
+        self.label.setText("Waiting for other jobs to finish...")
+
+        # Show a busy progress bar until the files are counted
+        self.progress.setRange(0, 0)
+
+        # Run the job once the libraries it uses are free
+        get_scheduler().submit(self.runner)
+
+    def update_progress(self, progress: Progress) -> None:
+        """Update the progress bar, and show the throughput and time remaining."""
 
-        value: int = self.progress.value()
-        self.progress.setValue(value + value_increment)
+        if not self.summary:
+            # Still indexing
+            return
+        self.progress.setValue(int(progress.fraction * PROGRESS_STEPS))
+        speed: str = progress.describe()
+        self.label.setText(f"{self.summary} {speed}" if speed else self.summary)
+
+    def job_started(self) -> None:
+        """Show the files are being indexed once the job leaves the queue."""
+
+        self.label.setText("Indexing files...")
+
+    def update_indexed(self, files: int, size_in_bytes: int) -> None:
+        """Show the files found so far while indexing."""
+
+        self.label.setText(
+            f"Indexing files... {files} found ({size_fmt(size_in_bytes)})"
+        )
+
+    def update_max_progress(self, max_progress: int) -> None:
+        """Show the files to be validated once they have been counted."""
+
+        self.summary = (
+            f"Validating {max_progress + 1} items..."
+            f" ({size_fmt(self.runner.size_in_bytes)})"
+        )
+        self.label.setText(self.summary)
+        # The bar shows the fraction of bytes done, so large files move it smoothly
+        self.progress.setRange(0, PROGRESS_STEPS)
+
+    def job_failed(self, error: tuple[type[BaseException], BaseException, str]) -> None:
+        """Show a message box if the job raised an exception."""
+
+        self.failed = True
+        if not issubclass(error[0], RunnerKilledException):
+            QMessageBox.critical(self, "Error", f"{error[1]}")
 
     def job_done(self) -> None:
         """Show a message box when the job is done."""
 
+        if self.failed:
+            self.close()
+            return
+
         match self.runner.result_value:
             case True:
                 logger.info("Validation successful.")
@@ -0,0 +1,3 @@
+from .widget import JobQueue
+
+__all__ = ["JobQueue"]
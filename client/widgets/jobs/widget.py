@@ -0,0 +1,101 @@
+"""
+Custom widget class inherits the Qt built-in QTableWidget.
+
+Lists the jobs in the job scheduler; displayed in a dock at the bottom of the window.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QAbstractItemView, QMenu, QTableWidget, QTableWidgetItem
+
+from client.runners.generic import RunnerStatus
+
+if TYPE_CHECKING:
+    from PySide6.QtCore import QPoint
+
+    from client.runners.generic import GenericRunner
+    from client.runners.progress import Progress
+    from client.runners.scheduler import JobScheduler, ScheduledJob
+
+
+def job_status(job: ScheduledJob) -> str:
+    """Describe what a job in the scheduler is doing."""
+
+    runner: GenericRunner = job.runner
+    if runner.cancel_token.cancelled:
+        return "Stopping"
+    if not job.running:
+        return "Queued"
+    if runner.worker_status is RunnerStatus.PAUSED:
+        return "Paused"
+    return "Running"
+
+
+def job_progress(runner: GenericRunner) -> str:
+    """Describe how far a job has got, with its throughput and time remaining."""
+
+    progress: Progress | None = runner.tracker.latest
+    if progress is None:
+        return ""
+    text: str = f"{progress.fraction:.1%}"
+    speed: str = progress.describe()
+    return f"{text} ({speed})" if speed else text
+
+
+class JobQueue(QTableWidget):
+    """Table of the running and queued jobs, updated as they progress."""
+
+    def __init__(self, scheduler: JobScheduler) -> None:
+        """Initialize the table.
+
+        :param scheduler: scheduler whose jobs are shown
+        """
+
+        super().__init__(0, 4)
+        self.scheduler: JobScheduler = scheduler
+        self.runners: list[GenericRunner] = []
+
+        self.setHorizontalHeaderLabels(("Job", "Priority", "Status", "Progress"))
+        self.horizontalHeader().setStretchLastSection(True)
+        self.verticalHeader().hide()
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+
+        # Pause, resume or stop a job from its context menu
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_menu)
+
+        self.scheduler.changed.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Show the jobs in the scheduler as they are now."""
+
+        jobs: list[ScheduledJob] = self.scheduler.jobs()
+        self.runners = [job.runner for job in jobs]
+        self.setRowCount(len(jobs))
+        for row, job in enumerate(jobs):
+            for column, text in enumerate(
+                (
+                    job.runner.description,
+                    job.runner.priority.name.capitalize(),
+                    job_status(job),
+                    job_progress(job.runner),
+                )
+            ):
+                self.setItem(row, column, QTableWidgetItem(text))
+
+    def show_menu(self, pos: QPoint) -> None:
+        """Show the actions for the job under the cursor."""
+
+        row: int = self.rowAt(pos.y())
+        if row < 0 or row >= len(self.runners):
+            return
+        runner: GenericRunner = self.runners[row]
+        menu: QMenu = QMenu(self)
+        menu.addAction("Pause", runner.pause)
+        menu.addAction("Resume", runner.resume)
+        menu.addAction("Stop", runner.kill)
+        menu.exec(self.viewport().mapToGlobal(pos))
@@ -10,9 +10,11 @@ from typing import TYPE_CHECKING, Any
 
 from PySide6.QtCore import QSize, Qt
 from PySide6.QtWidgets import (
+    QDockWidget,
     QGridLayout,
     QLineEdit,
     QMainWindow,
+    QProgressBar,
     QSplitter,
     QStatusBar,
     QToolBar,
@@ -22,8 +24,10 @@ from PySide6.QtWidgets import (
 
 from client import actions
 from client.db import DatabaseView
+from client.runners import get_scheduler
 from client.utils import log
 from client.widgets.dialogue import CreatePrj, CreateScan, Login
+from client.widgets.jobs import JobQueue
 from client.widgets.metadata_panel import MetadataPanel
 from client.widgets.table import TableView
 from client.widgets.toolbox import ToolBox
@@ -73,8 +77,13 @@ class MainWindow(QMainWindow):
         This method should only be called during initialization (__init__).
         """
 
-        # Create status bar
+        # Create status bar, with an indicator shown while data is loading
         self.setStatusBar(QStatusBar())
+        self.loading_bar: QProgressBar = QProgressBar()
+        self.loading_bar.setRange(0, 0)
+        self.loading_bar.setMaximumWidth(120)
+        self.loading_bar.hide()
+        self.statusBar().addPermanentWidget(self.loading_bar)
 
         # Create metadata panel
         self.metadata_panel: QWidget = MetadataPanel()
@@ -87,6 +96,10 @@ class MainWindow(QMainWindow):
         self.table_view.doubleClicked.connect(self.open_act.trigger)
         self.search: QLineEdit = QLineEdit()
         self.search.setPlaceholderText("Search the table...")
+        self.search.textChanged.connect(self.update_table_act.search)
+        self.table_view.horizontalHeader().sortIndicatorChanged.connect(
+            self.update_table_act.sort
+        )
         self.table_layout.addWidget(self.search)
         self.table_layout.addWidget(self.table_view)
         table_widget.setLayout(self.table_layout)
@@ -116,6 +129,12 @@ class MainWindow(QMainWindow):
         widget.setLayout(layout)
         self.setCentralWidget(widget)
 
+        # Create the job queue, docked at the bottom of the window
+        self.job_queue: QWidget = JobQueue(get_scheduler())
+        self.jobs_dock: QDockWidget = QDockWidget("Jobs", self)
+        self.jobs_dock.setWidget(self.job_queue)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.jobs_dock)
+
     def _create_tool_bar(self) -> None:
         """Create the application toolbar.
 
@@ -162,6 +181,7 @@ class MainWindow(QMainWindow):
         view_menu = self.menuBar().addMenu("View")
         appearance_submenu = view_menu.addMenu("Appearance")
         appearance_submenu.addAction(self.full_screen_act)
+        view_menu.addAction(self.jobs_dock.toggleViewAction())
 
         # Create the Help menu
         help_menu = self.menuBar().addMenu("Help")
@@ -176,11 +196,7 @@ class MainWindow(QMainWindow):
         self.conn_str: str | None = None
         self.table_model: TableModel | None = None
         self.proxy_model: QSortFilterProxyModel | None = None
-        self.current_table_query: tuple = (
-            None,
-            None,
-            None,
-        )  # (cols, table, filter)
+        self.current_table_query: tuple = (None, ())  # (table, columns)
         self.toolbox: ToolBox | None = None
         self.current_metadata: tuple | None = None
 
@@ -232,7 +248,7 @@ class MainWindow(QMainWindow):
     def current_table(self) -> str:
         """Get the current table displayed."""
 
-        return self.current_table_query[1]
+        return self.current_table_query[0]
 
     def selected_row(self) -> tuple[Any, ...]:
         """Get the selected row in the table view."""
@@ -3,7 +3,11 @@ Custom widget class inherits the Qt built-in QWidget.
 
 Contains the metadata on the current entry; displayed on the right panel.
 """
+from __future__ import annotations
+
 import logging
+import os
+import sqlite3
 from datetime import date
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
@@ -23,11 +27,15 @@ from PySide6.QtWidgets import (
 )
 
 from client import settings
+from client.library import LibraryIndex
+from client.utils.indexer import scan_tree
 from client.widgets.thumbnail import Thumbnail
 
 if TYPE_CHECKING:
     from PySide6.QtWidgets import QLayout
 
+    from client.utils.indexer import FileTable
+
 
 def get_thumbnail(prj_id: int, scan_id: int | None = None) -> Path:
     """Return the first image in the scan directory as a thumbnail."""
@@ -53,11 +61,33 @@ def get_thumbnail(prj_id: int, scan_id: int | None = None) -> Path:
         "gif",
     )
 
-    # Search recursively for the first image in the scan directory
-    for ext in extensions:
-        images: tuple[Path, ...] = tuple(scan_dir.rglob(f"*.{ext}"))
-        if images:
-            return images[0]
+    def first_image(table: FileTable) -> Path | None:
+        """Return the first image in a table that still exists."""
+
+        for ext in extensions:
+            for rel_path in table.rel_paths:
+                if rel_path.endswith(f".{ext}") and os.path.isfile(
+                    table.path(rel_path)
+                ):
+                    return Path(table.path(rel_path))
+        return None
+
+    # Look for an image in the files recorded in the library index; this only reads
+    # the index, so it never waits for a job that is refreshing it
+    image: Path | None = None
+    try:
+        with LibraryIndex(timeout=0) as index:
+            recorded: FileTable | None = index.recorded(scan_dir)
+        if recorded is not None:
+            image = first_image(recorded)
+    except sqlite3.Error:
+        logging.debug("Library index is busy; scanning %s.", scan_dir, exc_info=True)
+
+    # The index may be out of date, so search the scan directory itself
+    if image is None:
+        image = first_image(scan_tree(scan_dir))
+    if image is not None:
+        return image
 
     # If no images are found, return the placeholder image
     return settings.placeholder_image
@@ -7,29 +7,87 @@ which is a subclass of QAbstractTableModel.
 The reason for using a custom model over the built-in models is for greater control over
 data representation.
 
+Large tables are loaded lazily: the model can be given a cursor, and Qt asks
+for more rows (canFetchMore and fetchMore) as the user scrolls towards the end of the
+rows loaded so far. Each page is fetched by a runner, off the GUI thread, and its rows
+are added when the runner's result arrives.
+
 Note: some PySide6 methods have bad type hints. When overloading methods, I have used
 the type hints from the base class even though they are incorrect. This does not affect
 the runtime behaviour of the code.
 """
 from __future__ import annotations
 
+import logging
 from datetime import date, datetime
 from typing import TYPE_CHECKING, Any
 
-from PySide6.QtCore import QAbstractTableModel, Qt
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal
+
+from client.db.cursor import PAGE_SIZE
+from client.runners.load import LoadPage
+from client.runners.scheduler import get_scheduler
 
 if TYPE_CHECKING:
-    from PySide6.QtCore import QModelIndex, QPersistentModelIndex
+    from collections.abc import Callable
+
+    from PySide6.QtCore import QPersistentModelIndex
+
+    from client.db.cursor import KeysetCursor
+    from client.runners.generic import GenericRunner
+    from client.runners.load import PageLoad
 
 
 class TableModel(QAbstractTableModel):
     """Define the custom table model, a subclass of a built-in Qt abstract model."""
 
-    def __init__(self, data: list[tuple[Any, ...]], column_headers: tuple[str]) -> None:
+    # Emitted with the number of rows loaded and the total number of rows
+    rows_loaded = Signal(int, int)
+
+    def __init__(
+        self,
+        data: list[tuple[Any, ...]],
+        column_headers: tuple[str],
+        cursor: KeysetCursor | None = None,
+        total_rows: int | None = None,
+        page_size: int = PAGE_SIZE,
+        start: Callable[[GenericRunner], None] | None = None,
+    ) -> None:
+        """Initialize the model.
+
+        :param data: rows loaded already
+        :param column_headers: column headers
+        :param cursor: cursor to fetch the rest of the rows from as they are needed
+        :param total_rows: number of rows in all, if known
+        :param page_size: rows fetched at a time from the cursor
+        :param start: runs the runner fetching a page; defaults to submitting it to
+            the job scheduler
+        """
+
         super().__init__()
         # Anticipate a list of tuples, as this is what database returns upon select.
         self._data = data or []
         self._column_headers = column_headers or []
+        self._cursor: KeysetCursor | None = cursor
+        self.total_rows: int = len(self._data) if total_rows is None else total_rows
+        self.page_size: int = page_size
+        self._start: Callable[[GenericRunner], None] | None = start
+        # Pages fetched for an older generation (i.e., before the model was closed) are
+        # discarded
+        self._generation: int = 0
+        self._page_runner: LoadPage | None = None
+
+    def close(self) -> None:
+        """Stop loading rows, releasing the cursor."""
+
+        self._generation += 1
+        if self._page_runner is not None:
+            self._page_runner.kill()
+            self._page_runner = None
+        if self._cursor is not None:
+            self._cursor.cancel()
+            self._cursor.close()
+            self._cursor = None
 
     def data(
         self,
@@ -67,7 +125,7 @@ class TableModel(QAbstractTableModel):
         return None
 
     def rowCount(self, _parent: QModelIndex | QPersistentModelIndex = ...) -> int:
-        """Return the length of the outer list."""
+        """Return the number of rows loaded so far."""
 
         return len(self._data)
 
@@ -75,12 +133,61 @@ class TableModel(QAbstractTableModel):
         self,
         _parent: QModelIndex | QPersistentModelIndex = ...,
     ) -> int:
-        """Take the first sub-list and return the length.
-
-        This only works if all the rows are of equal length!
-        """
-
-        return len(self._data[0])
+        """Return the number of columns."""
+
+        return len(self._column_headers)
+
+    def canFetchMore(self, parent: QModelIndex | QPersistentModelIndex) -> bool:
+        """Return whether the cursor has rows still to load, and none are loading."""
+
+        return (
+            not parent.isValid()
+            and self._cursor is not None
+            and self._page_runner is None
+        )
+
+    def _on_page_loaded(self, result: PageLoad) -> None:
+        """Add a loaded page of rows, unless the model has been closed since."""
+
+        if result.generation != self._generation or self._cursor is None:
+            return
+        self._page_runner = None
+        if result.rows:
+            self.beginInsertRows(
+                QModelIndex(), len(self._data), len(self._data) + len(result.rows) - 1
+            )
+            self._data.extend(result.rows)
+            self.endInsertRows()
+        if result.exhausted:
+            # The count may be out of date if rows were added or removed since
+            self.total_rows = len(self._data)
+            self._cursor = None
+        else:
+            self.total_rows = max(self.total_rows, len(self._data))
+        self.rows_loaded.emit(len(self._data), self.total_rows)
+
+    def _on_page_error(self, error: tuple[type, BaseException, str]) -> None:
+        """Let the page be fetched again, e.g., when the user scrolls again."""
+
+        if self._page_runner is None or self._cursor is None:
+            # The model was closed, so the fetch was cancelled
+            return
+        self._page_runner = None
+        logging.error("Failed to load more rows: %s", error[1])
+
+    def fetchMore(self, parent: QModelIndex | QPersistentModelIndex) -> None:
+        """Start loading the next page of rows from the cursor."""
+
+        if not self.canFetchMore(parent):
+            return
+        runner: LoadPage = LoadPage(self._generation, self._cursor, self.page_size)
+        runner.signals.result.connect(self._on_page_loaded)
+        runner.signals.error.connect(self._on_page_error)
+        self._page_runner = runner
+        if self._start is None:
+            get_scheduler().submit(runner)
+        else:
+            self._start(runner)
 
     def headerData(
         self,
@@ -98,6 +205,11 @@ class TableModel(QAbstractTableModel):
         # Not returning this makes headers not show, for whatever reason.
         return QAbstractTableModel.headerData(self, section, orientation, role)
 
+    @property
+    def column_headers(self) -> tuple[str, ...]:
+        """Return the column headers."""
+        return tuple(self._column_headers)
+
     def get_row_data(self, row_index: int) -> tuple[Any, ...]:
         """Return the row from a given row index."""
         return self._data[row_index]
@@ -0,0 +1,215 @@
+"""
+Benchmark the lookup indexes on a synthetic archive.
+
+Builds an archive of one million scans in a scratch schema, runs the hot lookups before
+and after applying the lookup index migration, and prints each query plan and the
+median time of each lookup. The scratch schema is dropped afterwards, so the script can
+be pointed at a development database:
+
+    python -m poetry run python scripts/benchmark_indexes.py "dbname=tams user=postgres"
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+import psycopg
+
+from client.db.migrate import split_statements
+
+MIGRATION: Path = (
+    Path(__file__).parents[1]
+    / "client"
+    / "db"
+    / "migrations"
+    / "0001_lookup_indexes.sql"
+)
+SCHEMA: str = "tams_benchmark"
+ANALYZE: str = (
+    'analyze instrument, "user", project, sample, scan, project_user, scan_sample'
+)
+
+# The tables the migration indexes, with only the columns the lookups need
+CREATE_TABLES: str = """
+create table instrument (
+    instrument_id integer generated by default as identity primary key,
+    name text
+);
+create table "user" (
+    user_id integer generated by default as identity primary key,
+    first_name text,
+    last_name text
+);
+create table project (
+    project_id integer generated by default as identity primary key,
+    title text
+);
+create table sample (
+    sample_id integer generated by default as identity primary key,
+    name text
+);
+create table scan (
+    scan_id integer generated by default as identity primary key,
+    scan_name text,
+    project_id integer not null references project,
+    instrument_id integer not null references instrument
+);
+create table project_user (
+    user_id integer not null references "user",
+    project_id integer not null references project
+);
+create table scan_sample (
+    sample_id integer not null references sample,
+    scan_id integer not null references scan
+);
+"""
+
+# Scans are spread over the projects and instruments; each project has a few users,
+# and each scan a couple of samples. Each statement is run on its own, as statements
+# with bound parameters cannot be combined
+POPULATE: tuple[str, ...] = (
+    "insert into instrument (name)"
+    " select 'Instrument ' || i from generate_series(1, %(instruments)s) as i",
+    'insert into "user" (first_name, last_name)'
+    " select 'First ' || i, 'Last ' || i from generate_series(1, %(users)s) as i",
+    "insert into project (title)"
+    " select 'Project ' || i from generate_series(1, %(projects)s) as i",
+    "insert into sample (name)"
+    " select 'Sample ' || i from generate_series(1, %(samples)s) as i",
+    "insert into scan (scan_name, project_id, instrument_id)"
+    " select 'Scan ' || i, 1 + (i::bigint * 7919) %% %(projects)s,"
+    " 1 + i %% %(instruments)s"
+    " from generate_series(1, %(scans)s) as i",
+    "insert into project_user (user_id, project_id)"
+    " select 1 + (p * 31 + u) %% %(users)s, p"
+    " from generate_series(1, %(projects)s) as p, generate_series(1, 3) as u",
+    "insert into scan_sample (sample_id, scan_id)"
+    " select 1 + (s * 13 + k) %% %(samples)s, s"
+    " from generate_series(1, %(scans)s) as s, generate_series(1, 2) as k",
+)
+
+LOOKUPS: dict[str, str] = {
+    "scans of a project": (
+        "select scan_id, scan_name from scan where project_id = %(project)s"
+    ),
+    "scans on an instrument": (
+        "select count(*) from scan where instrument_id = %(instrument)s"
+    ),
+    "users of a project": (
+        'select "user".user_id, first_name, last_name from project_user'
+        ' join "user" on "user".user_id = project_user.user_id'
+        " where project_user.project_id = %(project)s"
+    ),
+    "projects of a user": (
+        "select project.project_id, title from project_user"
+        " join project on project.project_id = project_user.project_id"
+        " where project_user.user_id = %(user)s"
+    ),
+    "samples of a scan": (
+        "select sample.sample_id, name from scan_sample"
+        " join sample on sample.sample_id = scan_sample.sample_id"
+        " where scan_sample.scan_id = %(scan)s"
+    ),
+    "scans of a sample": (
+        "select scan.scan_id, scan_name from scan_sample"
+        " join scan on scan.scan_id = scan_sample.scan_id"
+        " where scan_sample.sample_id = %(sample)s"
+    ),
+}
+
+
+def time_lookup(
+    cur: psycopg.Cursor[Any], query: str, params: dict[str, int], repeats: int
+) -> float:
+    """Run a lookup several times and return the median time in milliseconds."""
+
+    times: list[float] = []
+    for _ in range(repeats):
+        start: float = time.perf_counter()
+        cur.execute(query, params)
+        cur.fetchall()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def run_lookups(
+    cur: psycopg.Cursor[Any], params: dict[str, int], repeats: int
+) -> dict[str, float]:
+    """Print the plan of each lookup and return its median time."""
+
+    timings: dict[str, float] = {}
+    for name, query in LOOKUPS.items():
+        cur.execute(f"explain (analyze, buffers) {query}", params)
+        print(f"\n-- {name}")
+        print("\n".join(row[0] for row in cur.fetchall()))
+        timings[name] = time_lookup(cur, query, params, repeats)
+    return timings
+
+
+def main() -> None:
+    """Build the synthetic archive, then benchmark the lookups."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("conn_str", help="psycopg connection string")
+    parser.add_argument("--scans", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    sizes: dict[str, int] = {
+        "scans": args.scans,
+        "projects": max(args.scans // 100, 1),
+        "instruments": 20,
+        "users": max(args.scans // 1000, 1),
+        "samples": max(args.scans // 5, 1),
+    }
+    # Look up rows in the middle of the archive
+    params: dict[str, int] = {
+        "project": sizes["projects"] // 2,
+        "instrument": sizes["instruments"] // 2,
+        "user": sizes["users"] // 2,
+        "scan": sizes["scans"] // 2,
+        "sample": sizes["samples"] // 2,
+    }
+
+    with psycopg.connect(args.conn_str, autocommit=True) as conn:
+        cur: psycopg.Cursor[Any] = conn.cursor()
+        cur.execute(f"drop schema if exists {SCHEMA} cascade")
+        cur.execute(f"create schema {SCHEMA}")
+        try:
+            cur.execute(f"set search_path to {SCHEMA}")
+            print(f"Building an archive of {sizes['scans']} scans...")
+            start: float = time.perf_counter()
+            cur.execute(CREATE_TABLES)
+            for statement in POPULATE:
+                cur.execute(statement, sizes)
+            cur.execute(ANALYZE)
+            print(f"Built in {time.perf_counter() - start:.1f} s")
+
+            print("\n== Without the lookup indexes")
+            before: dict[str, float] = run_lookups(cur, params, args.repeats)
+
+            start = time.perf_counter()
+            # Run the statements one by one, as the indexes are built concurrently
+            for statement in split_statements(MIGRATION.read_text(encoding="utf8")):
+                cur.execute(statement)
+            cur.execute(ANALYZE)
+            print(f"\nApplied {MIGRATION.name} in {time.perf_counter() - start:.1f} s")
+
+            print("\n== With the lookup indexes")
+            after: dict[str, float] = run_lookups(cur, params, args.repeats)
+        finally:
+            cur.execute(f"drop schema if exists {SCHEMA} cascade")
+
+    print(f"\n{'lookup':<24}{'before (ms)':>12}{'after (ms)':>12}{'speedup':>10}")
+    for name in LOOKUPS:
+        print(
+            f"{name:<24}{before[name]:>12.2f}{after[name]:>12.2f}"
+            f"{before[name] / after[name]:>9.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()